@@ -1,75 +1,112 @@
 # app/api/endpoints/analytics.py
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, case
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, and_, true
+from app.database import get_async_db
 from app.dependencies import get_current_user_role, get_current_department_id
+from app.services.analytics_cache import analytics_cache
 from app.models import (
     ProgramCount, Event, Department, AcademicYear, 
-    WorkflowStatus, Notification, User
+    WorkflowStatus, Notification, User,
+    DepartmentBudgetRollup, DepartmentEventRollup
 )
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
 
 router = APIRouter()
 
+async def resolve_academic_year_id(db: AsyncSession, academic_year_id: int = None):
+    """Fall back to the current (enabled) academic year when none is specified"""
+    if academic_year_id:
+        return academic_year_id
+    result = await db.execute(select(AcademicYear.id).filter(AcademicYear.is_enabled == True).limit(1))
+    return result.scalar()
+
 @router.get("/analytics/dashboard-overview")
 async def get_dashboard_overview(
     academic_year_id: int = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_role: str = Depends(get_current_user_role),
     current_user_dept_id: int = Depends(get_current_department_id)
 ):
     """Get comprehensive dashboard overview with key metrics"""
     
     # Get current academic year if not specified
-    if not academic_year_id:
-        current_year = db.query(AcademicYear).filter(AcademicYear.is_enabled == True).first()
-        academic_year_id = current_year.id if current_year else None
+    academic_year_id = await resolve_academic_year_id(db, academic_year_id)
     
     if not academic_year_id:
         raise HTTPException(status_code=404, detail="No active academic year found")
     
+    cache_key = analytics_cache.key("dashboard-overview", academic_year_id, current_user_role, current_user_dept_id)
+    cached = analytics_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     # Filter by department for HoDs, all departments for Principal
     dept_filter = [current_user_dept_id] if current_user_role == 'hod' else None
     
-    # 1. Budget Overview
-    budget_query = db.query(ProgramCount).filter(ProgramCount.academic_year_id == academic_year_id)
+    budget_filters = [ProgramCount.academic_year_id == academic_year_id]
+    events_filters = [Event.academic_year_id == academic_year_id]
+    status_filters = [WorkflowStatus.academic_year_id == academic_year_id]
     if dept_filter:
-        budget_query = budget_query.filter(ProgramCount.department_id.in_(dept_filter))
+        budget_filters.append(ProgramCount.department_id.in_(dept_filter))
+        events_filters.append(Event.department_id.in_(dept_filter))
+        status_filters.append(WorkflowStatus.department_id.in_(dept_filter))
     
-    budget_data = budget_query.all()
-    total_budget = sum([item.total_budget for item in budget_data])
-    total_programs = sum([item.count for item in budget_data])
+    # 1. Budget Overview
+    budget_totals = select(
+        func.coalesce(func.sum(ProgramCount.total_budget), 0).label('total_budget'),
+        func.coalesce(func.sum(ProgramCount.count), 0).label('total_programs')
+    ).filter(*budget_filters).subquery()
     
     # 2. Events Overview
-    events_query = db.query(Event).filter(Event.academic_year_id == academic_year_id)
-    if dept_filter:
-        events_query = events_query.filter(Event.department_id.in_(dept_filter))
-    
-    total_events = events_query.count()
-    completed_events = events_query.filter(Event.event_status == 'completed').count()
-    ongoing_events = events_query.filter(Event.event_status == 'ongoing').count()
-    planned_events = events_query.filter(Event.event_status == 'planned').count()
+    event_totals = select(
+        func.count(Event.id).label('total_events'),
+        func.count(Event.id).filter(Event.event_status == 'completed').label('completed_events'),
+        func.count(Event.id).filter(Event.event_status == 'ongoing').label('ongoing_events'),
+        func.count(Event.id).filter(Event.event_status == 'planned').label('planned_events')
+    ).filter(*events_filters).subquery()
     
     # 3. Department Status
-    status_query = db.query(WorkflowStatus).filter(WorkflowStatus.academic_year_id == academic_year_id)
-    if dept_filter:
-        status_query = status_query.filter(WorkflowStatus.department_id.in_(dept_filter))
-    
-    draft_count = status_query.filter(WorkflowStatus.status == 'draft').count()
-    submitted_count = status_query.filter(WorkflowStatus.status == 'submitted').count()
-    approved_count = status_query.filter(WorkflowStatus.status == 'approved').count()
-    completed_count = status_query.filter(WorkflowStatus.status == 'completed').count()
+    status_totals = select(
+        func.count(WorkflowStatus.id).filter(WorkflowStatus.status == 'draft').label('draft_count'),
+        func.count(WorkflowStatus.id).filter(WorkflowStatus.status == 'submitted').label('submitted_count'),
+        func.count(WorkflowStatus.id).filter(WorkflowStatus.status == 'approved').label('approved_count'),
+        func.count(WorkflowStatus.id).filter(WorkflowStatus.status == 'completed').label('completed_count')
+    ).filter(*status_filters).subquery()
     
     # 4. Recent Activity (last 7 days)
     week_ago = datetime.now() - timedelta(days=7)
-    recent_notifications = db.query(Notification).filter(
+    recent_notifications = select(func.count(Notification.id)).filter(
         Notification.created_at >= week_ago
-    ).count()
-    
-    return {
+    ).scalar_subquery()
+    
+    # Each aggregate returns exactly one row, so the whole overview is a single round trip
+    overview = (await db.execute(
+        select(
+            budget_totals,
+            event_totals,
+            status_totals,
+            recent_notifications.label('recent_notifications')
+        ).select_from(budget_totals)
+        .join(event_totals, true())
+        .join(status_totals, true())
+    )).one()
+    
+    total_budget = float(overview.total_budget)
+    total_programs = overview.total_programs
+    total_events = overview.total_events
+    completed_events = overview.completed_events
+    ongoing_events = overview.ongoing_events
+    planned_events = overview.planned_events
+    draft_count = overview.draft_count
+    submitted_count = overview.submitted_count
+    approved_count = overview.approved_count
+    completed_count = overview.completed_count
+    recent_notifications = overview.recent_notifications
+    
+    response_data = {
         "budget_overview": {
             "total_budget": total_budget,
             "total_programs": total_programs,
@@ -92,33 +129,40 @@ async def get_dashboard_overview(
             "notifications_last_week": recent_notifications
         }
     }
+    
+    analytics_cache.set(cache_key, response_data)
+    return response_data
 
 @router.get("/analytics/budget-by-department")
 async def get_budget_by_department(
     academic_year_id: int = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_role: str = Depends(get_current_user_role),
     current_user_dept_id: int = Depends(get_current_department_id)
 ):
     """Get budget allocation by department for pie chart"""
     
-    if not academic_year_id:
-        current_year = db.query(AcademicYear).filter(AcademicYear.is_enabled == True).first()
-        academic_year_id = current_year.id if current_year else None
+    academic_year_id = await resolve_academic_year_id(db, academic_year_id)
+    
+    cache_key = analytics_cache.key("budget-by-department", academic_year_id, current_user_role, current_user_dept_id)
+    cached = analytics_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
-    # Filter by department for HoDs
-    query = db.query(
+    # Read the per-department budget rollup (one row per department and year)
+    query = select(
         Department.name,
         Department.full_name,
-        func.sum(ProgramCount.total_budget).label('total_budget')
-    ).join(ProgramCount).filter(
-        ProgramCount.academic_year_id == academic_year_id
-    ).group_by(Department.id, Department.name, Department.full_name)
+        DepartmentBudgetRollup.total_budget
+    ).join(DepartmentBudgetRollup, DepartmentBudgetRollup.department_id == Department.id).filter(
+        DepartmentBudgetRollup.academic_year_id == academic_year_id
+    ).order_by(Department.id)
     
+    # Filter by department for HoDs    
     if current_user_role == 'hod':
         query = query.filter(Department.id == current_user_dept_id)
     
-    results = query.all()
+    results = (await db.execute(query)).all()
     
     response_data = [
         {
@@ -130,26 +174,30 @@ async def get_budget_by_department(
         for result in results
     ]
     
+    analytics_cache.set(cache_key, response_data)
     return response_data
 
 @router.get("/analytics/events-timeline")
 async def get_events_timeline(
     academic_year_id: int = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_role: str = Depends(get_current_user_role),
     current_user_dept_id: int = Depends(get_current_department_id)
 ):
     """Get events timeline for the next 3 months"""
     
-    if not academic_year_id:
-        current_year = db.query(AcademicYear).filter(AcademicYear.is_enabled == True).first()
-        academic_year_id = current_year.id if current_year else None
+    academic_year_id = await resolve_academic_year_id(db, academic_year_id)
+    
+    cache_key = analytics_cache.key("events-timeline", academic_year_id, current_user_role, current_user_dept_id)
+    cached = analytics_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
     # Get events for next 3 months
     start_date = datetime.now()
     end_date = start_date + timedelta(days=90)
     
-    query = db.query(
+    query = select(
         Event.title,
         Event.event_date,
         Event.event_status,
@@ -166,9 +214,9 @@ async def get_events_timeline(
     if current_user_role == 'hod':
         query = query.filter(Event.department_id == current_user_dept_id)
     
-    results = query.all()
+    results = (await db.execute(query)).all()
     
-    return [
+    response_data = [
         {
             "title": result.title,
             "date": result.event_date.isoformat(),
@@ -179,44 +227,50 @@ async def get_events_timeline(
         }
         for result in results
     ]
+    
+    analytics_cache.set(cache_key, response_data)
+    return response_data
 
 @router.get("/analytics/monthly-budget-utilization")
 async def get_monthly_budget_utilization(
     academic_year_id: int = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_role: str = Depends(get_current_user_role),
     current_user_dept_id: int = Depends(get_current_department_id)
 ):
     """Get monthly budget utilization for line chart"""
     
-    if not academic_year_id:
-        current_year = db.query(AcademicYear).filter(AcademicYear.is_enabled == True).first()
-        academic_year_id = current_year.id if current_year else None
-    
-    # Get events grouped by month
-    query = db.query(
-        func.date_trunc('month', Event.event_date).label('month'),
-        func.sum(Event.budget_amount).label('utilized'),
-        func.count(Event.id).label('event_count')
-    ).filter(Event.academic_year_id == academic_year_id).group_by(
-        func.date_trunc('month', Event.event_date)
-    ).order_by('month')
+    academic_year_id = await resolve_academic_year_id(db, academic_year_id)
+    
+    cache_key = analytics_cache.key("monthly-budget-utilization", academic_year_id, current_user_role, current_user_dept_id)
+    cached = analytics_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Get events grouped by month from the monthly event rollup
+    query = select(
+        DepartmentEventRollup.month,
+        func.sum(DepartmentEventRollup.total_budget).label('utilized'),
+        func.sum(DepartmentEventRollup.event_count).label('event_count')
+    ).filter(DepartmentEventRollup.academic_year_id == academic_year_id).group_by(
+        DepartmentEventRollup.month
+    ).order_by(DepartmentEventRollup.month)
     
     if current_user_role == 'hod':
-        query = query.filter(Event.department_id == current_user_dept_id)
+        query = query.filter(DepartmentEventRollup.department_id == current_user_dept_id)
     
-    results = query.all()
+    results = (await db.execute(query)).all()
     
     # Get total allocated budget for comparison
-    budget_query = db.query(func.sum(ProgramCount.total_budget)).filter(
-        ProgramCount.academic_year_id == academic_year_id
+    budget_query = select(func.sum(DepartmentBudgetRollup.total_budget)).filter(
+        DepartmentBudgetRollup.academic_year_id == academic_year_id
     )
     if current_user_role == 'hod':
-        budget_query = budget_query.filter(ProgramCount.department_id == current_user_dept_id)
+        budget_query = budget_query.filter(DepartmentBudgetRollup.department_id == current_user_dept_id)
     
-    total_budget = budget_query.scalar() or 0
+    total_budget = (await db.execute(budget_query)).scalar() or 0
     
-    return {
+    response_data = {
         "total_allocated": float(total_budget),
         "monthly_data": [
             {
@@ -228,11 +282,14 @@ async def get_monthly_budget_utilization(
             for result in results
         ]
     }
+    
+    analytics_cache.set(cache_key, response_data)
+    return response_data
 
 @router.get("/analytics/department-performance")
 async def get_department_performance(
     academic_year_id: int = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_role: str = Depends(get_current_user_role)
 ):
     """Get department performance comparison (Principal only)"""
@@ -240,31 +297,47 @@ async def get_department_performance(
     if current_user_role != 'principal':
         raise HTTPException(status_code=403, detail="Access denied")
     
-    if not academic_year_id:
-        current_year = db.query(AcademicYear).filter(AcademicYear.is_enabled == True).first()
-        academic_year_id = current_year.id if current_year else None
+    academic_year_id = await resolve_academic_year_id(db, academic_year_id)
+    
+    cache_key = analytics_cache.key("department-performance", academic_year_id, current_user_role, None)
+    cached = analytics_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Aggregate budgets and events independently (one row per department each) before
+    # joining, so neither side multiplies the other's SUM/COUNT
+    budget_totals = select(
+        DepartmentBudgetRollup.department_id,
+        func.sum(DepartmentBudgetRollup.total_budget).label('budget_allocated')
+    ).filter(
+        DepartmentBudgetRollup.academic_year_id == academic_year_id
+    ).group_by(DepartmentBudgetRollup.department_id).subquery()
+    
+    event_totals = select(
+        DepartmentEventRollup.department_id,
+        func.sum(DepartmentEventRollup.event_count).label('events_planned'),
+        func.sum(DepartmentEventRollup.completed_count).label('events_completed'),
+        func.sum(DepartmentEventRollup.completed_budget).label('budget_utilized')
+    ).filter(
+        DepartmentEventRollup.academic_year_id == academic_year_id
+    ).group_by(DepartmentEventRollup.department_id).subquery()
     
     # Get performance metrics by department
-    performance_data = db.query(
+    performance_query = select(
         Department.name,
         Department.full_name,
-        func.coalesce(func.sum(ProgramCount.total_budget), 0).label('budget_allocated'),
-        func.coalesce(func.count(Event.id), 0).label('events_planned'),
-        func.coalesce(func.sum(
-            case((Event.event_status == 'completed', Event.budget_amount), else_=0)
-        ), 0).label('budget_utilized'),
-        func.coalesce(func.count(
-            case((Event.event_status == 'completed', 1), else_=None)
-        ), 0).label('events_completed')
-    ).outerjoin(ProgramCount, and_(
-        Department.id == ProgramCount.department_id,
-        ProgramCount.academic_year_id == academic_year_id
-    )).outerjoin(Event, and_(
-        Department.id == Event.department_id,
-        Event.academic_year_id == academic_year_id
-    )).group_by(Department.id, Department.name, Department.full_name).all()
-    
-    return [
+        func.coalesce(budget_totals.c.budget_allocated, 0).label('budget_allocated'),
+        func.coalesce(event_totals.c.events_planned, 0).label('events_planned'),
+        func.coalesce(event_totals.c.budget_utilized, 0).label('budget_utilized'),
+        func.coalesce(event_totals.c.events_completed, 0).label('events_completed')
+    ).outerjoin(
+        budget_totals, budget_totals.c.department_id == Department.id
+    ).outerjoin(
+        event_totals, event_totals.c.department_id == Department.id
+    ).order_by(Department.id)
+    performance_data = (await db.execute(performance_query)).all()
+    
+    response_data = [
         {
             "department": result.name,
             "full_name": result.full_name,
@@ -278,3 +351,13 @@ async def get_department_performance(
         }
         for result in performance_data
     ]
+    
+    analytics_cache.set(cache_key, response_data)
+    return response_data
+
+@router.get("/analytics/cache-stats")
+async def get_analytics_cache_stats(current_user_role: str = Depends(get_current_user_role)):
+    """Hit ratio and size of the analytics response cache (Admin only)"""
+    if current_user_role != 'admin':
+        raise HTTPException(status_code=403, detail="Only Admins can view cache statistics")
+    return analytics_cache.stats()
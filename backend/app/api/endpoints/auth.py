@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app import models, schemas, crud  # make sure crud is imported
 from pydantic import BaseModel
+from app.dependencies import get_principal_decode_stats, azure_jwks_store, principal_cache, get_current_user_role
 
 router = APIRouter()
 
@@ -14,3 +15,20 @@ def login(email: str = Query(...), db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
+
+@router.get("/principal-stats")
+def principal_stats(current_user_role: str = Depends(get_current_user_role)):
+    """Number of token decodes/user lookups performed per route since startup (Admin only)"""
+    if current_user_role != 'admin':
+        raise HTTPException(status_code=403, detail="Only Admins can view authentication statistics")
+    return {
+        "principal_decodes": get_principal_decode_stats(),
+        "principal_cache": principal_cache.stats()
+    }
+
+@router.get("/jwks-stats")
+def jwks_stats(current_user_role: str = Depends(get_current_user_role)):
+    """Azure AD signing key cache statistics (Admin only)"""
+    if current_user_role != 'admin':
+        raise HTTPException(status_code=403, detail="Only Admins can view authentication statistics")
+    return azure_jwks_store.get_stats()
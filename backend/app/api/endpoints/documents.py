@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request, Response, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import Optional
 from app.database import get_db
-from app.models import Event, Document, WorkflowStatus
-from app.services.document_service import save_event_document, get_event_documents, approve_document, reject_document
+from app.models import Event, Document
+from app.services.document_service import save_event_document, get_event_documents, encode_document_cursor, approve_document, reject_document, revert_completed_events
 from app.dependencies import get_current_user_role, get_current_user_id
+from app.services.analytics_cache import analytics_cache
+from app.services.blob_storage import blob_store, release_file, collect_garbage, storage_report
+from app.services.upload_sessions import upload_sessions, UPLOAD_SESSION_MAX_SIZE
+from app.services.file_downloads import conditional_file_response
+from app.services.file_processing import get_file_metadata, get_thumbnail_path
 from pydantic import BaseModel
 from datetime import datetime
 import os
@@ -15,6 +20,9 @@ router = APIRouter()
 UPLOAD_DIR = "uploads/documents"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Per-file cap for direct event document uploads (larger files go through upload sessions)
+EVENT_DOCUMENT_MAX_FILE_SIZE = int(os.getenv("EVENT_DOCUMENT_MAX_FILE_SIZE", 100 * 1024 * 1024))  # 100MB
+
 # Pydantic models for API responses
 class EventDocumentResponse(BaseModel):
     id: int
@@ -30,8 +38,21 @@ class EventDocumentResponse(BaseModel):
     rejected_at: Optional[datetime]
     rejection_reason: Optional[str]
 
+class UploadSessionCreate(BaseModel):
+    event_id: int
+    doc_type: str  # 'report' or 'zip'
+    filename: str
+    total_size: int
+    content_type: Optional[str] = None
+
+# Allowed extensions per document kind for resumable uploads
+UPLOAD_SESSION_EXTENSIONS = {
+    'report': {'.pdf', '.doc', '.docx'},
+    'zip': {'.zip'}
+}
+
 @router.post("/upload/{event_id}")
-def upload_event_documents(
+async def upload_event_documents(
     event_id: int, 
     report: UploadFile = File(...), 
     zipfile: UploadFile = File(...), 
@@ -41,7 +62,8 @@ def upload_event_documents(
     current_user_id: int = Depends(get_current_user_id)
 ):
     """Upload report and/or zip file for an event (can be individual uploads)"""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    # The files are streamed on the event loop; database work (sync Session) runs in the threadpool
+    event = await run_in_threadpool(lambda: db.query(Event).filter(Event.id == event_id).first())
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
@@ -79,17 +101,16 @@ def upload_event_documents(
         if is_real_report:
             # Save report (PDF, DOC, or DOCX)
             report_filename = f"event_{event_id}_report_{report.filename}"
-            report_path = os.path.join(UPLOAD_DIR, report_filename)
-            with open(report_path, "wb") as f:
-                f.write(report.file.read())
+            report_blob = await blob_store.save_upload(report, EVENT_DOCUMENT_MAX_FILE_SIZE)
             
-            report_doc = save_event_document(
-                db=db, 
+            report_doc = await run_in_threadpool(
+                save_event_document,
+                db=db,
                 event_id=event_id, 
                 doc_type="report", 
                 filename=report_filename, 
-                file_path=report_path,
-                file_size=report.size or 0,
+                file_path=report_blob.path,
+                file_size=report_blob.size,
                 mime_type=report.content_type,
                 uploaded_by=current_user_id
             )
@@ -103,17 +124,16 @@ def upload_event_documents(
         if is_real_zip:
             # Save zip file
             zip_filename = f"event_{event_id}_files_{zipfile.filename}"
-            zip_path = os.path.join(UPLOAD_DIR, zip_filename)
-            with open(zip_path, "wb") as f:
-                f.write(zipfile.file.read())
+            zip_blob = await blob_store.save_upload(zipfile, EVENT_DOCUMENT_MAX_FILE_SIZE)
             
-            zip_doc = save_event_document(
+            zip_doc = await run_in_threadpool(
+                save_event_document,
                 db=db,
                 event_id=event_id,
                 doc_type="zip",
                 filename=zip_filename,
-                file_path=zip_path,
-                file_size=zipfile.size or 0,
+                file_path=zip_blob.path,
+                file_size=zip_blob.size,
                 mime_type=zipfile.content_type,
                 uploaded_by=current_user_id
             )
@@ -133,13 +153,172 @@ def upload_event_documents(
             "zip_uploaded": is_real_zip
         }
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+# =====================================================
+# Resumable (chunked) uploads
+# =====================================================
+
+def _get_owned_upload_session(session_id: str, current_user_id: int, current_user_role: str):
+    meta = upload_sessions.get_meta(session_id)
+    if meta["uploaded_by"] != current_user_id and current_user_role != 'admin':
+        raise HTTPException(status_code=403, detail="Not your upload session")
+    return meta
+
+@router.post("/upload-sessions")
+def create_upload_session(
+    payload: UploadSessionCreate,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Start a resumable upload of an event report or ZIP"""
+    if payload.doc_type not in UPLOAD_SESSION_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="doc_type must be 'report' or 'zip'")
+    
+    extension = os.path.splitext(payload.filename.lower())[1]
+    if extension not in UPLOAD_SESSION_EXTENSIONS[payload.doc_type]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid {payload.doc_type} file type. Allowed: {', '.join(sorted(UPLOAD_SESSION_EXTENSIONS[payload.doc_type]))}. Got: {extension}"
+        )
+    
+    if payload.total_size <= 0 or payload.total_size > UPLOAD_SESSION_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File size must be between 1 byte and {UPLOAD_SESSION_MAX_SIZE / (1024*1024):.0f}MB"
+        )
+    
+    event = db.query(Event).filter(Event.id == payload.event_id).first()
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    
+    return upload_sessions.create(
+        event_id=payload.event_id,
+        doc_type=payload.doc_type,
+        filename=payload.filename,
+        total_size=payload.total_size,
+        content_type=payload.content_type,
+        uploaded_by=current_user_id
+    )
+
+@router.get("/upload-sessions/{session_id}")
+def get_upload_session(
+    session_id: str,
+    current_user_role: str = Depends(get_current_user_role),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Report how many bytes have been received, so an interrupted upload can resume"""
+    _get_owned_upload_session(session_id, current_user_id, current_user_role)
+    return upload_sessions.status(session_id)
+
+@router.put("/upload-sessions/{session_id}")
+async def upload_session_chunk(
+    session_id: str,
+    offset: int,
+    request: Request,
+    current_user_role: str = Depends(get_current_user_role),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Append the raw request body at `offset` (must equal the current uploaded size)"""
+    _get_owned_upload_session(session_id, current_user_id, current_user_role)
+    return await upload_sessions.write_chunk(session_id, offset, request.stream())
+
+@router.post("/upload-sessions/{session_id}/finalize")
+def finalize_upload_session(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user_role: str = Depends(get_current_user_role),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Store a fully received upload and attach it to its event"""
+    meta = _get_owned_upload_session(session_id, current_user_id, current_user_role)
+    try:
+        with upload_sessions.locked(session_id):
+            session_status = upload_sessions.status(session_id)
+            if not session_status["complete"]:
+                raise HTTPException(
+                    status_code=409,
+                    detail={"message": "Upload is not complete", "offset": session_status["offset"], "total_size": meta["total_size"]}
+                )
+            blob = blob_store.store_file(upload_sessions.data_path(session_id))
+    except FileNotFoundError:
+        # A concurrent finalize already moved the data into the blob store
+        raise HTTPException(status_code=409, detail="Upload session is already being finalized")
+    
+    filename = f"event_{meta['event_id']}_{'report' if meta['doc_type'] == 'report' else 'files'}_{meta['filename']}"
+    try:
+        document = save_event_document(
+            db=db,
+            event_id=meta["event_id"],
+            doc_type=meta["doc_type"],
+            filename=filename,
+            file_path=blob.path,
+            file_size=blob.size,
+            mime_type=meta.get("content_type"),
+            uploaded_by=meta["uploaded_by"]
+        )
     except Exception as e:
+        db.rollback()
+        release_file(db, blob.path)
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+    finally:
+        upload_sessions.discard(session_id)
+    
+    return {
+        "message": "Successfully uploaded 1 document(s)",
+        "uploaded_files": [{
+            "type": meta["doc_type"],
+            "document_id": document.id,
+            "filename": filename
+        }]
+    }
+
+@router.delete("/upload-sessions/{session_id}")
+def cancel_upload_session(
+    session_id: str,
+    current_user_role: str = Depends(get_current_user_role),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Abandon a resumable upload and discard the bytes received"""
+    _get_owned_upload_session(session_id, current_user_id, current_user_role)
+    upload_sessions.discard(session_id)
+    return {"message": "Upload session cancelled"}
 
 @router.get("/list")
-def get_event_documents_list(db: Session = Depends(get_db)):
-    """Get list of all event documents with compatibility mapping"""
-    documents = get_event_documents(db)
+def get_event_documents_list(
+    response: Response,
+    department_id: Optional[int] = None,
+    academic_year_id: Optional[int] = None,
+    status: Optional[str] = None,
+    document_type: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """
+    Get event documents (newest first) with compatibility mapping.
+    Pass `limit` to page: the X-Next-Cursor header carries the cursor for the next page.
+    """
+    try:
+        # Fetch one extra row to know whether another page exists
+        documents = get_event_documents(
+            db,
+            department_id=department_id,
+            academic_year_id=academic_year_id,
+            status=status,
+            document_type=document_type,
+            cursor=cursor,
+            limit=limit + 1 if limit else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if limit and len(documents) > limit:
+        documents = documents[:limit]
+        response.headers["X-Next-Cursor"] = encode_document_cursor(documents[-1])
     
     # Convert to response format with doc_type mapping
     response_docs = []
@@ -232,8 +411,8 @@ def reject_event_document(
         raise HTTPException(status_code=403, detail="Only principal can reject documents")
     
     try:
-        document = reject_document(db, document_id, current_user_id, reason)
-        return {"message": "Document rejected successfully", "document_id": document.id}
+        document, reverted = reject_document(db, document_id, current_user_id, reason)
+        return {"message": "Document rejected successfully", "document_id": document.id, **reverted}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -242,11 +421,10 @@ def reject_event_document(
 @router.get("/download/{document_id}")
 def download_document(
     document_id: int,
+    request: Request,
     db: Session = Depends(get_db)
 ):
-    """Download a document file"""
-    from app.models import Document
-    
+    """Download a document file (supports ETag revalidation and byte ranges)"""
     document = db.query(Document).filter(Document.id == document_id).first()
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
@@ -254,34 +432,42 @@ def download_document(
     if not os.path.exists(document.file_path):
         raise HTTPException(status_code=404, detail="File not found on server")
     
-    return FileResponse(
+    return conditional_file_response(
+        request,
         path=document.file_path,
         filename=document.original_filename,
-        media_type=document.mime_type or 'application/octet-stream'
+        media_type=document.mime_type or 'application/octet-stream',
+        last_modified=document.uploaded_at
     )
-    document.rejection_reason = reason
-    db.commit()
+
+@router.get("/metadata/{document_id}")
+def get_document_metadata(
+    document_id: int,
+    db: Session = Depends(get_db)
+):
+    """Metadata extracted in the background (hash, page count, ZIP check, thumbnail)"""
+    document = db.query(Document).filter(Document.id == document_id).first()
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
     
-    return {"message": "Document rejected successfully"}
+    return get_file_metadata(db, document.file_path)
 
-@router.get("/download/{document_id}")
-def download_document(
+@router.get("/thumbnail/{document_id}")
+def get_document_thumbnail(
     document_id: int,
+    request: Request,
     db: Session = Depends(get_db)
 ):
-    from app.models import Document
+    """Thumbnail of an uploaded image or of a PDF's first page"""
     document = db.query(Document).filter(Document.id == document_id).first()
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    if not os.path.exists(document.file_path):
-        raise HTTPException(status_code=404, detail="File not found on disk")
+    thumbnail_path = get_thumbnail_path(db, document.file_path)
+    if not thumbnail_path or not os.path.exists(thumbnail_path):
+        raise HTTPException(status_code=404, detail="Thumbnail not available")
     
-    return FileResponse(
-        path=document.file_path,
-        filename=document.filename,
-        media_type='application/octet-stream'
-    )
+    return conditional_file_response(request, path=thumbnail_path, media_type="image/jpeg")
 
 @router.delete("/delete/{document_id}")
 def delete_document(
@@ -307,40 +493,34 @@ def delete_document(
     document.status = 'deleted'
     document.updated_at = datetime.now()
     
-    # If this document belongs to an event, revert all events in academic year to planned
-    if document.event_id:
-        event = db.query(Event).filter(Event.id == document.event_id).first()
-        if event and event.academic_year_id:
-            # Get all events in the same academic year that are completed
-            completed_events = db.query(Event).filter(
-                Event.academic_year_id == event.academic_year_id,
-                Event.event_status == 'completed'
-            ).all()
-            
-            # Revert all completed events to planned
-            for year_event in completed_events:
-                year_event.event_status = 'planned'
-                print(f"⚠️ Event {year_event.id} ({year_event.title}) status reverted to 'planned' - document deleted in academic year")
-            
-            # Also revert the workflow status if it was 'completed'
-            workflow_status = db.query(WorkflowStatus).filter(
-                WorkflowStatus.department_id == event.department_id,
-                WorkflowStatus.academic_year_id == event.academic_year_id
-            ).first()
-            
-            if workflow_status and workflow_status.status == 'completed':
-                workflow_status.status = 'events_planned'  # Revert to previous state
-                workflow_status.updated_at = datetime.now()
-                print(f"⚠️ Workflow status reverted to 'events_planned' for department {event.department_id}, academic year {event.academic_year_id} - document deleted")
-    
-    # Delete the actual file
-    try:
-        if os.path.exists(document.file_path):
-            os.remove(document.file_path)
-    except Exception as e:
-        # Log the error but don't fail the request
-        print(f"Error deleting file {document.file_path}: {e}")
+    # If this document belongs to an event, revert the department's completed events to planned
+    reverted = revert_completed_events(db, document, reason="document_deleted")
     
     db.commit()
+    analytics_cache.invalidate(document.academic_year_id)
     
-    return {"message": "Document deleted successfully"}
+    # Delete the actual file once no other document shares it
+    release_file(db, document.file_path)
+    
+    return {"message": "Document deleted successfully", **reverted}
+
+@router.get("/storage/report")
+def get_storage_report(
+    db: Session = Depends(get_db),
+    current_user_role: str = Depends(get_current_user_role)
+):
+    """Deduplication report for stored files (Admin only)"""
+    if current_user_role != 'admin':
+        raise HTTPException(status_code=403, detail="Only Admins can view storage usage")
+    return storage_report(db)
+
+@router.post("/storage/gc")
+def collect_storage_garbage(
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+    current_user_role: str = Depends(get_current_user_role)
+):
+    """Delete stored files that no document references any more (Admin only)"""
+    if current_user_role != 'admin':
+        raise HTTPException(status_code=403, detail="Only Admins can collect unused files")
+    return collect_garbage(db, dry_run=dry_run)
@@ -6,6 +6,8 @@ from app.database import get_db
 from app.models import Event, ProgramType, Department, AcademicYear
 from app.schemas import EventCreate, EventResponse
 from app.dependencies import get_current_user_role
+from app.services.analytics_rollup import refresh_department_rollups, refresh_rollups_for
+from app.services.analytics_cache import analytics_cache
 
 router = APIRouter()
 
@@ -65,7 +67,9 @@ def create_event(
     )
     
     db.add(db_event)
+    refresh_department_rollups(db, db_event.department_id, db_event.academic_year_id)
     db.commit()
+    analytics_cache.invalidate(db_event.academic_year_id)
     db.refresh(db_event)
     
     return db_event
@@ -132,6 +136,9 @@ def update_event(
     if event_update.event_date <= datetime.now().date():
         raise HTTPException(status_code=400, detail="Event date must be in the future")
     
+    # Remember the original slice in case the event moves department/year
+    old_rollup_key = (db_event.department_id, db_event.academic_year_id)
+    
     # Update event fields
     for field, value in event_update.dict(exclude_unset=True).items():
         setattr(db_event, field, value)
@@ -139,7 +146,9 @@ def update_event(
     db_event.updated_at = datetime.now()
     db_event.updated_by = 1  # TODO: Replace with actual user ID when user system is implemented
     
+    refresh_rollups_for(db, [old_rollup_key, (db_event.department_id, db_event.academic_year_id)])
     db.commit()
+    analytics_cache.invalidate(old_rollup_key[1], db_event.academic_year_id)
     db.refresh(db_event)
     
     return db_event
@@ -165,7 +174,9 @@ def delete_event(
         raise HTTPException(status_code=400, detail="Cannot delete events that have already started")
     
     db.delete(db_event)
+    refresh_department_rollups(db, db_event.department_id, db_event.academic_year_id)
     db.commit()
+    analytics_cache.invalidate(db_event.academic_year_id)
     
     return {"message": "Event deleted successfully"}
 
@@ -194,7 +205,9 @@ def update_event_status(
     db_event.updated_at = datetime.now()
     db_event.updated_by = 1  # TODO: Replace with actual user ID when user system is implemented
     
+    refresh_department_rollups(db, db_event.department_id, db_event.academic_year_id)
     db.commit()
+    analytics_cache.invalidate(db_event.academic_year_id)
     db.refresh(db_event)
     
     return {"message": f"Event status updated to {status}", "event": db_event}
@@ -1,10 +1,15 @@
 # app/api/endpoints/notifications.py
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel, EmailStr
+from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime
+from app.database import get_db
 from app.email_service import email_service
 from app.dependencies import get_current_user_role
+from app.models import OutboxEmail
+from app.services.email_outbox import email_outbox, describe_message, OUTBOX_STATUSES
 
 router = APIRouter()
 
@@ -48,13 +53,15 @@ class DeadlineReminderData(BaseModel):
     module_name: Optional[str] = "Budget Submission"
 
 @router.post("/send-budget-submission-notification")
-async def send_budget_submission_notification(
+def send_budget_submission_notification(
     data: BudgetSubmissionData,
+    db: Session = Depends(get_db),
     current_user_role: str = Depends(get_current_user_role)
 ):
     """Send notification when HoD submits budget for approval"""
     try:
-        success = await email_service.send_budget_submission_notification(
+        message = email_service.send_budget_submission_notification(
+            db,
             hod_email=data.hod_email,
             hod_name=data.hod_name,
             department_name=data.department_name,
@@ -62,23 +69,23 @@ async def send_budget_submission_notification(
             principal_email=data.principal_email,
             principal_name=data.principal_name
         )
-        
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to send email notification")
+        db.commit()
             
-        return {"message": "Budget submission notification sent successfully"}
+        return {"message": "Budget submission notification queued", "email_id": message.id}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error sending notification: {str(e)}")
 
 @router.post("/send-budget-approval-notification")
-async def send_budget_approval_notification(
+def send_budget_approval_notification(
     data: BudgetApprovalData,
+    db: Session = Depends(get_db),
     current_user_role: str = Depends(get_current_user_role)
 ):
     """Send notification when Principal approves/rejects budget"""
     try:
-        success = await email_service.send_budget_approval_notification(
+        message = email_service.send_budget_approval_notification(
+            db,
             hod_email=data.hod_email,
             hod_name=data.hod_name,
             department_name=data.department_name,
@@ -86,23 +93,23 @@ async def send_budget_approval_notification(
             approved=data.approved,
             remarks=data.remarks
         )
-        
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to send email notification")
+        db.commit()
             
-        return {"message": "Budget approval notification sent successfully"}
+        return {"message": "Budget approval notification queued", "email_id": message.id}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error sending notification: {str(e)}")
 
 @router.post("/send-event-submission-notification")
-async def send_event_submission_notification(
+def send_event_submission_notification(
     data: EventSubmissionData,
+    db: Session = Depends(get_db),
     current_user_role: str = Depends(get_current_user_role)
 ):
     """Send notification when HoD submits events for approval"""
     try:
-        success = await email_service.send_event_submission_notification(
+        message = email_service.send_event_submission_notification(
+            db,
             hod_email=data.hod_email,
             hod_name=data.hod_name,
             department_name=data.department_name,
@@ -111,23 +118,23 @@ async def send_event_submission_notification(
             principal_name=data.principal_name,
             event_count=data.event_count
         )
-        
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to send email notification")
+        db.commit()
             
-        return {"message": "Event submission notification sent successfully"}
+        return {"message": "Event submission notification queued", "email_id": message.id}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error sending notification: {str(e)}")
 
 @router.post("/send-deadline-reminder")
-async def send_deadline_reminder(
+def send_deadline_reminder(
     data: DeadlineReminderData,
+    db: Session = Depends(get_db),
     current_user_role: str = Depends(get_current_user_role)
 ):
     """Send deadline reminder notification"""
     try:
-        success = await email_service.send_deadline_reminder(
+        message = email_service.send_deadline_reminder(
+            db,
             user_email=data.user_email,
             user_name=data.user_name,
             department_name=data.department_name,
@@ -136,23 +143,23 @@ async def send_deadline_reminder(
             days_remaining=data.days_remaining,
             module_name=data.module_name
         )
-        
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to send email notification")
+        db.commit()
             
-        return {"message": "Deadline reminder sent successfully"}
+        return {"message": "Deadline reminder queued", "email_id": message.id}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error sending notification: {str(e)}")
 
 @router.post("/test-email")
-async def test_email(
+def test_email(
     to_email: EmailStr,
+    db: Session = Depends(get_db),
     current_user_role: str = Depends(get_current_user_role)
 ):
     """Test email functionality"""
     try:
-        success = await email_service.send_email(
+        message = email_service.send_email(
+            db,
             to_emails=[to_email],
             subject="Test Email from Academic Activity Portal",
             template_name="deadline_reminder.html",
@@ -167,11 +174,64 @@ async def test_email(
                 "year": "2025"
             }
         )
-        
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to send test email")
+        db.commit()
             
-        return {"message": f"Test email sent successfully to {to_email}"}
+        return {"message": f"Test email queued to {to_email}", "email_id": message.id}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error sending test email: {str(e)}")
+
+@router.get("/outbox")
+def list_outbox(
+    status: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user_role: str = Depends(get_current_user_role)
+):
+    """Delivery status of queued/sent/dead-lettered emails, newest first (Admin only)"""
+    if current_user_role != 'admin':
+        raise HTTPException(status_code=403, detail="Only Admins can view the email outbox")
+    if status is not None and status not in OUTBOX_STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(OUTBOX_STATUSES)}")
+    
+    query = db.query(OutboxEmail)
+    if status:
+        query = query.filter(OutboxEmail.status == status)
+    messages = query.order_by(OutboxEmail.id.desc()).limit(limit).all()
+    return [describe_message(message) for message in messages]
+
+@router.get("/outbox/{email_id}")
+def get_outbox_email(
+    email_id: int,
+    db: Session = Depends(get_db),
+    current_user_role: str = Depends(get_current_user_role)
+):
+    """Delivery status of one queued email (Admin only)"""
+    if current_user_role != 'admin':
+        raise HTTPException(status_code=403, detail="Only Admins can view the email outbox")
+    message = db.get(OutboxEmail, email_id)
+    if not message:
+        raise HTTPException(status_code=404, detail="Email not found")
+    return describe_message(message)
+
+@router.post("/outbox/{email_id}/retry")
+def retry_outbox_email(
+    email_id: int,
+    db: Session = Depends(get_db),
+    current_user_role: str = Depends(get_current_user_role)
+):
+    """Requeue a dead-lettered email with a fresh set of attempts (Admin only)"""
+    if current_user_role != 'admin':
+        raise HTTPException(status_code=403, detail="Only Admins can retry emails")
+    message = db.get(OutboxEmail, email_id)
+    if not message:
+        raise HTTPException(status_code=404, detail="Email not found")
+    if message.status != 'dead':
+        raise HTTPException(status_code=400, detail="Only dead-lettered emails can be retried")
+    
+    message.status = 'queued'
+    message.attempts = 0
+    message.next_attempt_at = datetime.now()
+    db.commit()
+    email_outbox.wake()
+    return describe_message(message)
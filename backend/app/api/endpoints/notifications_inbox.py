@@ -1,9 +1,9 @@
 # app/api/endpoints/notifications_inbox.py
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from app.database import get_db
+from app.database import get_async_db
 from app.notification_service import notification_service
 from app.schemas import NotificationOut, NotificationUpdate
 from app.dependencies import get_current_user_role, get_current_user_id
@@ -15,12 +15,12 @@ router = APIRouter()
 async def get_notifications(
     unread_only: bool = Query(False, description="Only return unread notifications"),
     limit: int = Query(50, description="Maximum number of notifications to return"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     """Get notifications for the current user"""
     
-    notifications = notification_service.get_user_notifications(
+    notifications = await notification_service.get_user_notifications_async(
         db=db,
         user_id=current_user_id,
         limit=limit,
@@ -31,23 +31,23 @@ async def get_notifications(
 
 @router.get("/notifications/unread-count")
 async def get_unread_count(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     """Get count of unread notifications"""
     
-    count = notification_service.get_unread_count(db=db, user_id=current_user_id)
+    count = await notification_service.get_unread_count_async(db=db, user_id=current_user_id)
     return {"unread_count": count}
 
 @router.patch("/notifications/{notification_id}/read")
 async def mark_notification_read(
     notification_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     """Mark a specific notification as read"""
     
-    success = notification_service.mark_as_read(
+    success = await notification_service.mark_as_read_async(
         db=db,
         notification_id=notification_id,
         user_id=current_user_id
@@ -60,23 +60,23 @@ async def mark_notification_read(
 
 @router.patch("/notifications/mark-all-read")
 async def mark_all_notifications_read(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     """Mark all notifications as read for the current user"""
     
-    count = notification_service.mark_all_as_read(db=db, user_id=current_user_id)
+    count = await notification_service.mark_all_as_read_async(db=db, user_id=current_user_id)
     return {"message": f"Marked {count} notifications as read"}
 
 @router.delete("/notifications/{notification_id}")
 async def delete_notification(
     notification_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     """Delete a notification"""
     
-    success = notification_service.delete_notification(
+    success = await notification_service.delete_notification_async(
         db=db,
         notification_id=notification_id,
         user_id=current_user_id
@@ -8,6 +8,8 @@ from app.models import ProgramCount
 from app.models import Department
 from app.models import WorkflowStatus
 from app.schemas import ProgramCountOut, ProgramCountBatch, PrincipalRemarksInput
+from app.services.analytics_rollup import refresh_rollups_for
+from app.services.analytics_cache import analytics_cache
 
 router = APIRouter()
 
@@ -52,7 +54,11 @@ def create_or_update_program_counts(payload: ProgramCountBatch, db: Session = De
             db.add(new_entry)
             created.append(new_entry)
 
+    # Keep the analytics rollups for the touched departments in step with this write
+    refresh_rollups_for(db, [(entry.department_id, entry.academic_year_id) for entry in payload.entries])
+
     db.commit()
+    analytics_cache.invalidate(*[entry.academic_year_id for entry in payload.entries])
     return created
 
 @router.post("/program-counts/remarks")
@@ -1,117 +1,217 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_
 from pydantic import BaseModel
-from app.database import get_db
-from app.models import Department, User, AcademicYear
+from app.database import get_async_db
+from app.models import Department, User, AcademicYear, ModuleDeadline, DeadlineOverride
 from app.email_service import email_service
+from app.dependencies import get_current_user_role
+from app.services.reminder_scheduler import (
+    reminder_scheduler, queue_deadline_reminders, effective_deadline, days_remaining, format_deadline, module_display_name
+)
+from collections import defaultdict
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 router = APIRouter()
 
 class ReminderRequest(BaseModel):
     dept_id: int
     academic_year_id: int
+    module: str = "program_entry"
 
 class BulkReminderRequest(BaseModel):
-    dept_ids: List[int]
     academic_year_id: int
+    module: str = "program_entry"
+    dept_ids: Optional[List[int]] = None
+    all_departments: bool = False  # every department instead of dept_ids
+    roles: List[str] = ["hod"]
+    all_roles: bool = False  # every user attached to the department
+
+async def get_department_deadlines(db: AsyncSession, academic_year_id: int, module: str, dept_ids: List[int]) -> dict:
+    """Effective deadline per department: the module deadline or an active override extending it"""
+    deadline = (await db.execute(
+        select(ModuleDeadline.deadline).filter(
+            ModuleDeadline.academic_year_id == academic_year_id,
+            ModuleDeadline.module == module
+        )
+    )).scalars().first()
+    if deadline is None:
+        raise HTTPException(status_code=404, detail=f"No deadline set for {module} in this academic year")
+    
+    now = datetime.now()
+    overrides = dict((await db.execute(
+        select(DeadlineOverride.department_id, DeadlineOverride.expires_at).filter(
+            DeadlineOverride.academic_year_id == academic_year_id,
+            DeadlineOverride.module_name == module,
+            DeadlineOverride.department_id.in_(dept_ids),
+            DeadlineOverride.enabled_by_principal == True,
+            DeadlineOverride.expires_at > now
+        )
+    )).all())
+    return {dept_id: effective_deadline(deadline, overrides.get(dept_id)) for dept_id in dept_ids}
 
 @router.post("/reminder/send")
-async def send_reminder(request: ReminderRequest, db: Session = Depends(get_db)):
+async def send_reminder(
+    request: ReminderRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_role: str = Depends(get_current_user_role)
+):
+    """Queue a deadline reminder to a department's HoD (Admin or Principal only)"""
+    if current_user_role not in ['admin', 'principal']:
+        raise HTTPException(status_code=403, detail="Only Admins and Principals can send reminders")
+    
     try:
         # Get department info
-        department = db.query(Department).filter(Department.id == request.dept_id).first()
+        department = await db.get(Department, request.dept_id)
         if not department:
             raise HTTPException(status_code=404, detail="Department not found")
         
         # Get academic year info
-        academic_year = db.query(AcademicYear).filter(AcademicYear.id == request.academic_year_id).first()
+        academic_year = await db.get(AcademicYear, request.academic_year_id)
         if not academic_year:
             raise HTTPException(status_code=404, detail="Academic year not found")
         
         # Get HoD email
-        hod = db.query(User).filter(
-            User.department_id == request.dept_id,
-            User.role == "hod"
-        ).first()
+        hod = (await db.execute(
+            select(User).filter(
+                User.department_id == request.dept_id,
+                User.role == "hod"
+            ).limit(1)
+        )).scalars().first()
         
         if not hod:
             raise HTTPException(status_code=404, detail="HoD not found for this department")
         
-        # Use the enhanced email service with professional HTML templates
-        success = await email_service.send_deadline_reminder(
+        deadline = (await get_department_deadlines(db, academic_year.id, request.module, [department.id]))[department.id]
+        
+        # Queue the reminder in the email outbox; it is sent in the background
+        message = email_service.send_deadline_reminder(
+            db,
             user_email=hod.email,
             user_name=hod.name,
             department_name=department.name,
             academic_year=academic_year.year,
-            deadline_date="2025-08-15",  # You can make this dynamic
-            days_remaining=3,  # Calculate actual remaining days
-            module_name="Budget Proposal Submission"
+            deadline_date=format_deadline(deadline),
+            days_remaining=days_remaining(deadline),
+            module_name=module_display_name(request.module)
         )
         
-        if success:
-            return {"message": f"Enhanced reminder sent successfully to {department.name}"}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to send email reminder")
+        await db.commit()
         
+        return {"message": f"Reminder queued for {department.name}", "email_id": message.id}
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to send reminder: {str(e)}")
 
 @router.post("/reminder/bulk-send")
-async def send_bulk_reminder(request: BulkReminderRequest, db: Session = Depends(get_db)):
-    """Send reminders to multiple departments at once"""
+async def send_bulk_reminder(
+    request: BulkReminderRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_role: str = Depends(get_current_user_role)
+):
+    """
+    Queue reminders for many departments at once (Admin or Principal only).
+    
+    Departments and their recipients are loaded in one query and every message
+    is added to the email outbox in a single commit; the outbox senders deliver
+    them concurrently (bounded by EMAIL_OUTBOX_WORKERS / SMTP_POOL_SIZE).
+    """
+    if current_user_role not in ['admin', 'principal']:
+        raise HTTPException(status_code=403, detail="Only Admins and Principals can send reminders")
+    if not request.all_departments and not request.dept_ids:
+        raise HTTPException(status_code=400, detail="Provide dept_ids or set all_departments")
+    
     try:
-        results = []
-        failed_departments = []
-        
         # Get academic year info
-        academic_year = db.query(AcademicYear).filter(AcademicYear.id == request.academic_year_id).first()
+        academic_year = await db.get(AcademicYear, request.academic_year_id)
         if not academic_year:
             raise HTTPException(status_code=404, detail="Academic year not found")
         
-        for dept_id in request.dept_ids:
-            try:
-                # Get department info
-                department = db.query(Department).filter(Department.id == dept_id).first()
-                if not department:
-                    failed_departments.append(f"Department ID {dept_id} not found")
-                    continue
-                
-                # Get HoD email
-                hod = db.query(User).filter(
-                    User.department_id == dept_id,
-                    User.role == "hod"
-                ).first()
-                
-                if not hod:
-                    failed_departments.append(f"HoD not found for {department.name}")
-                    continue
-                
-                # Send reminder using enhanced email service with HTML templates
-                success = await email_service.send_deadline_reminder(
-                    user_email=hod.email,
-                    user_name=hod.name,
-                    department_name=department.name,
-                    academic_year=academic_year.year,
-                    deadline_date="2025-08-15",  # Make dynamic
-                    days_remaining=3,  # Calculate actual days
-                    module_name="Budget Proposal Submission"
-                )
-                
-                if success:
-                    results.append(f"✅ {department.name}")
-                else:
-                    failed_departments.append(f"❌ {department.name} - Email failed")
-                    
-            except Exception as e:
-                failed_departments.append(f"❌ {department.name if 'department' in locals() else f'Dept ID {dept_id}'} - {str(e)}")
+        # Departments and their recipients in one round trip
+        recipient_filter = User.role.in_(request.roles) if not request.all_roles else User.id.isnot(None)
+        query = select(Department, User).outerjoin(
+            User, and_(User.department_id == Department.id, recipient_filter)
+        ).order_by(Department.id, User.id)
+        if not request.all_departments:
+            query = query.where(Department.id.in_(request.dept_ids))
         
+        departments = {}
+        recipients = defaultdict(list)
+        for department, user in (await db.execute(query)).all():
+            departments[department.id] = department
+            if user is not None:
+                recipients[department.id].append(user)
+        
+        dept_ids = list(departments) if request.all_departments else list(dict.fromkeys(request.dept_ids))
+        deadlines = await get_department_deadlines(db, academic_year.id, request.module, [d for d in dept_ids if d in departments])
+        results = []
+        reminders = []
+        for dept_id in dept_ids:
+            department = departments.get(dept_id)
+            if department is None:
+                results.append({"department_id": dept_id, "status": "not_found"})
+                continue
+            if not recipients[dept_id]:
+                results.append({"department_id": dept_id, "department_name": department.name, "status": "no_recipients"})
+                continue
+            
+            reminders.append({
+                "department_id": dept_id,
+                "department_name": department.name,
+                "academic_year": academic_year.year,
+                "module": request.module,
+                "deadline": deadlines[dept_id],
+                "days_remaining": days_remaining(deadlines[dept_id]),
+                "recipients": [(user.email, user.name) for user in recipients[dept_id]]
+            })
+            results.append({
+                "department_id": dept_id,
+                "department_name": department.name,
+                "status": "queued",
+                "recipients": [user.email for user in recipients[dept_id]],
+                "deadline": deadlines[dept_id],
+                "days_remaining": reminders[-1]["days_remaining"]
+            })
+        
+        # Messages sharing a deadline are rendered in one batch; all are queued in one commit
+        messages = queue_deadline_reminders(db, reminders)
+        await db.commit()
+        
+        email_ids = {
+            reminder["department_id"]: [message.id for message in messages[index]]
+            for index, reminder in enumerate(reminders)
+        }
+        for result in results:
+            if result["status"] == "queued":
+                result["email_ids"] = email_ids[result["department_id"]]
+        
+        successful = [f"✅ {r['department_name']}" for r in results if r["status"] == "queued"]
+        failed = [
+            f"Department ID {r['department_id']} not found" if r["status"] == "not_found"
+            else f"No recipients found for {r['department_name']}"
+            for r in results if r["status"] != "queued"
+        ]
         return {
-            "message": f"Bulk reminder completed. {len(results)} successful, {len(failed_departments)} failed.",
-            "successful": results,
-            "failed": failed_departments
+            "message": f"Bulk reminder completed. {len(successful)} queued, {len(failed)} failed.",
+            "successful": successful,
+            "failed": failed,
+            "results": results
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to send bulk reminders: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to send bulk reminders: {str(e)}")
+
+@router.post("/reminder/scheduler/run")
+def run_reminder_scheduler(
+    dry_run: bool = False,
+    current_user_role: str = Depends(get_current_user_role)
+):
+    """Run the deadline reminder pass now; dry_run lists what would be queued (Admin only)"""
+    if current_user_role != 'admin':
+        raise HTTPException(status_code=403, detail="Only Admins can run the reminder scheduler")
+    return reminder_scheduler.run_once(dry_run=dry_run)
@@ -1,7 +1,7 @@
 # app/api/endpoints/scorecard.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.database import get_db
@@ -10,15 +10,21 @@ from app.models import (
     ScoreCardTemplate, ScoreCardQuestion, ScoreCardSubmission, 
     ScoreCardResponse, ScoreCardDocument, User, Department, AcademicYear
 )
-from app.schemas import ScoreCardQuestionUpdate
-import json
+from app.schemas import ScoreCardQuestionUpdate, ScoreCardBulkResponseSave
+from app.services.blob_storage import blob_store, release_file
+from app.services.file_downloads import conditional_file_response
+from app.services.zip_stream import ZipEntry, stream_zip
+from app.services.file_processing import enqueue_file_processing, get_file_metadata, get_thumbnail_path
+import csv
+import io
 import os
 from pathlib import Path
-from datetime import datetime
-import uuid
+from datetime import datetime, timezone
 
 router = APIRouter(prefix="/scorecard", tags=["Score Card"])
 
+SCORECARD_MAX_FILE_SIZE = int(os.getenv("SCORECARD_MAX_FILE_SIZE", 100 * 1024 * 1024))  # 100MB
+
 # Permission helpers
 def check_admin_permissions(current_role: str):
     """Check if user has admin permissions (admin, principal, dean_iqac, pa_principal)"""
@@ -364,27 +370,30 @@ def get_scorecard_submission(
     if current_role == "hod" and submission.department_id != current_dept_id:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    # Get responses with questions and documents
+    # Get responses, then all of their documents in one batched query
+    # (constant query count regardless of how many questions the template has)
     responses = db.query(ScoreCardResponse).filter(
         ScoreCardResponse.submission_id == submission_id
     ).all()
     
-    # Get documents for each response
-    response_data = []
-    for response in responses:
+    documents_by_response = {response.id: [] for response in responses}
+    if documents_by_response:
         documents = db.query(ScoreCardDocument).filter(
-            ScoreCardDocument.response_id == response.id
-        ).all()
-        
-        response_data.append({
+            ScoreCardDocument.response_id.in_(list(documents_by_response))
+        ).order_by(ScoreCardDocument.id).all()
+        for document in documents:
+            documents_by_response[document.response_id].append(document)
+    
+    response_data = [
+        {
             "response": response,
-            "documents": documents
-        })
+            "documents": documents_by_response[response.id]
+        }
+        for response in responses
+    ]
     
     # Get template and questions
-    template = db.query(ScoreCardTemplate).filter(
-        ScoreCardTemplate.id == submission.template_id
-    ).first()
+    template = db.get(ScoreCardTemplate, submission.template_id)
     
     questions = db.query(ScoreCardQuestion).filter(
         ScoreCardQuestion.template_id == submission.template_id
@@ -397,6 +406,83 @@ def get_scorecard_submission(
         "responses": response_data
     }
 
+def _safe_archive_name(name: str) -> str:
+    """Strip directory parts and characters that are unsafe inside ZIP member names"""
+    name = os.path.basename((name or "").replace("\\", "/")).strip()
+    return "".join(c if c.isprintable() and c not in '<>:"|?*' else "_" for c in name) or "file"
+
+@router.get("/submissions/{submission_id}/export.zip")
+def export_submission_evidence(
+    submission_id: int,
+    db: Session = Depends(get_db),
+    current_role: str = Depends(get_current_user_role),
+    current_dept_id: Optional[int] = Depends(get_current_department_id)
+):
+    """Stream a ZIP of every uploaded file for a submission, grouped by question, with a manifest"""
+    check_hod_or_admin_permissions(current_role)
+    
+    submission = db.query(ScoreCardSubmission).filter(
+        ScoreCardSubmission.id == submission_id
+    ).first()
+    
+    if not submission:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    
+    if current_role == "hod" and submission.department_id != current_dept_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    rows = db.query(ScoreCardQuestion, ScoreCardDocument).join(
+        ScoreCardResponse, ScoreCardResponse.question_id == ScoreCardQuestion.id
+    ).join(
+        ScoreCardDocument, ScoreCardDocument.response_id == ScoreCardResponse.id
+    ).filter(
+        ScoreCardResponse.submission_id == submission_id
+    ).order_by(ScoreCardQuestion.question_number, ScoreCardDocument.id).all()
+    
+    # Resolve archive paths and the manifest before streaming starts
+    manifest = io.StringIO()
+    writer = csv.writer(manifest)
+    writer.writerow([
+        "question_number", "question", "document_type", "file_name", "archive_path",
+        "file_size", "onedrive_link", "physical_location", "physical_status", "note"
+    ])
+    entries = []
+    used_names = set()
+    for question, document in rows:
+        archive_path, note = "", ""
+        if document.document_type == 'upload':
+            if document.file_path and os.path.isfile(document.file_path):
+                folder = f"Q{_safe_archive_name(question.question_number)}"
+                base, extension = os.path.splitext(_safe_archive_name(document.file_name))
+                archive_path = f"{folder}/{base}{extension}"
+                copy = 2
+                while archive_path in used_names:
+                    archive_path = f"{folder}/{base} ({copy}){extension}"
+                    copy += 1
+                used_names.add(archive_path)
+                entries.append(ZipEntry(
+                    arcname=archive_path,
+                    path=document.file_path,
+                    # uploaded_at is stored as naive UTC
+                    modified=document.uploaded_at.replace(tzinfo=timezone.utc) if document.uploaded_at else None
+                ))
+            else:
+                note = "file missing on server"
+        writer.writerow([
+            question.question_number, question.question_text, document.document_type,
+            document.file_name, archive_path, document.file_size or "",
+            document.onedrive_link or "", document.physical_location or "",
+            document.physical_status if document.document_type == 'physical' else "", note
+        ])
+    
+    entries.insert(0, ZipEntry(arcname="manifest.csv", data=manifest.getvalue().encode("utf-8-sig")))
+    
+    return StreamingResponse(
+        stream_zip(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="scorecard_submission_{submission_id}_evidence.zip"'}
+    )
+
 # =====================================================
 # Responses Management
 # =====================================================
@@ -515,6 +601,128 @@ def save_scorecard_response(
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@router.post("/responses/bulk")
+def save_scorecard_responses_bulk(
+    payload: ScoreCardBulkResponseSave,
+    db: Session = Depends(get_db),
+    current_role: str = Depends(get_current_user_role),
+    current_dept_id: Optional[int] = Depends(get_current_department_id)
+):
+    """Save or update all responses (counts, OneDrive links, physical documents) for a submission in one transaction"""
+    check_hod_or_admin_permissions(current_role)
+    
+    submission = db.query(ScoreCardSubmission).filter(
+        ScoreCardSubmission.id == payload.submission_id
+    ).first()
+    if not submission:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    
+    if current_role == "hod" and submission.department_id != current_dept_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    # Validate every item against a single preloaded question map
+    questions = {
+        question.id: question
+        for question in db.query(ScoreCardQuestion).filter(
+            ScoreCardQuestion.template_id == submission.template_id
+        ).all()
+    }
+    question_ids = [item.question_id for item in payload.responses]
+    unknown_ids = sorted(set(question_ids) - set(questions))
+    if unknown_ids:
+        raise HTTPException(status_code=400, detail=f"Questions not in this submission's template: {unknown_ids}")
+    if len(question_ids) != len(set(question_ids)):
+        raise HTTPException(status_code=400, detail="Each question may only appear once per request")
+    
+    try:
+        existing_responses = {
+            response.question_id: response
+            for response in db.query(ScoreCardResponse).filter(
+                ScoreCardResponse.submission_id == submission.id
+            ).all()
+        }
+        
+        # Upsert responses
+        saved_responses = []
+        for item in payload.responses:
+            calculated_score = calculate_count_score(
+                questions[item.question_id], item.count_response, item.has_physical_documents
+            )
+            response = existing_responses.get(item.question_id)
+            if response:
+                response.response_text = str(item.count_response)  # Store count as text
+                response.score = calculated_score
+            else:
+                response = ScoreCardResponse(
+                    submission_id=submission.id,
+                    question_id=item.question_id,
+                    response_text=str(item.count_response),  # Store count as text
+                    score=calculated_score
+                )
+                db.add(response)
+            saved_responses.append((item, response))
+        
+        # Assign ids to new responses before attaching documents
+        db.flush()
+        
+        # Replace OneDrive / physical document entries in two set-based deletes
+        onedrive_response_ids = [response.id for item, response in saved_responses if item.onedrive_links is not None]
+        physical_response_ids = [response.id for item, response in saved_responses if item.has_physical_documents]
+        if onedrive_response_ids:
+            db.query(ScoreCardDocument).filter(
+                ScoreCardDocument.response_id.in_(onedrive_response_ids),
+                ScoreCardDocument.document_type == 'onedrive'
+            ).delete(synchronize_session=False)
+        if physical_response_ids:
+            db.query(ScoreCardDocument).filter(
+                ScoreCardDocument.response_id.in_(physical_response_ids),
+                ScoreCardDocument.document_type == 'physical'
+            ).delete(synchronize_session=False)
+        
+        for item, response in saved_responses:
+            for i, link in enumerate(item.onedrive_links or []):
+                if link and link.strip():
+                    db.add(ScoreCardDocument(
+                        response_id=response.id,
+                        document_type='onedrive',
+                        onedrive_link=link.strip(),
+                        file_name=item.onedrive_description or f"OneDrive Link {i+1}"
+                    ))
+            if item.has_physical_documents:
+                db.add(ScoreCardDocument(
+                    response_id=response.id,
+                    document_type='physical',
+                    physical_location=item.physical_location,
+                    file_name=item.physical_description or 'Physical Documents'
+                ))
+        
+        db.commit()
+    except Exception as e:
+        print(f"Error saving responses: {str(e)}")
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    
+    # Return the saved state with documents loaded in one query
+    response_ids = [response.id for _, response in saved_responses]
+    documents_by_response = {response_id: [] for response_id in response_ids}
+    if response_ids:
+        for document in db.query(ScoreCardDocument).filter(
+            ScoreCardDocument.response_id.in_(response_ids)
+        ).order_by(ScoreCardDocument.id).all():
+            documents_by_response[document.response_id].append(document)
+    
+    return {
+        "submission_id": submission.id,
+        "saved": len(saved_responses),
+        "responses": [
+            {
+                "response": response,
+                "documents": documents_by_response[response.id]
+            }
+            for _, response in saved_responses
+        ]
+    }
+
 # =====================================================
 # File Upload
 # =====================================================
@@ -537,22 +745,6 @@ async def upload_scorecard_file(
     if not response:
         raise HTTPException(status_code=404, detail="Response not found")
     
-    # Delete existing documents for this response (only one file per question allowed)
-    existing_documents = db.query(ScoreCardDocument).filter(
-        ScoreCardDocument.response_id == response_id
-    ).all()
-    
-    for doc in existing_documents:
-        # Delete physical file
-        try:
-            if os.path.exists(doc.file_path):
-                os.remove(doc.file_path)
-        except Exception as e:
-            print(f"Warning: Could not delete file {doc.file_path}: {e}")
-        
-        # Delete from database
-        db.delete(doc)
-    
     # Validate file type
     allowed_extensions = {'.pdf', '.doc', '.docx', '.xls', '.xlsx', '.zip', '.jpg', '.jpeg', '.png'}
     file_extension = Path(file.filename).suffix.lower()
@@ -563,45 +755,44 @@ async def upload_scorecard_file(
             detail=f"File type not allowed. Allowed types: {', '.join(allowed_extensions)}"
         )
     
-    # Read file content and validate size (100MB limit)
-    content = await file.read()
-    max_file_size = 100 * 1024 * 1024  # 100MB in bytes
-    
-    if len(content) > max_file_size:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File size too large. Maximum allowed size is 100MB. Uploaded file size: {len(content) / (1024*1024):.2f}MB"
-        )
-    
-    # Create upload directory
-    upload_dir = Path(f"uploads/scorecard/{submission_id}/{question_id}")
-    upload_dir.mkdir(parents=True, exist_ok=True)
+    # Stream the file into the content-addressed store, aborting as soon as it passes the size limit
+    blob = await blob_store.save_upload(file, SCORECARD_MAX_FILE_SIZE)
     
-    # Generate unique filename
-    import uuid
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = upload_dir / unique_filename
-    
-    # Save file
-    with open(file_path, "wb") as f:
-        f.write(content)
+    # Replace existing documents for this response (only one file per question allowed)
+    existing_documents = db.query(ScoreCardDocument).filter(
+        ScoreCardDocument.response_id == response_id
+    ).all()
+    for doc in existing_documents:
+        db.delete(doc)
     
     # Save to database
     document = ScoreCardDocument(
         response_id=response_id,
         document_type='upload',
         file_name=file.filename,
-        file_path=str(file_path),
-        file_size=len(content)
+        file_path=blob.path,
+        file_size=blob.size
     )
     
     db.add(document)
-    db.commit()
+    # Hash/validate/extract metadata in the background, committed with the document
+    enqueue_file_processing(db, blob.path)
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        release_file(db, blob.path)
+        raise
     db.refresh(document)
     
+    # Remove replaced files only once the new document is committed
+    for doc in existing_documents:
+        release_file(db, doc.file_path)
+    
     return {
         "message": "File uploaded successfully" + (" (replaced existing file)" if existing_documents else ""),
-        "document": document
+        "document": document,
+        "deduplicated": blob.deduplicated
     }
 
 # =====================================================
@@ -744,10 +935,11 @@ def calculate_question_score(question: ScoreCardQuestion, count_response: int, t
 @router.get("/documents/{document_id}/download")
 def download_document(
     document_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_role: str = Depends(get_current_user_role)
 ):
-    """Download a document file"""
+    """Download a document file (supports ETag revalidation and byte ranges)"""
     
     # Get document
     document = db.query(ScoreCardDocument).filter(
@@ -777,12 +969,49 @@ def download_document(
                 detail=f"File not found on server: {document.file_path}"
             )
     
-    return FileResponse(
+    return conditional_file_response(
+        request,
         path=str(file_path),
         filename=document.file_name,
-        media_type='application/octet-stream'
+        # uploaded_at is stored as naive UTC
+        last_modified=document.uploaded_at.replace(tzinfo=timezone.utc) if document.uploaded_at else None
     )
 
+@router.get("/documents/{document_id}/metadata")
+def get_document_metadata(
+    document_id: int,
+    db: Session = Depends(get_db),
+    current_role: str = Depends(get_current_user_role)
+):
+    """Metadata extracted in the background (hash, page count, ZIP check, thumbnail)"""
+    check_hod_or_admin_permissions(current_role)
+    
+    document = db.query(ScoreCardDocument).filter(ScoreCardDocument.id == document_id).first()
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    return get_file_metadata(db, document.file_path)
+
+@router.get("/documents/{document_id}/thumbnail")
+def get_document_thumbnail(
+    document_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_role: str = Depends(get_current_user_role)
+):
+    """Thumbnail of an uploaded image or of a PDF's first page"""
+    check_hod_or_admin_permissions(current_role)
+    
+    document = db.query(ScoreCardDocument).filter(ScoreCardDocument.id == document_id).first()
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    thumbnail_path = get_thumbnail_path(db, document.file_path)
+    if not thumbnail_path or not os.path.exists(thumbnail_path):
+        raise HTTPException(status_code=404, detail="Thumbnail not available")
+    
+    return conditional_file_response(request, path=thumbnail_path, media_type="image/jpeg")
+
 @router.delete("/documents/{document_id}")
 def delete_scorecard_document(
     document_id: int,
@@ -797,17 +1026,12 @@ def delete_scorecard_document(
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    # Delete physical file if it exists (for uploaded files)
-    if document.file_path and document.document_type == 'upload':
-        try:
-            file_path = Path(document.file_path)
-            if file_path.exists():
-                os.remove(file_path)
-        except Exception as e:
-            print(f"Warning: Could not delete file {document.file_path}: {e}")
-    
     # Delete from database
     db.delete(document)
     db.commit()
     
+    # Delete physical file once nothing else references it (for uploaded files)
+    if document.document_type == 'upload':
+        release_file(db, document.file_path)
+    
     return {"message": "Document deleted successfully"}
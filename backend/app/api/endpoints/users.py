@@ -6,6 +6,7 @@ from app import models
 from app.models import User
 from app.schemas import UserCreate, UserUpdate, UserOut
 from app.database import get_db
+from app.dependencies import invalidate_cached_principals
 import csv
 from io import StringIO
 
@@ -31,10 +32,12 @@ def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db)):
     db_user = db.get(User, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
+    old_email = db_user.email
     for key, value in user.dict().items():
         setattr(db_user, key, value)
     db.commit()
     db.refresh(db_user)
+    invalidate_cached_principals(user_ids=[user_id], emails=[old_email, db_user.email])
     return db_user
 
 @router.delete("/{user_id}")
@@ -42,8 +45,10 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
     db_user = db.get(User, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
+    email = db_user.email
     db.delete(db_user)
     db.commit()
+    invalidate_cached_principals(user_ids=[user_id], emails=[email])
     return {"message": "User deleted"}
 
 @router.post("/bulk")
@@ -62,6 +67,7 @@ def create_users_bulk(data: dict, db: Session = Depends(get_db)):
         created_users.append(user)
 
     db.commit()
+    invalidate_cached_principals(emails=[u.email for u in created_users])
     return {"message": f"{len(created_users)} users added."}
 
 
@@ -94,5 +100,6 @@ async def upload_users_csv(file: UploadFile = File(...), db: Session = Depends(g
         created_users.append(user)
 
     db.commit()
+    invalidate_cached_principals(emails=[u.email for u in created_users])
     return {"message": f"{len(created_users)} users uploaded successfully."}
 
@@ -7,6 +7,7 @@ from app.models import WorkflowStatus, User, Department, AcademicYear
 from app.schemas import WorkflowStatusResponse, WorkflowStatusUpdate
 from app.email_service import email_service
 from app.notification_service import notification_service
+from app.services.analytics_cache import analytics_cache
 from datetime import datetime
 import asyncio
 
@@ -34,12 +35,13 @@ def get_workflow_status(
         )
         db.add(status)
         db.commit()
+        analytics_cache.invalidate(academic_year_id)
         db.refresh(status)
     
     return status
 
 @router.put("/workflow-status")
-async def update_workflow_status(
+def update_workflow_status(
     update_data: WorkflowStatusUpdate,
     db: Session = Depends(get_db)
 ):
@@ -65,12 +67,10 @@ async def update_workflow_status(
         status.status = update_data.status
         status.updated_at = datetime.now()
     
-    db.commit()
-    db.refresh(status)
-    
-    # Send email notifications for status changes
+    # Queue email notifications in the outbox; they commit with the status change
+    # and are delivered in the background
     try:
-        await send_status_change_notifications(
+        queue_status_change_notifications(
             db, 
             update_data.department_id, 
             update_data.academic_year_id, 
@@ -78,7 +78,11 @@ async def update_workflow_status(
             update_data.status
         )
     except Exception as e:
-        print(f"Warning: Failed to send email notification: {str(e)}")
+        print(f"Warning: Failed to queue email notification: {str(e)}")
+    
+    db.commit()
+    analytics_cache.invalidate(update_data.academic_year_id)
+    db.refresh(status)
     
     # Send in-app notifications for status changes
     try:
@@ -94,14 +98,14 @@ async def update_workflow_status(
     
     return {"message": f"Status updated to {update_data.status}", "status": status.status}
 
-async def send_status_change_notifications(
+def queue_status_change_notifications(
     db: Session, 
     department_id: int, 
     academic_year_id: int, 
     old_status: str, 
     new_status: str
 ):
-    """Send appropriate email notifications based on status change"""
+    """Queue appropriate email notifications based on status change"""
     
     # Get department and academic year info
     department = db.query(Department).filter(Department.id == department_id).first()
@@ -121,7 +125,8 @@ async def send_status_change_notifications(
     # Status change: draft -> submitted (HoD submits budget)
     if old_status == 'draft' and new_status == 'submitted':
         if hod and principal:
-            await email_service.send_budget_submission_notification(
+            email_service.send_budget_submission_notification(
+                db,
                 hod_email=hod.email,
                 hod_name=hod.name,
                 department_name=department.name,
@@ -133,7 +138,8 @@ async def send_status_change_notifications(
     # Status change: submitted -> approved (Principal approves budget)
     elif old_status == 'submitted' and new_status == 'approved':
         if hod:
-            await email_service.send_budget_approval_notification(
+            email_service.send_budget_approval_notification(
+                db,
                 hod_email=hod.email,
                 hod_name=hod.name,
                 department_name=department.name,
@@ -147,7 +153,8 @@ async def send_status_change_notifications(
         if hod and principal:
             # Count events for this department (you might need to implement this)
             event_count = 0  # Placeholder - implement actual count
-            await email_service.send_event_submission_notification(
+            email_service.send_event_submission_notification(
+                db,
                 hod_email=hod.email,
                 hod_name=hod.name,
                 department_name=department.name,
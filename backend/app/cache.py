@@ -0,0 +1,136 @@
+# app/cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUTTLCache:
+    """
+    Thread-safe bounded LRU cache with per-entry expiry.
+
+    Entries are evicted least-recently-used first once `max_size` is reached and
+    are treated as misses after their TTL. Hit/miss/eviction counters are kept
+    so the cache can be sized from production numbers.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> bool:
+        with self._lock:
+            if self._entries.pop(key, None) is None:
+                return False
+            self.invalidations += 1
+            return True
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Drop every entry for which predicate(key, value) is true"""
+        with self._lock:
+            stale = [key for key, (value, _) in self._entries.items() if predicate(key, value)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self.invalidations += count
+            return count
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+
+class CacheBackend:
+    """
+    Minimal interface for pluggable cache stores (in-process LRU, Redis, ...).
+    Values must be JSON-serialisable for out-of-process backends.
+    """
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        raise NotImplementedError
+
+    def delete(self, key: Hashable) -> bool:
+        raise NotImplementedError
+
+    def clear(self) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """CacheBackend backed by a per-process LRUTTLCache"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300):
+        self._cache = LRUTTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        return self._cache.get(key)
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        self._cache.set(key, value, ttl_seconds=ttl_seconds)
+
+    def delete(self, key: Hashable) -> bool:
+        return self._cache.delete(key)
+
+    def clear(self) -> int:
+        return self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
@@ -1,8 +1,13 @@
 # app/database.py
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 import os
+import threading
+import time
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -12,10 +17,157 @@ env_path = backend_dir / '.env'
 load_dotenv(env_path)
 
 DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
+
+# Connection pool / engine tuning
+# The sync and async engines each keep their own pool, so one app process can hold
+# up to DB_POOL_SIZE + DB_MAX_OVERFLOW + DB_ASYNC_POOL_SIZE + DB_ASYNC_MAX_OVERFLOW
+# connections (40 with the defaults). Multiply by the number of worker processes
+# when sizing the server's max_connections.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", "5"))
+DB_ASYNC_MAX_OVERFLOW = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))  # 0 = no timeout
+DB_APPLICATION_NAME = os.getenv("DB_APPLICATION_NAME", "academic-activity-portal")
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait to check out a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.checkouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.checkout_timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self._wait_lock:
+                self.checkout_timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._wait_lock:
+                self.checkouts += 1
+                self.total_wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+def build_engine(database_url: str = DATABASE_URL, **overrides):
+    """
+    Create the SQLAlchemy engine using the DB_* pool settings.
+    Keyword overrides take precedence over the environment (useful for scripts/tests).
+    """
+    url = make_url(database_url)
+    options = {
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+    connect_args = {}
+
+    if url.get_backend_name() == "sqlite":
+        # SQLite uses its own pooling; only thread sharing needs to be allowed
+        connect_args["check_same_thread"] = False
+    else:
+        options.update({
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+        })
+
+    if url.get_backend_name() == "postgresql":
+        connect_args["application_name"] = DB_APPLICATION_NAME
+        if DB_STATEMENT_TIMEOUT_MS > 0:
+            connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
+    options["connect_args"] = connect_args
+    options.update(overrides)
+    return create_engine(url, **options)
+
+
+# Async drivers used for the AsyncEngine variant of each backend
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def build_async_engine(database_url: str = DATABASE_URL, **overrides):
+    """
+    Create an AsyncEngine for the same database. Its pool is sized separately by
+    DB_ASYNC_POOL_SIZE / DB_ASYNC_MAX_OVERFLOW; postgresql:// URLs are served by asyncpg, sqlite:// URLs by aiosqlite.
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    url = url.set(drivername=ASYNC_DRIVERS.get(backend, url.drivername))
+    options = {
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+    connect_args = {}
+
+    if backend != "sqlite":
+        options.update({
+            "pool_size": DB_ASYNC_POOL_SIZE,
+            "max_overflow": DB_ASYNC_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+        })
+
+    if backend == "postgresql":
+        server_settings = {"application_name": DB_APPLICATION_NAME}
+        if DB_STATEMENT_TIMEOUT_MS > 0:
+            server_settings["statement_timeout"] = str(DB_STATEMENT_TIMEOUT_MS)
+        connect_args["server_settings"] = server_settings
+
+    options["connect_args"] = connect_args
+    options.update(overrides)
+    return create_async_engine(url, **options)
+
+
+def get_pool_stats(target_engine=None) -> dict:
+    """Snapshot of connection pool usage for the given engine (default: app engine)"""
+    pool = (target_engine or engine).pool
+    stats = {"pool_class": type(pool).__name__, "status": pool.status()}
+
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "pool_size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout_seconds": pool.timeout(),
+        })
+
+    if isinstance(pool, InstrumentedQueuePool):
+        with pool._wait_lock:
+            stats.update({
+                "checkouts": pool.checkouts,
+                "checkout_timeouts": pool.checkout_timeouts,
+                "avg_wait_ms": (pool.total_wait_seconds / pool.checkouts * 1000) if pool.checkouts else 0.0,
+                "max_wait_ms": pool.max_wait_seconds * 1000,
+            })
+
+    return stats
+
+
+engine = build_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async variant for I/O-heavy endpoints, so slow queries don't block the event loop
+async_engine = build_async_engine(DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession)
+
 # ADD THIS FUNCTION
 def get_db():
     db = SessionLocal()
@@ -23,3 +175,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,13 +1,18 @@
 # app/dependencies.py
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from typing import Dict, Optional
+from collections import Counter
+import hashlib
+import threading
+import time
 import jwt
-import requests
 import os
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import User, Department
+from app.jwks_cache import create_azure_jwks_store
+from app.cache import LRUTTLCache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -23,20 +28,30 @@ AZURE_AD_CONFIG = {
 # Environment flag to enable/disable development tokens
 ENABLE_DEV_TOKENS = os.getenv("ENABLE_DEV_TOKENS", "true").lower() == "true"
 
+# Cached Azure AD signing keys - refreshed in the background, refetched on unknown kid
+azure_jwks_store = create_azure_jwks_store(AZURE_AD_CONFIG["jwks_uri"])
+
+# Verified token fingerprint -> user info, so repeat requests skip verification and the users lookup
+principal_cache = LRUTTLCache(
+    max_size=int(os.getenv("PRINCIPAL_CACHE_SIZE", "4096")),
+    ttl_seconds=float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "300"))
+)
+
 def get_azure_public_keys():
-    """Fetch Azure AD public keys for JWT verification"""
-    try:
-        response = requests.get(AZURE_AD_CONFIG["jwks_uri"], timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        print(f"Error fetching Azure public keys: {e}")
-        return None
+    """Fetch Azure AD public keys for JWT verification (served from the JWKS cache)"""
+    return azure_jwks_store.get_jwks()
 
 def decode_m365_jwt_production(token: str) -> str:
     """
     Extract email from Microsoft 365 JWT token with proper verification
     """
+    return decode_m365_jwt_claims(token)["email"]
+
+def decode_m365_jwt_claims(token: str) -> Dict:
+    """
+    Verify a Microsoft 365 JWT token and return its claims.
+    The resolved email is added to the claims under "email".
+    """
     try:
         # In production, verify the token signature
         if ENABLE_DEV_TOKENS:
@@ -47,25 +62,19 @@ def decode_m365_jwt_production(token: str) -> str:
             )
         else:
             # Production mode - verify signature with Azure public keys
-            jwks = get_azure_public_keys()
-            if not jwks:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Unable to verify token - JWKS unavailable"
-                )
-            
             # Decode header to get key ID
             unverified_header = jwt.get_unverified_header(token)
             key_id = unverified_header.get("kid")
             
-            # Find the matching public key
-            public_key = None
-            for key in jwks.get("keys", []):
-                if key.get("kid") == key_id:
-                    public_key = jwt.algorithms.RSAAlgorithm.from_jwk(key)
-                    break
+            # Find the matching public key (parsed keys are memoized per kid)
+            public_key = azure_jwks_store.get_public_key(key_id) if key_id else None
             
             if not public_key:
+                if get_azure_public_keys() is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_401_UNAUTHORIZED,
+                        detail="Unable to verify token - JWKS unavailable"
+                    )
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Unable to find matching public key"
@@ -89,7 +98,8 @@ def decode_m365_jwt_production(token: str) -> str:
                 detail="Email not found in token"
             )
         
-        return email
+        decoded["email"] = email
+        return decoded
         
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -131,8 +141,26 @@ def get_user_by_email(email: str, db: Session) -> User:
     
     return user
 
-def get_current_user_info(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Dict:
-    """Get current user information using M365 JWT or development tokens"""
+# Number of principal resolutions (token decode + user lookup) per route.
+# A route should resolve its principal at most once per request.
+_principal_decode_counts = Counter()
+_principal_decode_lock = threading.Lock()
+
+def _record_principal_decode(request: Request):
+    """Count a principal resolution against the route that triggered it"""
+    route = request.scope.get("route")
+    route_key = f"{request.method} {getattr(route, 'path', request.url.path)}"
+    with _principal_decode_lock:
+        _principal_decode_counts[route_key] += 1
+    request.state.principal_decodes = getattr(request.state, "principal_decodes", 0) + 1
+
+def get_principal_decode_stats() -> Dict[str, int]:
+    """Get the number of principal resolutions performed per route"""
+    with _principal_decode_lock:
+        return dict(_principal_decode_counts)
+
+def resolve_principal(token: str, db: Session) -> Dict:
+    """Decode the token and look up the user it belongs to"""
     
     # Handle development/testing tokens (only if enabled)
     if ENABLE_DEV_TOKENS and token.endswith("-token"):
@@ -153,33 +181,73 @@ def get_current_user_info(token: str = Depends(oauth2_scheme), db: Session = Dep
         }
         
         if token in TOKEN_MAP:
-            return TOKEN_MAP[token]
+            return dict(TOKEN_MAP[token])
         else:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid development token")
     
-    # Production: Extract email from M365 JWT and lookup user in database
-    email = decode_m365_jwt_production(token)
-    user = get_user_by_email(email, db)
+    # Production: reuse a previously verified token if we have seen it recently
+    fingerprint = hashlib.sha256(token.encode()).hexdigest()
+    cached = principal_cache.get(fingerprint)
+    if cached is not None:
+        return dict(cached)
     
-    return {
+    # Extract email from M365 JWT and lookup user in database
+    claims = decode_m365_jwt_claims(token)
+    user = get_user_by_email(claims["email"], db)
+    
+    user_info = {
         "role": user.role,
         "user_id": user.id,
         "department_id": user.department_id,
         "email": user.email,
         "name": user.name
     }
+    
+    # Never cache a token past its own expiry
+    ttl = None
+    if claims.get("exp"):
+        ttl = claims["exp"] - time.time()
+    principal_cache.set(fingerprint, user_info, ttl_seconds=ttl)
+    
+    return dict(user_info)
+
+def invalidate_cached_principals(user_ids=(), emails=()) -> int:
+    """Drop cached token resolutions for users that were modified or deleted"""
+    user_ids = set(user_ids)
+    emails = {email.lower() for email in emails if email}
+    if not user_ids and not emails:
+        return 0
+    return principal_cache.invalidate_where(
+        lambda _, info: info["user_id"] in user_ids or (info.get("email") or "").lower() in emails
+    )
+
+def get_current_user_info(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> Dict:
+    """
+    Get current user information using M365 JWT or development tokens.
+    The principal is resolved once per request and kept on request.state,
+    so every dependency below shares the same decode and user lookup.
+    """
+    principal = getattr(request.state, "principal", None)
+    if principal is not None:
+        return principal
+    
+    principal = resolve_principal(token, db)
+    _record_principal_decode(request)
+    request.state.principal = principal
+    return principal
 
-def get_current_user_role(token: str = Depends(oauth2_scheme)) -> str:
+def get_current_user_role(user_info: Dict = Depends(get_current_user_info)) -> str:
     """Get current user role (backward compatibility)"""
-    user_info = get_current_user_info(token)
     return user_info["role"]
 
-def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
+def get_current_user_id(user_info: Dict = Depends(get_current_user_info)) -> int:
     """Get current user ID from token"""
-    user_info = get_current_user_info(token)
     return user_info["user_id"]
 
-def get_current_department_id(token: str = Depends(oauth2_scheme)) -> Optional[int]:
+def get_current_department_id(user_info: Dict = Depends(get_current_user_info)) -> Optional[int]:
     """Get current user's department ID from token"""
-    user_info = get_current_user_info(token)
     return user_info.get("department_id")
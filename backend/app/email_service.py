@@ -1,15 +1,159 @@
 # app/email_service.py
 
+import asyncio
+import json
 import os
-import smtplib
+import re
+import time
+import uuid
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
 from typing import List, Optional
 import aiofiles
-from jinja2 import Environment, FileSystemLoader
+import aiosmtplib
+from functools import lru_cache
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, nodes
 from pathlib import Path
+from app.models import OutboxEmail
+from app.services.email_outbox import email_outbox, PermanentDeliveryError
+
+class _PooledConnection:
+    def __init__(self, client: aiosmtplib.SMTP):
+        self.client = client
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+class SMTPConnectionPool:
+    """
+    Authenticated aiosmtplib connections kept open between messages.
+
+    At most `size` messages are in flight at once, each on its own connection.
+    Idle connections are reused LIFO (the most recently used is the least
+    likely to have been dropped by the server) and retired after
+    `max_idle_seconds` or `max_messages_per_connection` messages. If a reused
+    connection turns out to be dead, the message is retried once on a fresh one.
+    """
+    
+    # Errors that mean the connection is unusable (rather than the message being rejected)
+    CONNECTION_ERRORS = (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPTimeoutError, ConnectionError)
+    
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: str = "",
+        password: str = "",
+        start_tls: bool = True,
+        timeout: float = 30,
+        size: int = 4,
+        max_idle_seconds: float = 60,
+        max_messages_per_connection: int = 100
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.timeout = timeout
+        self.size = size
+        self.max_idle_seconds = max_idle_seconds
+        self.max_messages_per_connection = max_messages_per_connection
+        
+        self._idle: List[_PooledConnection] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.connections_opened = 0
+        self.reconnects = 0
+        self.messages_sent = 0
+    
+    def _limit(self) -> asyncio.Semaphore:
+        # Created on first use so it belongs to the loop the outbox senders run on
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.size)
+        return self._semaphore
+    
+    async def _connect(self) -> _PooledConnection:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            timeout=self.timeout,
+            start_tls=self.start_tls
+        )
+        await client.connect()
+        if self.username:
+            await client.login(self.username, self.password)
+        self.connections_opened += 1
+        return _PooledConnection(client)
+    
+    async def _discard(self, connection: _PooledConnection):
+        try:
+            if connection.client.is_connected:
+                await connection.client.quit()
+        except Exception:
+            connection.client.close()
+    
+    async def _checkout(self) -> Optional[_PooledConnection]:
+        """Most recently used idle connection that is still worth reusing, if any"""
+        while self._idle:
+            connection = self._idle.pop()
+            if connection.client.is_connected and time.monotonic() - connection.last_used < self.max_idle_seconds:
+                return connection
+            await self._discard(connection)
+        return None
+    
+    async def _checkin(self, connection: _PooledConnection):
+        connection.last_used = time.monotonic()
+        if connection.messages_sent >= self.max_messages_per_connection or not connection.client.is_connected:
+            await self._discard(connection)
+        else:
+            self._idle.append(connection)
+    
+    async def send_message(self, message, recipients: List[str]):
+        async with self._limit():
+            connection = await self._checkout()
+            reused = connection is not None
+            if connection is None:
+                connection = await self._connect()
+            try:
+                try:
+                    await connection.client.send_message(message, recipients=recipients)
+                except self.CONNECTION_ERRORS:
+                    if not reused:
+                        raise
+                    # The server closed the warm connection while it sat idle
+                    connection.client.close()
+                    self.reconnects += 1
+                    connection = await self._connect()
+                    await connection.client.send_message(message, recipients=recipients)
+            except self.CONNECTION_ERRORS:
+                connection.client.close()
+                raise
+            except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused):
+                # Rejected by the server; aiosmtplib has reset the envelope and the session is still fine
+                await self._checkin(connection)
+                raise
+            except Exception:
+                await self._discard(connection)
+                raise
+            connection.messages_sent += 1
+            self.messages_sent += 1
+            await self._checkin(connection)
+    
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await self._discard(connection)
+        self._semaphore = None
+    
+    def get_stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle_connections": len(self._idle),
+            "connections_opened": self.connections_opened,
+            "reconnects": self.reconnects,
+            "messages_sent": self.messages_sent
+        }
 
 class EmailService:
     def __init__(self):
@@ -19,73 +163,184 @@ class EmailService:
         self.smtp_password = os.getenv("SMTP_PASSWORD", "")
         self.sender_email = os.getenv("SENDER_EMAIL", "")
         self.sender_name = os.getenv("SENDER_NAME", "Academic Activity Portal")
+        self.smtp_timeout = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+        self.smtp_starttls = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+        self.smtp_pool = SMTPConnectionPool(
+            hostname=self.smtp_server,
+            port=self.smtp_port,
+            username=self.smtp_username,
+            password=self.smtp_password,
+            start_tls=self.smtp_starttls,
+            timeout=self.smtp_timeout,
+            size=int(os.getenv("SMTP_POOL_SIZE", "4")),
+            max_idle_seconds=float(os.getenv("SMTP_POOL_MAX_IDLE_SECONDS", "60")),
+            max_messages_per_connection=int(os.getenv("SMTP_POOL_MAX_MESSAGES_PER_CONNECTION", "100"))
+        )
         
-        # Setup Jinja2 environment for templates
+        # Setup Jinja2 environment for templates. Compiled template code is kept in a
+        # bytecode cache so restarts skip parsing, and templates are not re-checked on
+        # disk per render unless EMAIL_TEMPLATE_AUTO_RELOAD is set (development).
         template_dir = Path(__file__).parent / "email_templates"
         template_dir.mkdir(exist_ok=True)
-        self.jinja_env = Environment(loader=FileSystemLoader(str(template_dir)))
+        cache_dir = os.getenv("EMAIL_TEMPLATE_CACHE_DIRECTORY")
+        if cache_dir:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        self.jinja_env = Environment(
+            loader=FileSystemLoader(str(template_dir)),
+            bytecode_cache=FileSystemBytecodeCache(cache_dir) if cache_dir else FileSystemBytecodeCache(),
+            auto_reload=os.getenv("EMAIL_TEMPLATE_AUTO_RELOAD", "false").lower() == "true"
+        )
+        self.templates = {
+            name: self.jinja_env.get_template(name)
+            for name in self.jinja_env.list_templates(extensions=["html"])
+        }
+        
+        # Per-recipient placeholders used by render_batch; unique per process so
+        # they cannot collide with real content
+        self._placeholder_token = uuid.uuid4().hex
+        self._placeholder_pattern = re.compile(rf"\[\[{self._placeholder_token}:(\w+)\]\]")
+        self._cached_skeleton = lru_cache(maxsize=int(os.getenv("EMAIL_RENDER_CACHE_SIZE", "256")))(self._render_skeleton)
+        self._cached_prints_only = lru_cache(maxsize=64)(self._prints_only)
     
-    async def send_email(
+    def get_template(self, template_name: str) -> Template:
+        template = self.templates.get(template_name)
+        if template is None or self.jinja_env.auto_reload:
+            template = self.templates[template_name] = self.jinja_env.get_template(template_name)
+        return template
+    
+    def render(self, template_name: str, template_data: dict) -> str:
+        return self.get_template(template_name).render(**template_data)
+    
+    def _render_skeleton(self, template_name: str, shared_items: tuple, recipient_keys: tuple) -> tuple:
+        """
+        Render with placeholders for the per-recipient values and split the output
+        around them: (static, key, static, key, ..., static).
+        """
+        context = dict(shared_items)
+        context.update({key: f"[[{self._placeholder_token}:{key}]]" for key in recipient_keys})
+        return tuple(self._placeholder_pattern.split(self.render(template_name, context)))
+    
+    def _prints_only(self, template_name: str, recipient_keys: tuple) -> bool:
+        """
+        True if the template only prints the per-recipient keys (`{{ key }}`), so a
+        placeholder can stand in for them. Any other use - a condition, filter,
+        comparison or assignment - or an include/extends/import, which we do not
+        follow, means every message must be rendered in full.
+        """
+        source = self.jinja_env.loader.get_source(self.jinja_env, template_name)[0]
+        
+        def check(node: nodes.Node, parent: Optional[nodes.Node]) -> bool:
+            if isinstance(node, (nodes.Include, nodes.Extends, nodes.Import, nodes.FromImport)):
+                return False
+            if isinstance(node, nodes.Name) and node.name in recipient_keys:
+                return node.ctx == "load" and isinstance(parent, nodes.Output)
+            return all(check(child, node) for child in node.iter_child_nodes())
+        
+        return check(self.jinja_env.parse(source), None)
+    
+    def render_batch(self, template_name: str, shared_data: dict, recipient_data: List[dict]) -> List[str]:
+        """
+        Render one template for many recipients that share most of the context.
+        
+        The template is rendered once per shared context with placeholders for the
+        per-recipient keys (cached), and each message is produced by filling them in.
+        This only applies when the template does nothing but print the per-recipient
+        keys; otherwise (e.g. `{% if user_name %}` or `{{ user_name|upper }}`) every
+        message is rendered in full. As a last guard the first message is compared
+        with a full render.
+        """
+        if not recipient_data:
+            return []
+        recipient_keys = tuple(sorted({key for data in recipient_data for key in data}))
+        shared_items = tuple(sorted(shared_data.items()))
+        # Template edits are picked up per render in development, so nothing is cached then
+        caching = not self.jinja_env.auto_reload
+        prints_only = self._cached_prints_only if caching else self._prints_only
+        try:
+            hash(shared_items)
+            render_skeleton = self._cached_skeleton if caching else self._render_skeleton
+        except TypeError:
+            # Unhashable shared values (lists, dicts): cannot be cached
+            render_skeleton = self._render_skeleton
+        skeleton = render_skeleton(template_name, shared_items, recipient_keys) if prints_only(template_name, recipient_keys) else None
+        
+        def fill(data: dict) -> str:
+            return "".join(
+                part if i % 2 == 0 else str(data.get(part, shared_data.get(part, "")))
+                for i, part in enumerate(skeleton)
+            )
+        
+        first = fill(recipient_data[0]) if skeleton is not None else None
+        if first is None or first != self.render(template_name, {**shared_data, **recipient_data[0]}):
+            return [self.render(template_name, {**shared_data, **data}) for data in recipient_data]
+        return [first] + [fill(data) for data in recipient_data[1:]]
+    
+    def send_email(
         self,
+        db,
         to_emails: List[str],
         subject: str,
         template_name: str,
         template_data: dict,
         cc_emails: Optional[List[str]] = None,
         attachments: Optional[List[str]] = None
-    ) -> bool:
+    ) -> OutboxEmail:
         """
-        Send email using SMTP with HTML template
+        Render an HTML template and queue the email in the outbox.
+        Added to the caller's session; it is delivered in the background after commit.
         """
+        html_content = self.render(template_name, template_data)
+        return email_outbox.enqueue(
+            db,
+            to_emails=to_emails,
+            subject=subject,
+            html_body=html_content,
+            cc_emails=cc_emails,
+            attachments=attachments
+        )
+    
+    async def build_message(self, message: OutboxEmail) -> MIMEMultipart:
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = message.subject
+        msg['From'] = f"{self.sender_name} <{self.sender_email}>"
+        msg['To'] = ", ".join(json.loads(message.to_emails))
+        
+        if message.cc_emails:
+            msg['Cc'] = ", ".join(json.loads(message.cc_emails))
+        
+        # Add HTML content
+        html_part = MIMEText(message.html_body, 'html')
+        msg.attach(html_part)
+        
+        # Add attachments if any
+        for file_path in json.loads(message.attachments) if message.attachments else []:
+            if os.path.isfile(file_path):
+                async with aiofiles.open(file_path, "rb") as attachment:
+                    part = MIMEBase('application', 'octet-stream')
+                    part.set_payload(await attachment.read())
+                    encoders.encode_base64(part)
+                    part.add_header(
+                        'Content-Disposition',
+                        f'attachment; filename= {os.path.basename(file_path)}'
+                    )
+                    msg.attach(part)
+        return msg
+    
+    async def deliver(self, message: OutboxEmail):
+        """Outbox transport: send one queued message over a pooled SMTP connection (raises on failure)"""
+        msg = await self.build_message(message)
+        recipients = json.loads(message.to_emails) + (json.loads(message.cc_emails) if message.cc_emails else [])
         try:
-            # Load and render template
-            template = self.jinja_env.get_template(template_name)
-            html_content = template.render(**template_data)
-            
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = f"{self.sender_name} <{self.sender_email}>"
-            msg['To'] = ", ".join(to_emails)
-            
-            if cc_emails:
-                msg['Cc'] = ", ".join(cc_emails)
-            
-            # Add HTML content
-            html_part = MIMEText(html_content, 'html')
-            msg.attach(html_part)
-            
-            # Add attachments if any
-            if attachments:
-                for file_path in attachments:
-                    if os.path.isfile(file_path):
-                        with open(file_path, "rb") as attachment:
-                            part = MIMEBase('application', 'octet-stream')
-                            part.set_payload(attachment.read())
-                            encoders.encode_base64(part)
-                            part.add_header(
-                                'Content-Disposition',
-                                f'attachment; filename= {os.path.basename(file_path)}'
-                            )
-                            msg.attach(part)
-            
-            # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
-                
-                all_recipients = to_emails + (cc_emails or [])
-                server.send_message(msg, to_addrs=all_recipients)
-            
-            print(f"✅ Email sent successfully to {to_emails}")
-            return True
-            
-        except Exception as e:
-            print(f"❌ Failed to send email: {str(e)}")
-            return False
-    
-    async def send_budget_submission_notification(
-        self, 
+            await self.smtp_pool.send_message(msg, recipients)
+        except aiosmtplib.SMTPRecipientsRefused as e:
+            raise PermanentDeliveryError(f"All recipients refused: {[r.recipient for r in e.recipients]}")
+    
+    async def close(self):
+        await self.smtp_pool.close()
+    
+    def send_budget_submission_notification(
+        self,
+        db,
         hod_email: str, 
         hod_name: str,
         department_name: str,
@@ -105,7 +360,8 @@ class EmailService:
         
         subject = f"Budget Submission for Approval - {department_name} ({academic_year})"
         
-        return await self.send_email(
+        return self.send_email(
+            db,
             to_emails=[principal_email],
             subject=subject,
             template_name="budget_submission.html",
@@ -113,8 +369,9 @@ class EmailService:
             cc_emails=[hod_email]
         )
     
-    async def send_budget_approval_notification(
+    def send_budget_approval_notification(
         self,
+        db,
         hod_email: str,
         hod_name: str,
         department_name: str,
@@ -136,15 +393,17 @@ class EmailService:
         status = "Approved" if approved else "Requires Revision"
         subject = f"Budget {status} - {department_name} ({academic_year})"
         
-        return await self.send_email(
+        return self.send_email(
+            db,
             to_emails=[hod_email],
             subject=subject,
             template_name="budget_approval.html",
             template_data=template_data
         )
     
-    async def send_event_submission_notification(
+    def send_event_submission_notification(
         self,
+        db,
         hod_email: str,
         hod_name: str,
         department_name: str,
@@ -166,7 +425,8 @@ class EmailService:
         
         subject = f"Event Plans Submitted for Approval - {department_name} ({academic_year})"
         
-        return await self.send_email(
+        return self.send_email(
+            db,
             to_emails=[principal_email],
             subject=subject,
             template_name="event_submission.html",
@@ -174,8 +434,9 @@ class EmailService:
             cc_emails=[hod_email]
         )
     
-    async def send_deadline_reminder(
+    def send_deadline_reminder(
         self,
+        db,
         user_email: str,
         user_name: str,
         department_name: str,
@@ -198,12 +459,48 @@ class EmailService:
         
         subject = f"Reminder: {module_name} Deadline - {days_remaining} day(s) remaining"
         
-        return await self.send_email(
+        return self.send_email(
+            db,
             to_emails=[user_email],
             subject=subject,
             template_name="deadline_reminder.html",
             template_data=template_data
         )
+    
+    def send_deadline_reminders(
+        self,
+        db,
+        recipients: List[dict],
+        academic_year: str,
+        deadline_date: str,
+        days_remaining: int,
+        module_name: str = "Budget Submission"
+    ) -> List[OutboxEmail]:
+        """
+        Queue the same deadline reminder for many users in one batch render.
+        Each recipient is a dict with user_email, user_name and department_name.
+        """
+        shared_data = {
+            "academic_year": academic_year,
+            "deadline_date": deadline_date,
+            "days_remaining": days_remaining,
+            "module_name": module_name,
+            "portal_url": os.getenv("FRONTEND_URL", "http://localhost:3000"),
+            "year": "2025"
+        }
+        html_bodies = self.render_batch(
+            "deadline_reminder.html",
+            shared_data,
+            [{"user_name": r["user_name"], "department_name": r["department_name"]} for r in recipients]
+        )
+        
+        subject = f"Reminder: {module_name} Deadline - {days_remaining} day(s) remaining"
+        
+        return [
+            email_outbox.enqueue(db, to_emails=[recipient["user_email"]], subject=subject, html_body=html_body)
+            for recipient, html_body in zip(recipients, html_bodies)
+        ]
 
 # Create singleton instance
 email_service = EmailService()
+email_outbox.set_transport(email_service.deliver)
@@ -0,0 +1,203 @@
+# app/jwks_cache.py
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import jwt
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSKeyStore:
+    """
+    In-process cache of a JWKS document keyed by `kid`.
+
+    - Keys are served from memory until `ttl_seconds` have passed.
+    - A daemon thread refreshes the key set in the background before it expires,
+      so request handlers never wait on the JWKS endpoint in steady state.
+    - An unknown `kid` (key rotation) triggers an immediate refetch, rate limited
+      to one every `min_refetch_interval` seconds.
+    - Parsed public keys are memoized per `kid` so RSA parsing happens once per key.
+    - Refetches are serialized, so requests arriving while the cache is stale
+      share one download instead of each hitting the endpoint.
+    """
+
+    def __init__(
+        self,
+        jwks_uri: str,
+        ttl_seconds: float = 3600,
+        refresh_ahead_seconds: float = 300,
+        min_refetch_interval: float = 30,
+        timeout: float = 10
+    ):
+        self.jwks_uri = jwks_uri
+        self.ttl_seconds = ttl_seconds
+        self.refresh_ahead_seconds = refresh_ahead_seconds
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+
+        self._jwks: Dict[str, Dict[str, Any]] = {}
+        self._public_keys: Dict[str, Any] = {}
+        self._fetched_at: Optional[float] = None
+        self._last_fetch_attempt: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()  # held for the duration of a fetch
+        self._refresher: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        # Updated by request threads and the refresh thread; guarded by _lock
+        self.stats = {"fetches": 0, "fetch_errors": 0, "unknown_kid_refetches": 0, "rate_limited": 0}
+
+    # -----------------------------
+    # Fetching
+    # -----------------------------
+    def _fetch(self) -> bool:
+        """Download the JWKS document and swap it in. Returns True on success."""
+        self._last_fetch_attempt = time.monotonic()
+        try:
+            response = requests.get(self.jwks_uri, timeout=self.timeout)
+            response.raise_for_status()
+            keys = {key["kid"]: key for key in response.json().get("keys", []) if key.get("kid")}
+        except Exception as e:
+            with self._lock:
+                self.stats["fetch_errors"] += 1
+            logger.warning("jwks_fetch_failed uri=%s error=%s", self.jwks_uri, e)
+            return False
+
+        with self._lock:
+            # Keep memoized public keys only for kids whose JWK did not change
+            self._public_keys = {
+                kid: public_key for kid, public_key in self._public_keys.items()
+                if self._jwks.get(kid) == keys.get(kid)
+            }
+            self._jwks = keys
+            self._fetched_at = time.monotonic()
+            self.stats["fetches"] += 1
+        return True
+
+    def _is_expired(self) -> bool:
+        return self._fetched_at is None or time.monotonic() - self._fetched_at >= self.ttl_seconds
+
+    def _can_refetch(self) -> bool:
+        return (
+            self._last_fetch_attempt is None
+            or time.monotonic() - self._last_fetch_attempt >= self.min_refetch_interval
+        )
+
+    def _ensure_fresh(self):
+        """Refetch an expired key set, at most once per min_refetch_interval"""
+        if self._is_expired() and self._can_refetch():
+            with self._refresh_lock:
+                # Another request may have refreshed it while we waited
+                if self._is_expired() and self._can_refetch():
+                    self._fetch()
+
+    def refresh(self, force: bool = False) -> bool:
+        """Refetch the key set if it has expired (or unconditionally with force=True)"""
+        with self._refresh_lock:
+            if force or self._is_expired():
+                return self._fetch()
+        return True
+
+    # -----------------------------
+    # Background refresh
+    # -----------------------------
+    def _refresh_loop(self):
+        while not self._stop_event.is_set():
+            if self._fetched_at is None:
+                # Warm the cache straight away on startup
+                wait = 0
+            else:
+                age = time.monotonic() - self._fetched_at
+                wait = max(self.ttl_seconds - self.refresh_ahead_seconds - age, 0)
+            if self._stop_event.wait(wait):
+                break
+            with self._refresh_lock:
+                fetched = self._fetch()
+            if not fetched:
+                # Back off before retrying a failed background refresh
+                self._stop_event.wait(self.min_refetch_interval)
+
+    def start_background_refresh(self):
+        """Start the daemon thread that keeps the key set warm"""
+        if self._refresher and self._refresher.is_alive():
+            return
+        self._stop_event.clear()
+        self._refresher = threading.Thread(target=self._refresh_loop, name="jwks-refresh", daemon=True)
+        self._refresher.start()
+
+    def stop_background_refresh(self):
+        self._stop_event.set()
+        if self._refresher:
+            self._refresher.join(timeout=1)
+            self._refresher = None
+
+    # -----------------------------
+    # Lookup
+    # -----------------------------
+    def get_jwks(self) -> Optional[Dict[str, Any]]:
+        """Get the cached JWKS document in its original {"keys": [...]} shape"""
+        self._ensure_fresh()
+        with self._lock:
+            if self._fetched_at is None:
+                return None
+            return {"keys": list(self._jwks.values())}
+
+    def get_public_key(self, kid: str):
+        """Get the parsed public key for `kid`, refetching once on an unknown kid"""
+        self._ensure_fresh()
+
+        with self._lock:
+            public_key = self._public_keys.get(kid)
+            jwk = self._jwks.get(kid)
+        if public_key is not None:
+            return public_key
+
+        if jwk is None:
+            # Possibly a rotated key we have not seen yet
+            with self._refresh_lock:
+                with self._lock:
+                    jwk = self._jwks.get(kid)
+                if jwk is None:
+                    if not self._can_refetch():
+                        with self._lock:
+                            self.stats["rate_limited"] += 1
+                        return None
+                    with self._lock:
+                        self.stats["unknown_kid_refetches"] += 1
+                    self._fetch()
+                    with self._lock:
+                        jwk = self._jwks.get(kid)
+            if jwk is None:
+                return None
+
+        public_key = jwt.algorithms.RSAAlgorithm.from_jwk(jwk)
+        with self._lock:
+            if self._jwks.get(kid) == jwk:
+                self._public_keys[kid] = public_key
+        return public_key
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "cached_kids": len(self._jwks),
+                "parsed_keys": len(self._public_keys),
+                "age_seconds": None if self._fetched_at is None else time.monotonic() - self._fetched_at,
+                "background_refresh": bool(self._refresher and self._refresher.is_alive())
+            }
+
+
+def create_azure_jwks_store(jwks_uri: str) -> JWKSKeyStore:
+    """Build the Azure AD key store using JWKS_* environment settings"""
+    return JWKSKeyStore(
+        jwks_uri=os.getenv("JWKS_URI", jwks_uri),
+        ttl_seconds=float(os.getenv("JWKS_TTL_SECONDS", "3600")),
+        refresh_ahead_seconds=float(os.getenv("JWKS_REFRESH_AHEAD_SECONDS", "300")),
+        min_refetch_interval=float(os.getenv("JWKS_MIN_REFETCH_SECONDS", "30")),
+        timeout=float(os.getenv("JWKS_TIMEOUT_SECONDS", "10"))
+    )
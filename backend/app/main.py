@@ -1,6 +1,16 @@
 # app/main.py
+import logging
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.dependencies import ENABLE_DEV_TOKENS, azure_jwks_store
+from app.database import get_pool_stats, async_engine
+from app.services.job_queue import job_queue
+from app.services.email_outbox import email_outbox
+from app.email_service import email_service
+from app.services.reminder_scheduler import reminder_scheduler
+from app.services.upload_storage import UploadSizeLimitMiddleware
 from app.api.endpoints import users
 from app.api.endpoints import departments, academic_years, program_counts, program_types
 from app.api.endpoints import deadlines
@@ -18,16 +28,54 @@ from app.api.endpoints import documents
 from app.api.endpoints import scorecard
 from app.api.endpoints import scorecard_admin
 
+JOB_QUEUE_ENABLED = os.getenv("JOB_QUEUE_ENABLED", "true").lower() == "true"
+EMAIL_OUTBOX_ENABLED = os.getenv("EMAIL_OUTBOX_ENABLED", "true").lower() == "true"
+REMINDER_SCHEDULER_ENABLED = os.getenv("REMINDER_SCHEDULER_ENABLED", "true").lower() == "true"
+
+# Application logs (document workflow transitions etc.) as key=value lines
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format="%(asctime)s %(levelname)s %(name)s %(message)s"
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep Azure AD signing keys warm so token verification never waits on the JWKS endpoint
+    if not ENABLE_DEV_TOKENS:
+        azure_jwks_store.start_background_refresh()
+    # Worker threads for background jobs (upload processing)
+    if JOB_QUEUE_ENABLED:
+        job_queue.start()
+    # Sender tasks that deliver queued emails from the outbox
+    if EMAIL_OUTBOX_ENABLED:
+        email_outbox.start()
+    # Queues deadline reminders (7/3/1 days before) for departments that are behind
+    if REMINDER_SCHEDULER_ENABLED:
+        reminder_scheduler.start()
+    yield
+    reminder_scheduler.stop()
+    await email_outbox.stop()
+    await email_service.close()
+    job_queue.stop()
+    azure_jwks_store.stop_background_refresh()
+    await async_engine.dispose()
+
 # Initialize FastAPI app with larger file upload limit
 app = FastAPI(
     title="Academic Activity Portal API",
     description="API for managing academic activities, score cards, and documents",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# Set maximum request body size to 150MB (to handle 100MB files with overhead)
+# Reject oversized uploads before their multipart body is spooled (path regex -> max file size)
 app.add_middleware(
-    lambda app: app,  # Placeholder for custom middleware if needed in future
+    UploadSizeLimitMiddleware,
+    limits={
+        "/api/scorecard/upload": scorecard.SCORECARD_MAX_FILE_SIZE,
+        # Report and ZIP arrive in the same request
+        r"/documents/upload/\d+": 2 * documents.EVENT_DOCUMENT_MAX_FILE_SIZE,
+    }
 )
 
 # Add CORS middleware with specific origins to support credentials
@@ -42,6 +90,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -91,3 +140,25 @@ async def test_submission():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/job-queue")
+def job_queue_stats():
+    """Background job counts by status and worker thread health"""
+    return job_queue.get_stats()
+
+@app.get("/health/email-outbox")
+async def email_outbox_stats():
+    """Outbox message counts by status, sender task health and SMTP connection reuse"""
+    return {**await email_outbox.get_stats(), "smtp_pool": email_service.smtp_pool.get_stats()}
+
+@app.get("/health/reminder-scheduler")
+def reminder_scheduler_stats():
+    """Deadline reminder scheduler state and the result of its last pass"""
+    return reminder_scheduler.get_stats()
+
+@app.get("/health/db-pool")
+async def db_pool_stats():
+    """Connection pool usage: checked-out/overflow connections and checkout wait times"""
+    return {
+        "sync": get_pool_stats(),
+        "async": get_pool_stats(async_engine.sync_engine)
+    }
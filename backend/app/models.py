@@ -1,6 +1,6 @@
 # app/models.py
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text, Boolean, DateTime, BigInteger, Date
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text, Boolean, DateTime, BigInteger, Date, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from sqlalchemy.ext.declarative import declarative_base
@@ -170,6 +170,34 @@ class Event(Base):
     creator = relationship("User", foreign_keys=[created_by])
     updater = relationship("User", foreign_keys=[updated_by])
 
+# -----------------------------
+# Analytics Rollups
+# -----------------------------
+class DepartmentBudgetRollup(Base):
+    __tablename__ = "analytics_budget_rollups"
+    __table_args__ = (UniqueConstraint("department_id", "academic_year_id", name="uq_budget_rollup_dept_year"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    department_id = Column(Integer, ForeignKey("departments.id"), nullable=False, index=True)
+    academic_year_id = Column(Integer, ForeignKey("academic_years.id"), nullable=False, index=True)
+    total_budget = Column(Float, nullable=False, default=0.0)  # SUM(program_counts.total_budget)
+    program_count = Column(Integer, nullable=False, default=0)  # SUM(program_counts.count)
+    updated_at = Column(DateTime, nullable=False, default=datetime.now)
+
+class DepartmentEventRollup(Base):
+    __tablename__ = "analytics_event_rollups"
+    __table_args__ = (UniqueConstraint("department_id", "academic_year_id", "month", name="uq_event_rollup_dept_year_month"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    department_id = Column(Integer, ForeignKey("departments.id"), nullable=False, index=True)
+    academic_year_id = Column(Integer, ForeignKey("academic_years.id"), nullable=False, index=True)
+    month = Column(Date, nullable=False)  # first day of the month of events.event_date
+    event_count = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    total_budget = Column(Float, nullable=False, default=0.0)  # SUM(events.budget_amount)
+    completed_budget = Column(Float, nullable=False, default=0.0)  # SUM(budget_amount) of completed events
+    updated_at = Column(DateTime, nullable=False, default=datetime.now)
+
 # -----------------------------
 # Notifications
 # -----------------------------
@@ -210,6 +238,13 @@ class DocumentStatus(str, Enum):
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        # Serves the per-event "approved required documents" check in approve_document
+        Index("ix_documents_event_type_status", "event_id", "document_type", "status"),
+        # Keyset pagination of /documents/list, unfiltered and per department/year
+        Index("ix_documents_uploaded_at_id", "uploaded_at", "id"),
+        Index("ix_documents_dept_year_uploaded_at_id", "department_id", "academic_year_id", "uploaded_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String(255), nullable=False)
@@ -420,3 +455,72 @@ class ScoreCardAuditLog(Base):
     submission = relationship("ScoreCardSubmission")
     user = relationship("User")
 
+
+# -----------------------------
+# Background Jobs
+# -----------------------------
+class BackgroundJob(Base):
+    __tablename__ = "background_jobs"
+    __table_args__ = (Index("ix_background_jobs_status_run_after", "status", "run_after"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False, default="{}")  # JSON
+    status = Column(String(20), nullable=False, default='pending')  # 'pending', 'running', 'succeeded', 'failed'
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=False, default=datetime.now)  # not picked up before this time (retry backoff)
+    locked_at = Column(DateTime)  # when a worker claimed it
+    last_error = Column(Text)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    updated_at = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
+
+class FileMetadata(Base):
+    __tablename__ = "file_metadata"
+
+    id = Column(Integer, primary_key=True, index=True)
+    file_path = Column(String(500), nullable=False, unique=True)  # as stored in documents / score_card_documents
+    sha256 = Column(String(64), nullable=False, index=True)
+    file_size = Column(BigInteger, nullable=False)
+    detected_type = Column(String(20))  # 'pdf', 'zip', 'image', 'office', 'other' (from file content)
+    page_count = Column(Integer)  # PDFs
+    document_info = Column(Text)  # JSON: PDF title/author/... or ZIP summary
+    archive_ok = Column(Boolean)  # ZIPs: every member passed its CRC check
+    archive_entries = Column(Integer)
+    thumbnail_path = Column(String(500))
+    processed_at = Column(DateTime, nullable=False, default=datetime.now)
+
+class OutboxEmail(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_emails = Column(Text, nullable=False)  # JSON list
+    cc_emails = Column(Text)  # JSON list
+    subject = Column(String(500), nullable=False)
+    html_body = Column(Text, nullable=False)  # rendered when queued
+    attachments = Column(Text)  # JSON list of file paths, read at send time
+    status = Column(String(20), nullable=False, default='queued')  # 'queued', 'sending', 'sent', 'dead'
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.now)  # retry backoff
+    locked_at = Column(DateTime)  # when a sender claimed it
+    last_error = Column(Text)
+    sent_at = Column(DateTime)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    updated_at = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
+
+class DeadlineReminderLog(Base):
+    __tablename__ = "deadline_reminder_log"
+    __table_args__ = (
+        UniqueConstraint("department_id", "academic_year_id", "module", "deadline", "offset_days", name="uq_deadline_reminder"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    department_id = Column(Integer, ForeignKey("departments.id"), nullable=False)
+    academic_year_id = Column(Integer, ForeignKey("academic_years.id"), nullable=False)
+    module = Column(String(50), nullable=False)
+    deadline = Column(DateTime, nullable=False)  # effective deadline (including any override) the reminder was for
+    offset_days = Column(Integer, nullable=False)  # which reminder (7/3/1 days before) was sent
+    email_id = Column(Integer, ForeignKey("email_outbox.id"))
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
@@ -1,6 +1,8 @@
 # app/notification_service.py
 
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func
 from app.models import Notification, User
 from app.schemas import NotificationCreate
 from datetime import datetime
@@ -127,6 +129,75 @@ class NotificationService:
         
         return False
 
+    # Async variants used by the AsyncSession-based inbox endpoints
+    async def get_user_notifications_async(
+        self, 
+        db: AsyncSession, 
+        user_id: int, 
+        limit: int = 50,
+        unread_only: bool = False
+    ) -> List[Notification]:
+        """Get notifications for a specific user"""
+        
+        query = select(Notification).filter(Notification.user_id == user_id)
+        
+        if unread_only:
+            query = query.filter(Notification.read == False)
+        
+        result = await db.execute(query.order_by(Notification.created_at.desc()).limit(limit))
+        return result.scalars().all()
+    
+    async def mark_as_read_async(self, db: AsyncSession, notification_id: int, user_id: int) -> bool:
+        """Mark a notification as read"""
+        
+        result = await db.execute(
+            update(Notification)
+            .where(Notification.id == notification_id, Notification.user_id == user_id)
+            .values(read=True)
+        )
+        await db.commit()
+        return result.rowcount > 0
+    
+    async def mark_all_as_read_async(self, db: AsyncSession, user_id: int) -> int:
+        """Mark all notifications as read for a user"""
+        
+        result = await db.execute(
+            update(Notification)
+            .where(Notification.user_id == user_id, Notification.read == False)
+            .values(read=True)
+        )
+        await db.commit()
+        return result.rowcount
+    
+    async def get_unread_count_async(self, db: AsyncSession, user_id: int) -> int:
+        """Get count of unread notifications for a user"""
+        
+        result = await db.execute(
+            select(func.count(Notification.id)).filter(
+                Notification.user_id == user_id,
+                Notification.read == False
+            )
+        )
+        return result.scalar()
+    
+    async def delete_notification_async(self, db: AsyncSession, notification_id: int, user_id: int) -> bool:
+        """Delete a notification"""
+        
+        result = await db.execute(
+            select(Notification).filter(
+                Notification.id == notification_id,
+                Notification.user_id == user_id
+            )
+        )
+        notification = result.scalars().first()
+        
+        if notification:
+            await db.delete(notification)
+            await db.commit()
+            return True
+        
+        return False
+
     # Workflow-specific notification helpers
     def notify_budget_submission(
         self, 
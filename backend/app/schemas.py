@@ -374,6 +374,20 @@ class ScoreCardResponseOut(ScoreCardResponseBase):
     class Config:
         from_attributes = True
 
+# Bulk save of all responses for a submission in one request
+class ScoreCardBulkResponseItem(BaseModel):
+    question_id: int
+    count_response: int = 0
+    onedrive_links: Optional[List[str]] = None  # None leaves existing links untouched
+    onedrive_description: Optional[str] = None
+    has_physical_documents: bool = False
+    physical_location: Optional[str] = None
+    physical_description: Optional[str] = None
+
+class ScoreCardBulkResponseSave(BaseModel):
+    submission_id: int
+    responses: List[ScoreCardBulkResponseItem]
+
 class ScoreCardSubmissionBase(BaseModel):
     submission_status: str = 'draft'
     comments: Optional[str] = None
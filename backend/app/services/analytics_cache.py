@@ -0,0 +1,87 @@
+# backend/app/services/analytics_cache.py
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from app.cache import CacheBackend, InMemoryCacheBackend
+
+class AnalyticsResponseCache:
+    """
+    Cache of analytics endpoint responses keyed by
+    (endpoint, academic_year_id, role scope, department).
+
+    Invalidation is per academic year: every key embeds the year's current
+    generation, and a write bumps that generation so older entries are never
+    read again (they age out of the backend on their own). This works with any
+    CacheBackend that supports get/set, including shared out-of-process stores.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def configure_backend(self, backend: CacheBackend):
+        """Swap in a different cache store (e.g. a shared one for multi-worker deployments)"""
+        self.backend = backend
+
+    def _generation(self, academic_year_id: Optional[int]) -> int:
+        generation_key = ("__generation__", academic_year_id)
+        generation = self.backend.get(generation_key)
+        if generation is None:
+            # Unknown or evicted generation: start a fresh one so no older entry can match
+            generation = time.time_ns()
+            self.backend.set(generation_key, generation)
+        return generation
+
+    def key(self, endpoint: str, academic_year_id: Optional[int], role: str, department_id: Optional[int]) -> tuple:
+        """HoDs only see their own department; every other role shares the institution-wide scope"""
+        if role == 'hod':
+            scope = ('hod', department_id)
+        else:
+            scope = ('all', None)
+        return (endpoint, academic_year_id, *scope, self._generation(academic_year_id))
+
+    def get(self, key: tuple) -> Optional[Any]:
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: tuple, value: Any):
+        self.backend.set(key, value)
+
+    def invalidate(self, *academic_year_ids: Optional[int]):
+        """Drop cached responses for the given academic years (call after the write commits)"""
+        for academic_year_id in set(academic_year_ids):
+            self.backend.set(("__generation__", academic_year_id), time.time_ns())
+            with self._lock:
+                self.invalidations += 1
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "backend": type(self.backend).__name__,
+                "backend_stats": self.backend.stats()
+            }
+
+# Create singleton instance
+analytics_cache = AnalyticsResponseCache(
+    InMemoryCacheBackend(
+        max_size=int(os.getenv("ANALYTICS_CACHE_SIZE", "1024")),
+        ttl_seconds=float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "60"))
+    )
+)
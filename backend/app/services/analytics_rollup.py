@@ -0,0 +1,125 @@
+# backend/app/services/analytics_rollup.py
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case, delete
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models import ProgramCount, Event, DepartmentBudgetRollup, DepartmentEventRollup
+from datetime import datetime, date
+from typing import Any, Dict, Iterable, List, Tuple
+
+# INSERT ... ON CONFLICT DO UPDATE constructs of the supported backends
+UPSERT_INSERTS = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+def _upsert(db: Session, model, rows: List[Dict[str, Any]], key: List[str]):
+    """Insert rows, updating the existing row wherever the unique `key` columns already match"""
+    if not rows:
+        return
+    insert = UPSERT_INSERTS[db.get_bind().dialect.name]
+    statement = insert(model).values(rows)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=key,
+        set_={column: statement.excluded[column] for column in rows[0] if column not in key}
+    ))
+
+def refresh_department_rollups(db: Session, department_id: int, academic_year_id: int):
+    """
+    Recompute the analytics rollups for one (department, academic year) slice.
+
+    Called from the write paths (program counts, events, document approval) in the
+    same transaction as the write, so the caller's commit publishes both together.
+    Only the touched slice is re-aggregated, so the cost is bounded by that
+    department's rows for the year, not by the whole table. Rows are upserted on
+    the rollup tables' unique keys, so concurrent refreshes of the same slice
+    cannot trip the unique constraints.
+    """
+    if department_id is None or academic_year_id is None:
+        return
+
+    # Make pending changes in this session visible to the aggregates below
+    db.flush()
+    now = datetime.now()
+
+    # Budget rollup: one row per (department, academic year)
+    budget = db.query(
+        func.count(ProgramCount.id).label('rows'),
+        func.coalesce(func.sum(ProgramCount.total_budget), 0).label('total_budget'),
+        func.coalesce(func.sum(ProgramCount.count), 0).label('program_count')
+    ).filter(
+        ProgramCount.department_id == department_id,
+        ProgramCount.academic_year_id == academic_year_id
+    ).one()
+    if budget.rows:
+        _upsert(db, DepartmentBudgetRollup, [{
+            "department_id": department_id,
+            "academic_year_id": academic_year_id,
+            "total_budget": float(budget.total_budget),
+            "program_count": int(budget.program_count),
+            "updated_at": now
+        }], key=["department_id", "academic_year_id"])
+    else:
+        db.execute(delete(DepartmentBudgetRollup).where(
+            DepartmentBudgetRollup.department_id == department_id,
+            DepartmentBudgetRollup.academic_year_id == academic_year_id
+        ))
+
+    # Event rollup: one row per (department, academic year, month)
+    event_year = func.extract('year', Event.event_date)
+    event_month = func.extract('month', Event.event_date)
+    is_completed = Event.event_status == 'completed'
+    monthly = db.query(
+        event_year.label('year'),
+        event_month.label('month'),
+        func.count(Event.id).label('event_count'),
+        func.count(case((is_completed, 1), else_=None)).label('completed_count'),
+        func.coalesce(func.sum(Event.budget_amount), 0).label('total_budget'),
+        func.coalesce(func.sum(case((is_completed, Event.budget_amount), else_=0)), 0).label('completed_budget')
+    ).filter(
+        Event.department_id == department_id,
+        Event.academic_year_id == academic_year_id
+    ).group_by(event_year, event_month).all()
+    months = [date(int(row.year), int(row.month), 1) for row in monthly]
+    _upsert(db, DepartmentEventRollup, [
+        {
+            "department_id": department_id,
+            "academic_year_id": academic_year_id,
+            "month": month,
+            "event_count": row.event_count,
+            "completed_count": row.completed_count,
+            "total_budget": float(row.total_budget),
+            "completed_budget": float(row.completed_budget),
+            "updated_at": now
+        }
+        for month, row in zip(months, monthly)
+    ], key=["department_id", "academic_year_id", "month"])
+    # Months that no longer have any events
+    db.execute(delete(DepartmentEventRollup).where(
+        DepartmentEventRollup.department_id == department_id,
+        DepartmentEventRollup.academic_year_id == academic_year_id,
+        DepartmentEventRollup.month.notin_(months)
+    ))
+
+    db.flush()
+
+def refresh_rollups_for(db: Session, keys: Iterable[Tuple[int, int]]):
+    """Refresh every distinct (department_id, academic_year_id) slice in keys"""
+    for department_id, academic_year_id in set(keys):
+        refresh_department_rollups(db, department_id, academic_year_id)
+
+def rebuild_all_rollups(db: Session) -> dict:
+    """Drop and recompute all rollups from program_counts and events"""
+    db.execute(delete(DepartmentBudgetRollup))
+    db.execute(delete(DepartmentEventRollup))
+
+    keys = set(db.query(ProgramCount.department_id, ProgramCount.academic_year_id).distinct().all())
+    keys |= set(db.query(Event.department_id, Event.academic_year_id).distinct().all())
+    refresh_rollups_for(db, keys)
+    db.commit()
+
+    return {
+        "slices": len(keys),
+        "budget_rollups": db.query(DepartmentBudgetRollup).count(),
+        "event_rollups": db.query(DepartmentEventRollup).count()
+    }
@@ -0,0 +1,233 @@
+# backend/app/services/blob_storage.py
+import hashlib
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from fastapi import UploadFile
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import Document, ScoreCardDocument
+from app.services.upload_storage import UPLOAD_CHUNK_SIZE, stream_upload_to_path
+
+# Unreferenced blobs younger than this are left alone by GC, so uploads whose
+# database row has not been committed yet are never collected
+BLOB_GC_GRACE_SECONDS = int(os.getenv("BLOB_GC_GRACE_SECONDS", "3600"))
+
+
+@dataclass
+class StoredBlob:
+    sha256: str
+    path: str
+    size: int
+    deduplicated: bool  # True if identical content was already stored
+
+
+class BlobStore:
+    """
+    Interface for content-addressed file storage.
+
+    Blobs are identified by the SHA-256 of their content and addressed by the
+    `path` string saved in Document.file_path / ScoreCardDocument.file_path.
+    """
+
+    async def save_upload(self, upload: UploadFile, max_size: Optional[int] = None) -> StoredBlob:
+        raise NotImplementedError
+
+    def store_file(self, source) -> StoredBlob:
+        """Move a complete local file into the store (consumes `source`)"""
+        raise NotImplementedError
+
+    def owns(self, path: str) -> bool:
+        """Whether `path` points into this store"""
+        raise NotImplementedError
+
+    def delete(self, path: str) -> bool:
+        raise NotImplementedError
+
+    def last_used(self, path: str) -> Optional[float]:
+        """Timestamp the blob was last written or deduplicated onto (None if missing)"""
+        raise NotImplementedError
+
+    def iter_blobs(self) -> Iterator[tuple]:
+        """Yield (path, size, mtime) for every stored blob"""
+        raise NotImplementedError
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs on the local filesystem under root/ab/cd/<sha256>"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.incoming = self.root / "incoming"
+
+    def path_for(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256[2:4] / sha256
+
+    async def save_upload(self, upload: UploadFile, max_size: Optional[int] = None) -> StoredBlob:
+        """Stream an upload into the store, hashing as it goes; identical content is kept once"""
+        hasher = hashlib.sha256()
+        staged = self.incoming / uuid.uuid4().hex
+        size = await stream_upload_to_path(upload, staged, max_size, hasher=hasher)
+
+        return self._commit(staged, hasher.hexdigest(), size)
+
+    def store_file(self, source) -> StoredBlob:
+        hasher = hashlib.sha256()
+        size = 0
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+                hasher.update(chunk)
+                size += len(chunk)
+        return self._commit(Path(source), hasher.hexdigest(), size)
+
+    def _commit(self, staged: Path, sha256: str, size: int) -> StoredBlob:
+        """Move a fully written file to its content address, or drop it if already stored"""
+        destination = self.path_for(sha256)
+        if destination.exists():
+            os.remove(staged)
+            # Touch so a concurrent GC pass treats the blob as freshly used
+            os.utime(destination)
+            deduplicated = True
+        else:
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(staged, destination)
+            deduplicated = False
+
+        return StoredBlob(sha256=sha256, path=destination.as_posix(), size=size, deduplicated=deduplicated)
+
+    def owns(self, path: str) -> bool:
+        try:
+            relative = Path(path).relative_to(self.root)
+        except ValueError:
+            return False
+        return len(relative.parts) == 3 and relative.parts[0] != self.incoming.name
+
+    def delete(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def last_used(self, path: str) -> Optional[float]:
+        try:
+            return os.stat(path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def iter_blobs(self) -> Iterator[tuple]:
+        if not self.root.exists():
+            return
+        for blob in self.root.glob("??/??/*"):
+            if blob.is_file():
+                stat = blob.stat()
+                yield blob.as_posix(), stat.st_size, stat.st_mtime
+
+
+def create_blob_store() -> BlobStore:
+    """Build the blob store selected by BLOB_STORAGE_BACKEND"""
+    backend = os.getenv("BLOB_STORAGE_BACKEND", "local")
+    if backend == "local":
+        return LocalBlobStore(os.getenv("BLOB_STORAGE_DIRECTORY", "uploads/blobs"))
+    raise ValueError(f"Unknown BLOB_STORAGE_BACKEND: {backend}")
+
+
+blob_store = create_blob_store()
+
+
+# =====================================================
+# Reference counting
+# =====================================================
+
+def _document_references(db: Session):
+    # Soft-deleted documents no longer hold on to their file
+    return db.query(Document.file_path, Document.file_size).filter(Document.status != 'deleted')
+
+
+def _scorecard_references(db: Session):
+    return db.query(ScoreCardDocument.file_path, ScoreCardDocument.file_size).filter(
+        ScoreCardDocument.file_path.isnot(None)
+    )
+
+
+def blob_reference_count(db: Session, path: str) -> int:
+    """Number of Document and ScoreCardDocument rows pointing at `path`"""
+    documents = db.query(func.count(Document.id)).filter(
+        Document.file_path == path, Document.status != 'deleted'
+    ).scalar()
+    scorecard_documents = db.query(func.count(ScoreCardDocument.id)).filter(
+        ScoreCardDocument.file_path == path
+    ).scalar()
+    return documents + scorecard_documents
+
+
+def release_file(db: Session, path: Optional[str], grace_seconds: int = BLOB_GC_GRACE_SECONDS) -> bool:
+    """
+    Remove the file at `path` if nothing references it any more.
+    Call after the commit that dropped the reference. Returns True if the file was removed.
+
+    Like collect_garbage, blobs used within the last `grace_seconds` are kept: an
+    upload that was just deduplicated onto the blob may not have committed its
+    row yet. GC reclaims them once the grace period has passed.
+    """
+    if not path or blob_reference_count(db, path):
+        return False
+    try:
+        if blob_store.owns(path):
+            last_used = blob_store.last_used(path)
+            if last_used is None or last_used > time.time() - grace_seconds:
+                return False
+            return blob_store.delete(path)
+        # Files stored before content addressing have a single owner
+        if os.path.exists(path):
+            os.remove(path)
+            return True
+    except Exception as e:
+        print(f"Warning: Could not delete file {path}: {e}")
+    return False
+
+
+def collect_garbage(db: Session, dry_run: bool = False, grace_seconds: int = BLOB_GC_GRACE_SECONDS) -> Dict:
+    """Delete blobs that no Document or ScoreCardDocument references"""
+    referenced = {path for path, _ in _document_references(db)}
+    referenced.update(path for path, _ in _scorecard_references(db))
+
+    cutoff = time.time() - grace_seconds
+    removed, freed = 0, 0
+    for path, size, mtime in blob_store.iter_blobs():
+        if path in referenced or mtime > cutoff:
+            continue
+        if dry_run or blob_store.delete(path):
+            removed += 1
+            freed += size
+
+    return {"dry_run": dry_run, "blobs_removed": removed, "bytes_freed": freed}
+
+
+def storage_report(db: Session) -> Dict:
+    """Logical vs. physical bytes for stored blobs, i.e. what deduplication saves"""
+    sizes: Dict[str, int] = {}
+    references = 0
+    logical_bytes = 0
+    for query in (_document_references(db), _scorecard_references(db)):
+        for path, size in query:
+            if not blob_store.owns(path):
+                continue
+            references += 1
+            logical_bytes += size or 0
+            sizes[path] = max(sizes.get(path, 0), size or 0)
+
+    physical_bytes = sum(sizes.values())
+    return {
+        "referenced_blobs": len(sizes),
+        "references": references,
+        "logical_bytes": logical_bytes,
+        "physical_bytes": physical_bytes,
+        "bytes_saved": logical_bytes - physical_bytes,
+        "dedup_ratio": logical_bytes / physical_bytes if physical_bytes else 1.0
+    }
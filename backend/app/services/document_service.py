@@ -1,9 +1,18 @@
 # backend/app/services/document_service.py
 from sqlalchemy.orm import Session
+from sqlalchemy import select, func, distinct, tuple_
 from app.models import Document, User, Event, Department, AcademicYear, WorkflowStatus
+from app.services.analytics_rollup import refresh_rollups_for
+from app.services.analytics_cache import analytics_cache
+from app.services.file_processing import enqueue_file_processing
 from datetime import datetime
+from typing import Dict, Tuple
+import base64
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 def save_event_document(db: Session, event_id: int, doc_type: str, filename: str, file_path: str, 
                        file_size: int, mime_type: str = None, uploaded_by: int = None):
     """
@@ -87,15 +96,50 @@ def save_event_document(db: Session, event_id: int, doc_type: str, filename: str
     )
     
     db.add(new_document)
+    # Hash/validate/extract metadata in the background, committed with the document
+    enqueue_file_processing(db, file_path)
     db.commit()
     db.refresh(new_document)
     
     return new_document
 
-def get_event_documents(db: Session, event_id: int = None):
+# Accept the frontend's doc_type aliases as well as stored document types
+DOCUMENT_TYPE_ALIASES = {
+    'report': 'complete_report',
+    'zip': 'supporting_documents',
+    'zipfile': 'supporting_documents'
+}
+
+def encode_document_cursor(document: Document) -> str:
+    """Opaque keyset cursor for the (uploaded_at, id) position of a document"""
+    raw = f"{document.uploaded_at.isoformat()}|{document.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_document_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        uploaded_at, document_id = raw.split("|")
+        return datetime.fromisoformat(uploaded_at), int(document_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def get_event_documents(
+    db: Session,
+    event_id: int = None,
+    department_id: int = None,
+    academic_year_id: int = None,
+    status: str = None,
+    document_type: str = None,
+    cursor: str = None,
+    limit: int = None
+):
     """
-    Get event documents, optionally filtered by event_id.
+    Get event documents, newest first, optionally filtered.
     Only returns latest versions of documents.
+    
+    With `limit`, returns one keyset page ordered by (uploaded_at, id); pass the
+    cursor of the last row to get the next page. Backed by the documents
+    (uploaded_at, id) and (department_id, academic_year_id, uploaded_at, id) indexes.
     """
     query = db.query(Document).filter(
         Document.event_id.isnot(None),
@@ -105,11 +149,45 @@ def get_event_documents(db: Session, event_id: int = None):
     
     if event_id:
         query = query.filter(Document.event_id == event_id)
+    if department_id:
+        query = query.filter(Document.department_id == department_id)
+    if academic_year_id:
+        query = query.filter(Document.academic_year_id == academic_year_id)
+    if status:
+        query = query.filter(Document.status == status)
+    if document_type:
+        query = query.filter(Document.document_type == DOCUMENT_TYPE_ALIASES.get(document_type, document_type))
+    if cursor:
+        uploaded_at, document_id = decode_document_cursor(cursor)
+        query = query.filter(tuple_(Document.uploaded_at, Document.id) < tuple_(uploaded_at, document_id))
+    
+    query = query.order_by(Document.uploaded_at.desc(), Document.id.desc())
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+# Both document types must be approved (latest version) for an event to count as complete
+REQUIRED_EVENT_DOCUMENT_TYPES = ('complete_report', 'supporting_documents')
+
+def count_incomplete_events(db: Session, department_id: int, academic_year_id: int) -> int:
+    """Number of events in a department/year lacking an approved latest document of each required type (one statement)"""
+    approved_required_types = select(
+        func.count(distinct(Document.document_type))
+    ).where(
+        Document.event_id == Event.id,
+        Document.document_type.in_(REQUIRED_EVENT_DOCUMENT_TYPES),
+        Document.status == 'approved',
+        Document.is_latest_version == True
+    ).correlate(Event).scalar_subquery()
     
-    return query.order_by(Document.uploaded_at.desc()).all()
+    return db.query(func.count(Event.id)).filter(
+        Event.department_id == department_id,
+        Event.academic_year_id == academic_year_id,
+        approved_required_types < len(REQUIRED_EVENT_DOCUMENT_TYPES)
+    ).scalar()
 
 def approve_document(db: Session, document_id: int, approved_by: int):
-    """Approve a document and update event status if all events in academic year have approved documents"""
+    """Approve a document and update event status if all of the department's events in the academic year have approved documents"""
     document = db.query(Document).filter(Document.id == document_id).first()
     if not document:
         raise ValueError(f"Document with ID {document_id} not found")
@@ -120,51 +198,33 @@ def approve_document(db: Session, document_id: int, approved_by: int):
     document.rejection_reason = None
     document.updated_at = datetime.now()
     
-    # Check if all events in the academic year have approved documents
+    # Check if all events of this department in the academic year have approved documents
     if document.event_id:
         event = db.query(Event).filter(Event.id == document.event_id).first()
         if event and event.academic_year_id:
-            # Get all events in the same academic year
-            all_academic_year_events = db.query(Event).filter(
-                Event.academic_year_id == event.academic_year_id
-            ).all()
-            
-            all_events_completed = True
-            
-            for year_event in all_academic_year_events:
-                # Get all documents for this event (excluding deleted ones)
-                event_docs = db.query(Document).filter(
-                    Document.event_id == year_event.id,
-                    Document.status != 'deleted',
-                    Document.is_latest_version == True
-                ).all()
-                
-                # Check for required document types - BOTH are required for completion
-                required_types = ['complete_report', 'supporting_documents']
-                event_has_all_required = True
-                
-                # Each event MUST have both document types with approved status
-                for doc_type in required_types:
-                    type_docs = [doc for doc in event_docs if doc.document_type == doc_type]
-                    
-                    # Check if this document type exists AND is approved
-                    has_approved_doc_of_type = any(doc.status == 'approved' for doc in type_docs)
-                    
-                    if not has_approved_doc_of_type:
-                        event_has_all_required = False
-                        print(f"   ❌ Event {year_event.id} ({year_event.title}) missing approved {doc_type}")
-                        break
-                
-                if not event_has_all_required:
-                    all_events_completed = False
-                    break
+            # Make this approval visible to the aggregate below
+            db.flush()
+            incomplete_events = count_incomplete_events(db, event.department_id, event.academic_year_id)
+            all_events_completed = incomplete_events == 0
+            if not all_events_completed:
+                logger.info(
+                    "completion_pending document_id=%s department_id=%s academic_year_id=%s incomplete_events=%d",
+                    document.id, event.department_id, event.academic_year_id, incomplete_events
+                )
             
-            # Update all events in the academic year to 'completed' if all are ready
+            # Update all events of the department in the academic year to 'completed' if all are ready
             if all_events_completed:
-                for year_event in all_academic_year_events:
-                    if year_event.event_status != 'completed':
-                        year_event.event_status = 'completed'
-                        print(f"✅ Event {year_event.id} ({year_event.title}) status updated to 'completed' - all academic year events have approved documents")
+                updated_events = db.query(Event).filter(
+                    Event.department_id == event.department_id,
+                    Event.academic_year_id == event.academic_year_id,
+                    Event.event_status != 'completed'
+                ).update({Event.event_status: 'completed'}, synchronize_session=False)
+                if updated_events:
+                    refresh_rollups_for(db, [(event.department_id, event.academic_year_id)])
+                    logger.info(
+                        "events_completed document_id=%s department_id=%s academic_year_id=%s events_completed=%d",
+                        document.id, event.department_id, event.academic_year_id, updated_events
+                    )
                 
                 # Also update the workflow status to 'completed' for this department and academic year
                 workflow_status = db.query(WorkflowStatus).filter(
@@ -175,7 +235,10 @@ def approve_document(db: Session, document_id: int, approved_by: int):
                 if workflow_status and workflow_status.status != 'completed':
                     workflow_status.status = 'completed'
                     workflow_status.updated_at = datetime.now()
-                    print(f"🏆 Workflow status updated to 'completed' for department {event.department_id}, academic year {event.academic_year_id} - all events have approved documents")
+                    logger.info(
+                        "workflow_completed department_id=%s academic_year_id=%s created=false",
+                        event.department_id, event.academic_year_id
+                    )
                 elif not workflow_status:
                     # Create workflow status if it doesn't exist
                     workflow_status = WorkflowStatus(
@@ -185,14 +248,56 @@ def approve_document(db: Session, document_id: int, approved_by: int):
                         updated_at=datetime.now()
                     )
                     db.add(workflow_status)
-                    print(f"🏆 Workflow status created as 'completed' for department {event.department_id}, academic year {event.academic_year_id} - all events have approved documents")
+                    logger.info(
+                        "workflow_completed department_id=%s academic_year_id=%s created=true",
+                        event.department_id, event.academic_year_id
+                    )
     
     db.commit()
+    analytics_cache.invalidate(document.academic_year_id)
     db.refresh(document)
     return document
 
+def revert_completed_events(db: Session, document: Document, reason: str) -> Dict[str, int]:
+    """
+    Revert an event document's department/year from 'completed' after the document
+    is rejected or deleted: completed events go back to 'planned' and a completed
+    workflow back to 'events_planned', each as one UPDATE. Runs in the caller's
+    transaction and returns the affected row counts.
+    """
+    reverted = {"events_reverted": 0, "workflows_reverted": 0}
+    if not document.event_id:
+        return reverted
+    
+    event = db.query(Event.department_id, Event.academic_year_id).filter(Event.id == document.event_id).first()
+    if not event or not event.academic_year_id:
+        return reverted
+    
+    reverted["events_reverted"] = db.query(Event).filter(
+        Event.department_id == event.department_id,
+        Event.academic_year_id == event.academic_year_id,
+        Event.event_status == 'completed'
+    ).update({Event.event_status: 'planned'}, synchronize_session=False)
+    if reverted["events_reverted"]:
+        refresh_rollups_for(db, [(event.department_id, event.academic_year_id)])
+    
+    reverted["workflows_reverted"] = db.query(WorkflowStatus).filter(
+        WorkflowStatus.department_id == event.department_id,
+        WorkflowStatus.academic_year_id == event.academic_year_id,
+        WorkflowStatus.status == 'completed'
+    ).update({WorkflowStatus.status: 'events_planned', WorkflowStatus.updated_at: datetime.now()}, synchronize_session=False)
+    
+    if reverted["events_reverted"] or reverted["workflows_reverted"]:
+        logger.info(
+            "completion_reverted reason=%s document_id=%s department_id=%s academic_year_id=%s events_reverted=%d workflows_reverted=%d",
+            reason, document.id, event.department_id, event.academic_year_id,
+            reverted["events_reverted"], reverted["workflows_reverted"]
+        )
+    return reverted
+
 def reject_document(db: Session, document_id: int, rejected_by: int, rejection_reason: str):
-    """Reject a document with reason and revert all events in academic year to planned if needed"""
+    """Reject a document with reason and revert the department's events in the academic year to planned if needed.
+    Returns (document, reverted counts)."""
     document = db.query(Document).filter(Document.id == document_id).first()
     if not document:
         raise ValueError(f"Document with ID {document_id} not found")
@@ -204,32 +309,10 @@ def reject_document(db: Session, document_id: int, rejected_by: int, rejection_r
     document.rejection_reason = rejection_reason
     document.updated_at = datetime.now()
     
-    # If this document belongs to an event, revert all events in academic year to planned
-    if document.event_id:
-        event = db.query(Event).filter(Event.id == document.event_id).first()
-        if event and event.academic_year_id:
-            # Get all events in the same academic year that are completed
-            completed_events = db.query(Event).filter(
-                Event.academic_year_id == event.academic_year_id,
-                Event.event_status == 'completed'
-            ).all()
-            
-            # Revert all completed events to planned
-            for year_event in completed_events:
-                year_event.event_status = 'planned'
-                print(f"⚠️ Event {year_event.id} ({year_event.title}) status reverted to 'planned' - document rejected in academic year")
-            
-            # Also revert the workflow status if it was 'completed'
-            workflow_status = db.query(WorkflowStatus).filter(
-                WorkflowStatus.department_id == event.department_id,
-                WorkflowStatus.academic_year_id == event.academic_year_id
-            ).first()
-            
-            if workflow_status and workflow_status.status == 'completed':
-                workflow_status.status = 'events_planned'  # Revert to previous state
-                workflow_status.updated_at = datetime.now()
-                print(f"⚠️ Workflow status reverted to 'events_planned' for department {event.department_id}, academic year {event.academic_year_id} - document rejected")
+    # If this document belongs to an event, revert the department's completed events to planned
+    reverted = revert_completed_events(db, document, reason="document_rejected")
     
     db.commit()
+    analytics_cache.invalidate(document.academic_year_id)
     db.refresh(document)
-    return document
+    return document, reverted
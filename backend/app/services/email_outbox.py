@@ -0,0 +1,236 @@
+# backend/app/services/email_outbox.py
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import func, select, update
+
+from app.database import AsyncSessionLocal
+from app.models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_STATUSES = ('queued', 'sending', 'sent', 'dead')
+
+# Delivers one message; raises on failure
+EmailTransport = Callable[[OutboxEmail], Awaitable[None]]
+
+
+class PermanentDeliveryError(Exception):
+    """Raised by a transport when retrying cannot help (e.g. every recipient was refused)"""
+
+
+class EmailOutboxSender:
+    """
+    Outgoing email kept in the email_outbox table and sent by asyncio workers.
+
+    - enqueue() adds a row in the caller's session (sync or async), so request
+      handlers only write to the database and the message is committed together
+      with the change it reports.
+    - `workers` tasks claim due messages with UPDATE ... WHERE status = 'queued',
+      so several app processes can share the outbox without double-sending.
+    - Failures are retried with exponential backoff; after max_attempts (or a
+      PermanentDeliveryError) the message is dead-lettered as 'dead' with the
+      last error. Messages stuck in 'sending' after a crash are requeued once
+      their lock times out.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        workers: int = 4,
+        poll_interval: float = 2.0,
+        lock_timeout: float = 300,
+        retry_base_seconds: float = 60,
+        max_attempts: int = 5
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lock_timeout = lock_timeout
+        self.retry_base_seconds = retry_base_seconds
+        self.max_attempts = max_attempts
+
+        self.transport: Optional[EmailTransport] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._wake_event: Optional[asyncio.Event] = None
+
+    def set_transport(self, transport: EmailTransport):
+        self.transport = transport
+
+    def enqueue(
+        self,
+        db,
+        to_emails: List[str],
+        subject: str,
+        html_body: str,
+        cc_emails: Optional[List[str]] = None,
+        attachments: Optional[List[str]] = None,
+        max_attempts: Optional[int] = None
+    ) -> OutboxEmail:
+        """Add a message in the caller's transaction; it is sent once committed"""
+        message = OutboxEmail(
+            to_emails=json.dumps(list(to_emails)),
+            cc_emails=json.dumps(list(cc_emails)) if cc_emails else None,
+            subject=subject,
+            html_body=html_body,
+            attachments=json.dumps(list(attachments)) if attachments else None,
+            status='queued',
+            attempts=0,
+            max_attempts=max_attempts or self.max_attempts,
+            next_attempt_at=datetime.now()
+        )
+        db.add(message)
+        self.wake()
+        return message
+
+    def wake(self):
+        """Nudge idle workers; safe to call from request threads"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake_event.set)
+
+    # -----------------------------
+    # Workers
+    # -----------------------------
+    def start(self):
+        """Start the worker tasks on the running event loop (call from the app lifespan)"""
+        if any(not task.done() for task in self._tasks):
+            return
+        if self.transport is None:
+            raise RuntimeError("No email transport configured")
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._wake_event = asyncio.Event()
+        self._tasks = [
+            self._loop.create_task(self._worker_loop(), name=f"email-sender-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self, timeout: float = 10):
+        if not self._tasks:
+            return
+        self._stop_event.set()
+        self._wake_event.set()
+        done, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        self._tasks = []
+        self._loop = None
+
+    async def _worker_loop(self):
+        while not self._stop_event.is_set():
+            # Cleared before looking, so an enqueue during the send wakes the next wait
+            self._wake_event.clear()
+            try:
+                if await self.send_next():
+                    continue
+            except Exception as e:
+                logger.exception("email_outbox_error error=%s", e)
+            try:
+                await asyncio.wait_for(self._wake_event.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _requeue_stale(self, db):
+        stale_before = datetime.now() - timedelta(seconds=self.lock_timeout)
+        result = await db.execute(
+            update(OutboxEmail)
+            .where(OutboxEmail.status == 'sending', OutboxEmail.locked_at < stale_before)
+            .values(status='queued', locked_at=None)
+        )
+        if result.rowcount:
+            await db.commit()
+            logger.warning("emails_requeued count=%d", result.rowcount)
+
+    async def _claim(self, db) -> Optional[OutboxEmail]:
+        now = datetime.now()
+        candidates = (await db.execute(
+            select(OutboxEmail.id)
+            .where(OutboxEmail.status == 'queued', OutboxEmail.next_attempt_at <= now)
+            .order_by(OutboxEmail.next_attempt_at, OutboxEmail.id)
+            .limit(self.workers)
+        )).scalars().all()
+
+        for message_id in candidates:
+            result = await db.execute(
+                update(OutboxEmail)
+                .where(OutboxEmail.id == message_id, OutboxEmail.status == 'queued')
+                .values(status='sending', locked_at=now, attempts=OutboxEmail.attempts + 1)
+            )
+            message = await db.get(OutboxEmail, message_id, populate_existing=True) if result.rowcount else None
+            # No transaction stays open while the message is being sent
+            await db.commit()
+            if message is not None:
+                return message
+        return None
+
+    async def send_next(self) -> bool:
+        """Claim and send one due message. Returns False if there was nothing to do."""
+        async with self.session_factory() as db:
+            await self._requeue_stale(db)
+            message = await self._claim(db)
+            if message is None:
+                return False
+
+            try:
+                await self.transport(message)
+            except Exception as e:
+                message.last_error = f"{type(e).__name__}: {e}"
+                message.locked_at = None
+                if isinstance(e, PermanentDeliveryError) or message.attempts >= message.max_attempts:
+                    message.status = 'dead'
+                    logger.error("email_dead id=%s attempts=%d error=%s", message.id, message.attempts, message.last_error)
+                else:
+                    message.status = 'queued'
+                    message.next_attempt_at = datetime.now() + timedelta(seconds=self.retry_base_seconds * 2 ** (message.attempts - 1))
+                    logger.warning("email_retry id=%s attempts=%d next_attempt_at=%s error=%s", message.id, message.attempts, message.next_attempt_at.isoformat(), message.last_error)
+            else:
+                message.status = 'sent'
+                message.sent_at = datetime.now()
+                message.last_error = None
+                message.locked_at = None
+                logger.info("email_sent id=%s attempts=%d", message.id, message.attempts)
+            await db.commit()
+            return True
+
+    async def get_stats(self) -> Dict[str, Any]:
+        async with self.session_factory() as db:
+            counts = dict((await db.execute(
+                select(OutboxEmail.status, func.count(OutboxEmail.id)).group_by(OutboxEmail.status)
+            )).all())
+        return {
+            "workers": self.workers,
+            "running_workers": sum(not task.done() for task in self._tasks),
+            "messages": {status: counts.get(status, 0) for status in OUTBOX_STATUSES}
+        }
+
+
+def describe_message(message: OutboxEmail) -> Dict[str, Any]:
+    """Delivery status of one outbox message (without the body)"""
+    return {
+        "id": message.id,
+        "to_emails": json.loads(message.to_emails),
+        "cc_emails": json.loads(message.cc_emails) if message.cc_emails else [],
+        "subject": message.subject,
+        "status": message.status,
+        "attempts": message.attempts,
+        "max_attempts": message.max_attempts,
+        "next_attempt_at": message.next_attempt_at,
+        "last_error": message.last_error,
+        "sent_at": message.sent_at,
+        "created_at": message.created_at
+    }
+
+
+email_outbox = EmailOutboxSender(
+    workers=int(os.getenv("EMAIL_OUTBOX_WORKERS", "4")),
+    poll_interval=float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", "2")),
+    lock_timeout=float(os.getenv("EMAIL_OUTBOX_LOCK_TIMEOUT_SECONDS", "300")),
+    retry_base_seconds=float(os.getenv("EMAIL_OUTBOX_RETRY_BASE_SECONDS", "60")),
+    max_attempts=int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "5"))
+)
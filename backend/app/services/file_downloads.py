@@ -0,0 +1,86 @@
+# backend/app/services/file_downloads.py
+import os
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+from app.services.blob_storage import blob_store
+
+# Clients may keep a copy but must revalidate it (cheap 304) before reuse,
+# so a permission change or deleted document takes effect immediately
+DOWNLOAD_CACHE_CONTROL = os.getenv("DOWNLOAD_CACHE_CONTROL", "private, no-cache")
+
+
+def file_etag(path: str, stat_result: os.stat_result) -> str:
+    """
+    Strong ETag for a stored file: the content hash for content-addressed blobs,
+    otherwise size + mtime (files outside the blob store are never rewritten in place).
+    """
+    if blob_store.owns(path):
+        return f'"{os.path.basename(path)}"'
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+
+def _not_modified_since(if_modified_since: str, modified: float) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return False
+    # HTTP dates have one-second resolution
+    return int(modified) <= since
+
+
+def conditional_file_response(
+    request: Request,
+    path: str,
+    filename: Optional[str] = None,
+    media_type: str = 'application/octet-stream',
+    last_modified: Optional[datetime] = None
+) -> Response:
+    """
+    FileResponse with a strong ETag and Last-Modified, answering If-None-Match /
+    If-Modified-Since with 304. Range and If-Range requests (resumed downloads,
+    in-browser PDF paging) are served as 206 by FileResponse using the same ETag.
+
+    Pass the document row's upload time as last_modified: blobs are shared
+    between documents and a dedup hit touches the file, so its mtime does not
+    describe this document. The file mtime is only used when no time is given.
+    """
+    stat_result = os.stat(path)
+    modified = last_modified.timestamp() if last_modified is not None else stat_result.st_mtime
+    headers = {
+        "ETag": file_etag(path, stat_result),
+        "Last-Modified": formatdate(modified, usegmt=True),
+        "Cache-Control": DOWNLOAD_CACHE_CONTROL,
+        "Accept-Ranges": "bytes"
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, headers["ETag"])
+    else:
+        # If-Modified-Since is only consulted when no ETag was sent
+        not_modified = if_modified_since is not None and _not_modified_since(if_modified_since, modified)
+
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(
+        path=path,
+        filename=filename,
+        media_type=media_type,
+        headers=headers,
+        stat_result=stat_result
+    )
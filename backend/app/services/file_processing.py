@@ -0,0 +1,224 @@
+# backend/app/services/file_processing.py
+import hashlib
+import json
+import os
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models import FileMetadata
+from app.services.blob_storage import blob_store
+from app.services.job_queue import job_queue
+from app.services.upload_storage import UPLOAD_CHUNK_SIZE
+
+# Optional: PDF page count/metadata and thumbnails are skipped when not installed
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Optional: renders PDF pages with poppler; without it PDF thumbnails fall back
+# to the first page's embedded images
+try:
+    from pdf2image import convert_from_path
+except ImportError:
+    convert_from_path = None
+
+PROCESS_FILE_JOB = "process_stored_file"
+THUMBNAIL_DIRECTORY = Path(os.getenv("THUMBNAIL_DIRECTORY", "uploads/thumbnails"))
+THUMBNAIL_SIZE = (320, 320)
+
+# Leading bytes of the file formats we extract metadata from
+FILE_SIGNATURES = [
+    (b"%PDF-", "pdf"),
+    (b"PK\x03\x04", "zip"),
+    (b"PK\x05\x06", "zip"),  # empty archive
+    (b"\x89PNG\r\n\x1a\n", "image"),
+    (b"\xff\xd8\xff", "image"),
+    (b"\xd0\xcf\x11\xe0", "office"),  # legacy .doc/.xls
+]
+
+
+def enqueue_file_processing(db: Session, file_path: str):
+    """Queue metadata extraction for a stored file in the caller's transaction"""
+    job_queue.enqueue(db, PROCESS_FILE_JOB, {"file_path": file_path})
+
+
+def detect_file_type(path: str) -> str:
+    with open(path, "rb") as f:
+        head = f.read(16)
+    for signature, file_type in FILE_SIGNATURES:
+        if head.startswith(signature):
+            if file_type == "zip" and Path(path).suffix.lower() in {".docx", ".xlsx", ".pptx"}:
+                return "office"
+            return file_type
+    return "other"
+
+
+def _sha256(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _inspect_pdf(path: str) -> Dict[str, Any]:
+    if PdfReader is None:
+        return {}
+    reader = PdfReader(path)
+    info = {}
+    if reader.metadata:
+        for key in ("title", "author", "subject", "creator", "producer"):
+            value = getattr(reader.metadata, key, None)
+            if value:
+                info[key] = str(value)
+        if reader.metadata.creation_date:
+            info["created"] = reader.metadata.creation_date.isoformat()
+    return {"page_count": len(reader.pages), "document_info": info}
+
+
+def _inspect_zip(path: str) -> Dict[str, Any]:
+    try:
+        with zipfile.ZipFile(path) as archive:
+            members = archive.infolist()
+            first_bad_member = archive.testzip()
+    except zipfile.BadZipFile as e:
+        return {"archive_ok": False, "archive_entries": 0, "document_info": {"error": str(e)}}
+    return {
+        "archive_ok": first_bad_member is None,
+        "archive_entries": len(members),
+        "document_info": {
+            "uncompressed_size": sum(member.file_size for member in members),
+            **({"first_bad_member": first_bad_member} if first_bad_member else {})
+        }
+    }
+
+
+def _save_thumbnail(open_image, sha256: str) -> Optional[str]:
+    """Write a JPEG thumbnail named after the content hash (once per distinct file)"""
+    THUMBNAIL_DIRECTORY.mkdir(parents=True, exist_ok=True)
+    thumbnail_path = THUMBNAIL_DIRECTORY / f"{sha256}.jpg"
+    if not thumbnail_path.exists():
+        image = open_image()
+        if image is None:
+            return None
+        with image:
+            image.thumbnail(THUMBNAIL_SIZE)
+            image.convert("RGB").save(thumbnail_path, "JPEG", quality=80)
+    return thumbnail_path.as_posix()
+
+
+def _make_thumbnail(path: str, sha256: str) -> Optional[str]:
+    if Image is None:
+        return None
+    return _save_thumbnail(lambda: Image.open(path), sha256)
+
+
+def _render_first_page(path: str):
+    """
+    First page of a PDF as an image. Rendered by pdf2image when it (and poppler)
+    are installed; otherwise the largest image embedded in the page, which covers
+    scanned evidence but not text-only or vector pages - those get no thumbnail.
+    """
+    if convert_from_path is not None:
+        try:
+            return convert_from_path(path, dpi=72, first_page=1, last_page=1)[0]
+        except Exception:
+            # pdf2image without poppler on PATH; use the embedded images instead
+            pass
+    try:
+        images = [embedded.image for embedded in PdfReader(path).pages[0].images]
+    except Exception:
+        # Thumbnails are best effort; unsupported image filters must not fail the job
+        return None
+    if not images:
+        return None
+    largest = max(images, key=lambda image: image.width * image.height)
+    for image in images:
+        if image is not largest:
+            image.close()
+    return largest
+
+
+def _make_pdf_thumbnail(path: str, sha256: str) -> Optional[str]:
+    if Image is None or PdfReader is None:
+        return None
+    return _save_thumbnail(lambda: _render_first_page(path), sha256)
+
+
+def process_stored_file(db: Session, payload: Dict[str, Any]):
+    """
+    Job handler: hash the file, validate ZIPs, read PDF page count/metadata and
+    thumbnail images and PDF first pages, then upsert the result into file_metadata.
+    """
+    file_path = payload["file_path"]
+    if not os.path.isfile(file_path):
+        # Deleted before we got to it; nothing to describe
+        return
+
+    # Content-addressed blobs are named after their hash; only other files are read
+    sha256 = os.path.basename(file_path) if blob_store.owns(file_path) else _sha256(file_path)
+    metadata = db.query(FileMetadata).filter(FileMetadata.file_path == file_path).first()
+    if metadata and metadata.sha256 == sha256:
+        return
+
+    detected_type = detect_file_type(file_path)
+    details: Dict[str, Any] = {}
+    thumbnail_path = None
+    if detected_type == "pdf":
+        details = _inspect_pdf(file_path)
+        thumbnail_path = _make_pdf_thumbnail(file_path, sha256)
+    elif detected_type == "zip":
+        details = _inspect_zip(file_path)
+    elif detected_type == "image":
+        thumbnail_path = _make_thumbnail(file_path, sha256)
+
+    if metadata is None:
+        metadata = FileMetadata(file_path=file_path)
+        db.add(metadata)
+    metadata.sha256 = sha256
+    metadata.file_size = os.path.getsize(file_path)
+    metadata.detected_type = detected_type
+    metadata.page_count = details.get("page_count")
+    metadata.document_info = json.dumps(details["document_info"]) if "document_info" in details else None
+    metadata.archive_ok = details.get("archive_ok")
+    metadata.archive_entries = details.get("archive_entries")
+    metadata.thumbnail_path = thumbnail_path
+    metadata.processed_at = datetime.now()
+
+
+def get_file_metadata(db: Session, file_path: Optional[str]) -> Dict[str, Any]:
+    """Extracted metadata for a stored file, or status 'pending' while it is being processed"""
+    metadata = db.query(FileMetadata).filter(FileMetadata.file_path == file_path).first() if file_path else None
+    if metadata is None:
+        return {"status": "pending"}
+    return {
+        "status": "processed",
+        "sha256": metadata.sha256,
+        "file_size": metadata.file_size,
+        "detected_type": metadata.detected_type,
+        "page_count": metadata.page_count,
+        "document_info": json.loads(metadata.document_info) if metadata.document_info else None,
+        "archive_ok": metadata.archive_ok,
+        "archive_entries": metadata.archive_entries,
+        "has_thumbnail": metadata.thumbnail_path is not None,
+        "processed_at": metadata.processed_at
+    }
+
+
+def get_thumbnail_path(db: Session, file_path: Optional[str]) -> Optional[str]:
+    if not file_path:
+        return None
+    return db.query(FileMetadata.thumbnail_path).filter(FileMetadata.file_path == file_path).scalar()
+
+
+job_queue.register(PROCESS_FILE_JOB, process_stored_file)
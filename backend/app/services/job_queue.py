@@ -0,0 +1,191 @@
+# backend/app/services/job_queue.py
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Session, Dict[str, Any]], None]
+
+
+class JobQueue:
+    """
+    In-process background job queue persisted in the background_jobs table.
+
+    - enqueue() adds a row in the caller's session, so the job is committed (or
+      rolled back) together with the write that produced it.
+    - A fixed pool of worker threads claims pending jobs, which bounds concurrency.
+      Claiming is an UPDATE ... WHERE status = 'pending', so several processes can
+      share the table without running a job twice.
+    - Failed jobs are retried with exponential backoff up to max_attempts, then
+      left as 'failed' with the last error. Jobs stuck in 'running' after a crash
+      are requeued once their lock times out.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        workers: int = 2,
+        poll_interval: float = 2.0,
+        lock_timeout: float = 600,
+        retry_base_seconds: float = 30,
+        max_attempts: int = 3
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lock_timeout = lock_timeout
+        self.retry_base_seconds = retry_base_seconds
+        self.max_attempts = max_attempts
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._threads = []
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    def register(self, job_type: str, handler: JobHandler):
+        self._handlers[job_type] = handler
+
+    def enqueue(
+        self,
+        db: Session,
+        job_type: str,
+        payload: Dict[str, Any],
+        max_attempts: Optional[int] = None
+    ) -> BackgroundJob:
+        """Add a job in the caller's transaction; it becomes visible to workers on commit"""
+        job = BackgroundJob(
+            job_type=job_type,
+            payload=json.dumps(payload),
+            status='pending',
+            max_attempts=max_attempts or self.max_attempts,
+            run_after=datetime.now()
+        )
+        db.add(job)
+        self._wake_event.set()
+        return job
+
+    # -----------------------------
+    # Workers
+    # -----------------------------
+    def start(self):
+        if any(thread.is_alive() for thread in self._threads):
+            return
+        self._stop_event.clear()
+        self._threads = [
+            threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stop_event.set()
+        self._wake_event.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def _worker_loop(self):
+        while not self._stop_event.is_set():
+            # Cleared before looking, so an enqueue during the run wakes the next wait
+            self._wake_event.clear()
+            try:
+                if self.run_next():
+                    continue
+            except Exception as e:
+                logger.exception("job_queue_error error=%s", e)
+            self._wake_event.wait(self.poll_interval)
+
+    def _requeue_stale(self, db: Session):
+        stale_before = datetime.now() - timedelta(seconds=self.lock_timeout)
+        requeued = db.query(BackgroundJob).filter(
+            BackgroundJob.status == 'running',
+            BackgroundJob.locked_at < stale_before
+        ).update({BackgroundJob.status: 'pending', BackgroundJob.locked_at: None}, synchronize_session=False)
+        if requeued:
+            db.commit()
+            logger.warning("jobs_requeued count=%d", requeued)
+
+    def _claim(self, db: Session) -> Optional[BackgroundJob]:
+        now = datetime.now()
+        candidates = db.query(BackgroundJob.id).filter(
+            BackgroundJob.status == 'pending',
+            BackgroundJob.run_after <= now,
+            BackgroundJob.job_type.in_(list(self._handlers))
+        ).order_by(BackgroundJob.run_after, BackgroundJob.id).limit(self.workers).all()
+
+        for (job_id,) in candidates:
+            claimed = db.query(BackgroundJob).filter(
+                BackgroundJob.id == job_id,
+                BackgroundJob.status == 'pending'
+            ).update({
+                BackgroundJob.status: 'running',
+                BackgroundJob.locked_at: now,
+                BackgroundJob.attempts: BackgroundJob.attempts + 1
+            }, synchronize_session=False)
+            db.commit()
+            if claimed:
+                return db.get(BackgroundJob, job_id)
+        return None
+
+    def run_next(self) -> bool:
+        """Claim and run one due job. Returns False if there was nothing to do."""
+        with self.session_factory() as db:
+            self._requeue_stale(db)
+            job = self._claim(db)
+            if job is None:
+                return False
+
+            handler = self._handlers[job.job_type]
+            try:
+                handler(db, json.loads(job.payload))
+                # The handler's writes and the status change commit together
+                job.status = 'succeeded'
+                job.last_error = None
+                job.locked_at = None
+                db.commit()
+                logger.info("job_succeeded id=%s type=%s attempts=%d", job.id, job.job_type, job.attempts)
+            except Exception as e:
+                db.rollback()
+                job.last_error = f"{type(e).__name__}: {e}"
+                job.locked_at = None
+                if job.attempts >= job.max_attempts:
+                    job.status = 'failed'
+                    logger.error("job_failed id=%s type=%s attempts=%d error=%s", job.id, job.job_type, job.attempts, job.last_error)
+                else:
+                    job.status = 'pending'
+                    job.run_after = datetime.now() + timedelta(seconds=self.retry_base_seconds * 2 ** (job.attempts - 1))
+                    logger.warning("job_retry id=%s type=%s attempts=%d run_after=%s error=%s", job.id, job.job_type, job.attempts, job.run_after.isoformat(), job.last_error)
+                db.commit()
+            return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.session_factory() as db:
+            counts = dict(
+                db.query(BackgroundJob.status, func.count(BackgroundJob.id)).group_by(BackgroundJob.status).all()
+            )
+        return {
+            "workers": self.workers,
+            "running_threads": sum(thread.is_alive() for thread in self._threads),
+            "registered_job_types": sorted(self._handlers),
+            "jobs": {status: counts.get(status, 0) for status in ('pending', 'running', 'succeeded', 'failed')}
+        }
+
+
+job_queue = JobQueue(
+    workers=int(os.getenv("JOB_WORKERS", "2")),
+    poll_interval=float(os.getenv("JOB_POLL_SECONDS", "2")),
+    lock_timeout=float(os.getenv("JOB_LOCK_TIMEOUT_SECONDS", "600")),
+    retry_base_seconds=float(os.getenv("JOB_RETRY_BASE_SECONDS", "30")),
+    max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+)
@@ -0,0 +1,269 @@
+# backend/app/services/reminder_scheduler.py
+import logging
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.email_service import email_service
+from app.models import (
+    AcademicYear, DeadlineOverride, DeadlineReminderLog, Department, ModuleDeadline, User, WorkflowStatus
+)
+
+logger = logging.getLogger(__name__)
+
+# Days before the deadline at which reminders go out
+REMINDER_OFFSET_DAYS = sorted(
+    {int(days) for days in os.getenv("REMINDER_OFFSET_DAYS", "7,3,1").split(",") if days.strip()},
+    reverse=True
+)
+REMINDER_SCHEDULER_INTERVAL_SECONDS = float(os.getenv("REMINDER_SCHEDULER_INTERVAL_SECONDS", "3600"))
+
+# Workflow status a department must have reached to be done with each module
+MODULE_REQUIRED_STATUS = {
+    "program_entry": "submitted",
+}
+MODULE_DISPLAY_NAMES = {
+    "program_entry": "Budget Proposal Submission",
+}
+WORKFLOW_STATUS_ORDER = ['draft', 'submitted', 'approved', 'events_submitted', 'events_planned', 'completed']
+
+
+def module_display_name(module: str) -> str:
+    return MODULE_DISPLAY_NAMES.get(module, module.replace("_", " ").title())
+
+
+def has_reached(status: Optional[str], required: str) -> bool:
+    order = {name: rank for rank, name in enumerate(WORKFLOW_STATUS_ORDER)}
+    return order.get(status or 'draft', 0) >= order[required]
+
+
+def effective_deadline(deadline: datetime, override_expires_at: Optional[datetime] = None) -> datetime:
+    """Module deadline, pushed back by an active principal override for the department"""
+    if override_expires_at and override_expires_at > deadline:
+        return override_expires_at
+    return deadline
+
+
+def days_remaining(deadline: datetime, now: Optional[datetime] = None) -> int:
+    """Calendar days until the deadline (0 on the day itself and after it)"""
+    now = now or datetime.now()
+    return max(0, (deadline.date() - now.date()).days)
+
+
+def format_deadline(deadline: datetime) -> str:
+    return deadline.strftime("%Y-%m-%d %H:%M")
+
+
+def due_offset(days_left: int, offsets: List[int] = REMINDER_OFFSET_DAYS) -> Optional[int]:
+    """The tightest reminder offset that has been reached, e.g. 3 when 2-3 days are left"""
+    reached = [offset for offset in offsets if days_left <= offset]
+    return min(reached) if reached else None
+
+
+def queue_deadline_reminders(db, reminders: List[Dict[str, Any]]) -> Dict[int, list]:
+    """
+    Queue reminder emails for due reminders (dicts with department_name, module,
+    academic_year, deadline, days_remaining and recipients as (email, name)
+    pairs), rendering each group that shares a deadline in one batch. Works with
+    sync and async sessions; the caller commits. Returns the queued messages per
+    reminder index.
+    """
+    groups = defaultdict(list)
+    for index, reminder in enumerate(reminders):
+        key = (reminder["module"], reminder["academic_year"], reminder["deadline"], reminder["days_remaining"])
+        for email, name in reminder["recipients"]:
+            groups[key].append((index, {"user_email": email, "user_name": name, "department_name": reminder["department_name"]}))
+
+    messages = defaultdict(list)
+    for (module, academic_year, deadline, days_left), recipients in groups.items():
+        queued = email_service.send_deadline_reminders(
+            db,
+            recipients=[recipient for _, recipient in recipients],
+            academic_year=academic_year,
+            deadline_date=format_deadline(deadline),
+            days_remaining=days_left,
+            module_name=module_display_name(module)
+        )
+        for (index, _), message in zip(recipients, queued):
+            messages[index].append(message)
+    return messages
+
+
+def find_due_reminders(db: Session, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Departments that have not reached the required workflow status for a module
+    whose (effective) deadline has come within one of the reminder offsets, and
+    have not been reminded at that offset yet. Everything is loaded up front in a
+    handful of queries, whatever the number of departments.
+    """
+    now = now or datetime.now()
+    deadlines = db.query(ModuleDeadline, AcademicYear.year).join(
+        AcademicYear, AcademicYear.id == ModuleDeadline.academic_year_id
+    ).filter(
+        AcademicYear.is_enabled == True,
+        ModuleDeadline.module.in_(list(MODULE_REQUIRED_STATUS)),
+        ModuleDeadline.deadline.isnot(None)
+    ).all()
+    if not deadlines:
+        return []
+    year_ids = {module_deadline.academic_year_id for module_deadline, _ in deadlines}
+
+    overrides = {
+        (o.department_id, o.academic_year_id, o.module_name): o.expires_at
+        for o in db.query(DeadlineOverride).filter(
+            DeadlineOverride.academic_year_id.in_(year_ids),
+            DeadlineOverride.enabled_by_principal == True,
+            DeadlineOverride.expires_at > now
+        )
+    }
+    statuses = {
+        (department_id, academic_year_id): status
+        for department_id, academic_year_id, status in db.query(
+            WorkflowStatus.department_id, WorkflowStatus.academic_year_id, WorkflowStatus.status
+        ).filter(WorkflowStatus.academic_year_id.in_(year_ids))
+    }
+    hods = defaultdict(list)
+    for user in db.query(User).filter(User.role == 'hod', User.department_id.isnot(None)).order_by(User.id):
+        hods[user.department_id].append((user.email, user.name))
+    already_sent = set(
+        db.query(
+            DeadlineReminderLog.department_id, DeadlineReminderLog.academic_year_id, DeadlineReminderLog.module,
+            DeadlineReminderLog.deadline, DeadlineReminderLog.offset_days
+        ).filter(DeadlineReminderLog.academic_year_id.in_(year_ids), DeadlineReminderLog.deadline > now)
+    )
+    departments = db.query(Department).order_by(Department.id).all()
+
+    due = []
+    for module_deadline, academic_year in deadlines:
+        required = MODULE_REQUIRED_STATUS[module_deadline.module]
+        for department in departments:
+            if has_reached(statuses.get((department.id, module_deadline.academic_year_id)), required):
+                continue
+            deadline = effective_deadline(
+                module_deadline.deadline,
+                overrides.get((department.id, module_deadline.academic_year_id, module_deadline.module))
+            )
+            if deadline <= now:
+                continue
+            days_left = days_remaining(deadline, now)
+            offset = due_offset(days_left)
+            if offset is None or not hods[department.id]:
+                continue
+            if (department.id, module_deadline.academic_year_id, module_deadline.module, deadline, offset) in already_sent:
+                continue
+            due.append({
+                "department_id": department.id,
+                "department_name": department.name,
+                "academic_year_id": module_deadline.academic_year_id,
+                "academic_year": academic_year,
+                "module": module_deadline.module,
+                "deadline": deadline,
+                "days_remaining": days_left,
+                "offset_days": offset,
+                "recipients": hods[department.id]
+            })
+    return due
+
+
+def run_reminder_pass(db: Session, now: Optional[datetime] = None, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    One scheduler tick: queue every due reminder and record it in
+    deadline_reminder_log in a single commit. The log's unique key makes the pass
+    idempotent; if another process recorded the same reminders first, the commit
+    fails and nothing is queued twice.
+    """
+    now = now or datetime.now()
+    due = find_due_reminders(db, now)
+    summary = {
+        "checked_at": now,
+        "dry_run": dry_run,
+        "queued": 0,
+        "reminders": [
+            {
+                **{key: value for key, value in reminder.items() if key != "recipients"},
+                "recipients": [email for email, _ in reminder["recipients"]]
+            }
+            for reminder in due
+        ]
+    }
+    if dry_run or not due:
+        return summary
+
+    messages = queue_deadline_reminders(db, due)
+    try:
+        # Assigns the email ids the log rows point at
+        db.flush()
+        for index, reminder in enumerate(due):
+            db.add(DeadlineReminderLog(
+                department_id=reminder["department_id"],
+                academic_year_id=reminder["academic_year_id"],
+                module=reminder["module"],
+                deadline=reminder["deadline"],
+                offset_days=reminder["offset_days"],
+                email_id=messages[index][0].id
+            ))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        logger.warning("deadline_reminders_skipped reason=already_recorded count=%d", len(due))
+        return {**summary, "reminders": []}
+
+    summary["queued"] = sum(len(queued) for queued in messages.values())
+    logger.info("deadline_reminders_queued reminders=%d emails=%d", len(due), summary["queued"])
+    return summary
+
+
+class ReminderScheduler:
+    """Background thread that runs run_reminder_pass every `interval` seconds"""
+
+    def __init__(self, session_factory=SessionLocal, interval: float = 3600):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.last_run: Optional[Dict[str, Any]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="reminder-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def run_once(self, dry_run: bool = False) -> Dict[str, Any]:
+        with self.session_factory() as db:
+            summary = run_reminder_pass(db, dry_run=dry_run)
+        if not dry_run:
+            self.last_run = {"checked_at": summary["checked_at"], "queued": summary["queued"]}
+        return summary
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.exception("reminder_scheduler_error error=%s", e)
+            self._stop_event.wait(self.interval)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "interval_seconds": self.interval,
+            "offset_days": REMINDER_OFFSET_DAYS,
+            "last_run": self.last_run
+        }
+
+
+reminder_scheduler = ReminderScheduler(interval=REMINDER_SCHEDULER_INTERVAL_SECONDS)
@@ -0,0 +1,143 @@
+# backend/app/services/upload_sessions.py
+import json
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Dict
+
+import aiofiles
+from fastapi import HTTPException
+
+UPLOAD_SESSION_DIRECTORY = Path(os.getenv("UPLOAD_SESSION_DIRECTORY", "uploads/sessions"))
+UPLOAD_SESSION_MAX_SIZE = int(os.getenv("UPLOAD_SESSION_MAX_SIZE", 500 * 1024 * 1024))  # 500MB
+UPLOAD_SESSION_CHUNK_SIZE = int(os.getenv("UPLOAD_SESSION_CHUNK_SIZE", 5 * 1024 * 1024))  # suggested to clients
+UPLOAD_SESSION_TTL_SECONDS = int(os.getenv("UPLOAD_SESSION_TTL_SECONDS", 24 * 3600))
+# A chunk lock older than this belongs to a request that died mid-write
+UPLOAD_SESSION_LOCK_TIMEOUT = int(os.getenv("UPLOAD_SESSION_LOCK_TIMEOUT", "300"))
+
+
+class UploadSessionStore:
+    """
+    Resumable uploads kept on disk, one directory per session:
+
+        <session_id>/meta.json   who/what/how big
+        <session_id>/data        bytes received so far
+
+    The committed offset is simply the size of `data`, so state survives restarts
+    and is shared by all workers. Bytes from a chunk cut off mid-transfer are kept,
+    and the client resumes from whatever offset the status call reports.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _dir(self, session_id: str) -> Path:
+        # Session ids are uuid4 hex; refuse anything else so ids can't escape the root
+        try:
+            if uuid.UUID(hex=session_id).hex != session_id:
+                raise ValueError
+        except ValueError:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        return self.root / session_id
+
+    def create(self, **meta) -> Dict:
+        self.purge_expired()
+        session_id = uuid.uuid4().hex
+        session_dir = self.root / session_id
+        session_dir.mkdir(parents=True)
+        meta = {**meta, "session_id": session_id, "created_at": datetime.now().isoformat()}
+        (session_dir / "meta.json").write_text(json.dumps(meta))
+        (session_dir / "data").touch()
+        return self.status(session_id)
+
+    def get_meta(self, session_id: str) -> Dict:
+        meta_path = self._dir(session_id) / "meta.json"
+        try:
+            return json.loads(meta_path.read_text())
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+
+    def status(self, session_id: str) -> Dict:
+        meta = self.get_meta(session_id)
+        offset = (self._dir(session_id) / "data").stat().st_size
+        return {
+            **meta,
+            "offset": offset,
+            "complete": offset == meta["total_size"],
+            "chunk_size": UPLOAD_SESSION_CHUNK_SIZE
+        }
+
+    def data_path(self, session_id: str) -> Path:
+        return self._dir(session_id) / "data"
+
+    def _acquire_lock(self, session_id: str) -> Path:
+        lock_path = self._dir(session_id) / "lock"
+        try:
+            if time.time() - lock_path.stat().st_mtime > UPLOAD_SESSION_LOCK_TIMEOUT:
+                lock_path.unlink(missing_ok=True)
+        except FileNotFoundError:
+            pass
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            raise HTTPException(status_code=409, detail="Another request for this upload is still in progress")
+        return lock_path
+
+    @contextmanager
+    def locked(self, session_id: str):
+        """Hold the session lock (409 if a chunk write or finalize is already running)"""
+        lock_path = self._acquire_lock(session_id)
+        try:
+            yield
+        finally:
+            lock_path.unlink(missing_ok=True)
+
+    async def write_chunk(self, session_id: str, offset: int, chunks: AsyncIterator[bytes]) -> Dict:
+        """Append a chunk that starts at `offset`; only the current end of the data is accepted"""
+        meta = self.get_meta(session_id)
+        with self.locked(session_id):
+            data_path = self.data_path(session_id)
+            current = data_path.stat().st_size
+            if offset != current:
+                raise HTTPException(
+                    status_code=409,
+                    detail={"message": "Chunk offset does not match the uploaded size", "offset": current}
+                )
+
+            async with aiofiles.open(data_path, "ab") as out:
+                written = current
+                async for chunk in chunks:
+                    if written + len(chunk) > meta["total_size"]:
+                        # Drop the whole chunk rather than keep bytes past the declared size
+                        await out.truncate(current)
+                        raise HTTPException(status_code=413, detail="Chunk extends past the declared file size")
+                    await out.write(chunk)
+                    written += len(chunk)
+
+        return self.status(session_id)
+
+    def discard(self, session_id: str):
+        shutil.rmtree(self._dir(session_id), ignore_errors=True)
+
+    def purge_expired(self) -> int:
+        """Remove sessions that were never finalized within UPLOAD_SESSION_TTL_SECONDS"""
+        if not self.root.exists():
+            return 0
+        cutoff = time.time() - UPLOAD_SESSION_TTL_SECONDS
+        purged = 0
+        for session_dir in self.root.iterdir():
+            try:
+                last_activity = max(p.stat().st_mtime for p in session_dir.iterdir())
+            except (ValueError, OSError):
+                last_activity = 0
+            if last_activity < cutoff:
+                shutil.rmtree(session_dir, ignore_errors=True)
+                purged += 1
+        return purged
+
+
+upload_sessions = UploadSessionStore(UPLOAD_SESSION_DIRECTORY)
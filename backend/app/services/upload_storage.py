@@ -0,0 +1,142 @@
+# backend/app/services/upload_storage.py
+import json
+import os
+import re
+import uuid
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, UploadFile
+
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))  # 1MB
+# Allowance for multipart boundaries, headers and the small form fields sent with a file
+UPLOAD_MULTIPART_OVERHEAD = int(os.getenv("UPLOAD_MULTIPART_OVERHEAD", 64 * 1024))
+
+
+class UploadTooLarge(HTTPException):
+    def __init__(self, max_size: int):
+        super().__init__(
+            status_code=413,
+            detail=f"File size too large. Maximum allowed size is {max_size / (1024*1024):.0f}MB"
+        )
+
+
+async def stream_upload_to_path(
+    upload: UploadFile,
+    destination: Union[str, Path],
+    max_size: Optional[int],
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+    hasher=None
+) -> int:
+    """
+    Copy an upload to `destination` chunk by chunk and return its size in bytes.
+
+    The data goes to a temp file next to the destination and is renamed into place
+    only once complete, so readers never see a partial file. The size cap is checked
+    as each chunk arrives and the temp file is removed as soon as it is exceeded.
+    Memory use is bounded by `chunk_size` regardless of the file size.
+    Pass a hashlib object as `hasher` to digest the content in the same pass.
+    """
+    destination = Path(destination)
+    await aiofiles.os.makedirs(destination.parent, exist_ok=True)
+    temp_path = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.part")
+
+    size = 0
+    try:
+        async with aiofiles.open(temp_path, "wb") as out:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise UploadTooLarge(max_size)
+                if hasher is not None:
+                    hasher.update(chunk)
+                await out.write(chunk)
+        await aiofiles.os.replace(temp_path, destination)
+    except BaseException:
+        try:
+            await aiofiles.os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    return size
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects oversized upload requests before the multipart body is parsed.
+
+    By the time an endpoint runs, Starlette has already spooled every file in the
+    form to disk, so a size check in the handler only fires after the whole
+    upload was received. For paths matching one of `limits` (regex -> max file
+    bytes), this middleware answers 413 straight away when Content-Length is too
+    big, and otherwise counts body bytes as they are received and aborts the
+    request as soon as they pass the limit (plus UPLOAD_MULTIPART_OVERHEAD).
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = [(re.compile(pattern), max_size) for pattern, max_size in limits.items()]
+
+    def _limit_for(self, path: str) -> Optional[int]:
+        for pattern, max_size in self.limits:
+            if pattern.fullmatch(path):
+                return max_size
+        return None
+
+    async def __call__(self, scope, receive, send):
+        max_size = self._limit_for(scope["path"]) if scope["type"] == "http" else None
+        if max_size is None:
+            await self.app(scope, receive, send)
+            return
+
+        max_body = max_size + UPLOAD_MULTIPART_OVERHEAD
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > max_body:
+            await self._reject(send, UploadTooLarge(max_size))
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body:
+                    # FastAPI re-raises HTTPExceptions from body parsing, so this becomes the 413 response
+                    raise UploadTooLarge(max_size)
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except UploadTooLarge as e:
+            if response_started:
+                raise
+            await self._reject(send, e)
+
+    @staticmethod
+    async def _reject(send, error: HTTPException):
+        body = json.dumps({"detail": error.detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": error.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
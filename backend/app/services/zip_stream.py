@@ -0,0 +1,90 @@
+# backend/app/services/zip_stream.py
+import io
+import os
+import time
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+from app.services.upload_storage import UPLOAD_CHUNK_SIZE
+
+# Range of timestamps a ZIP member header can hold (DOS date/time)
+ZIP_MIN_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+ZIP_MAX_DATE_TIME = (2107, 12, 31, 23, 59, 58)
+
+
+@dataclass
+class ZipEntry:
+    arcname: str
+    path: Optional[str] = None     # file on disk, copied in chunks
+    data: Optional[bytes] = None   # small in-memory content (e.g. a manifest)
+    # Member timestamp; pass the document's upload time, since blobs are shared
+    # and touched on dedup. Falls back to the file mtime, or now for data.
+    modified: Optional[datetime] = None
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Write-only, non-seekable sink that zipfile writes into and we drain as we go"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        self._position += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def zip_date_time(timestamp: float) -> tuple:
+    """Local date_time for a ZipInfo, clamped to what the format can store"""
+    return min(max(time.localtime(timestamp)[:6], ZIP_MIN_DATE_TIME), ZIP_MAX_DATE_TIME)
+
+
+def stream_zip(entries: Iterable[ZipEntry], chunk_size: int = UPLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Generate a ZIP archive chunk by chunk without staging it on disk or in memory.
+
+    Because the sink cannot seek, zipfile writes sizes and CRCs in data descriptors
+    after each member, so bytes can be sent as soon as they are produced. Files are
+    stored uncompressed (evidence is mostly PDF/JPEG/ZIP already); in-memory
+    entries are deflated. Memory use stays around one `chunk_size`.
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, mode="w", allowZip64=True) as archive:
+        for entry in entries:
+            if entry.path is not None:
+                stat_result = os.stat(entry.path)
+                modified = entry.modified.timestamp() if entry.modified is not None else stat_result.st_mtime
+                info = zipfile.ZipInfo(entry.arcname, zip_date_time(modified))
+                info.compress_type = zipfile.ZIP_STORED
+                # Lets zipfile pick Zip64 headers up front for members over 4GB
+                info.file_size = stat_result.st_size
+                with open(entry.path, "rb") as source, archive.open(info, "w") as member:
+                    for chunk in iter(lambda: source.read(chunk_size), b""):
+                        member.write(chunk)
+                        data = buffer.drain()
+                        if data:
+                            yield data
+            else:
+                modified = entry.modified.timestamp() if entry.modified is not None else time.time()
+                info = zipfile.ZipInfo(entry.arcname, zip_date_time(modified))
+                info.compress_type = zipfile.ZIP_DEFLATED
+                archive.writestr(info, entry.data or b"")
+            data = buffer.drain()
+            if data:
+                yield data
+    # Central directory
+    yield buffer.drain()
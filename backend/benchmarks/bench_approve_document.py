@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Latency and round trips of approve_document as a department's event count grows.
+The previous completion check loaded every event of the academic year and queried
+its documents one event at a time (1 + N statements); the current one counts the
+incomplete events in a single aggregate statement.
+
+Every event already has both required documents approved, so each approval walks
+the whole year (the old loop's worst case). The "before" check is kept here as a
+reference.
+
+    python benchmarks/bench_approve_document.py [--events 250,500,1000,2000]
+"""
+
+import argparse
+from datetime import datetime
+
+from bench_common import count_statements, measure, report, reset_schema, seed_activity, use_scratch_database
+
+
+def legacy_approve_document(db, document_id, approved_by):
+    """The previous per-event completion check"""
+    from app.models import Document, Event, WorkflowStatus
+    document = db.query(Document).filter(Document.id == document_id).first()
+    document.status = 'approved'
+    document.approved_by = approved_by
+    document.approved_at = datetime.now()
+    document.rejection_reason = None
+    document.updated_at = datetime.now()
+
+    event = db.query(Event).filter(Event.id == document.event_id).first()
+    all_academic_year_events = db.query(Event).filter(Event.academic_year_id == event.academic_year_id).all()
+    all_events_completed = True
+    for year_event in all_academic_year_events:
+        event_docs = db.query(Document).filter(
+            Document.event_id == year_event.id,
+            Document.status != 'deleted',
+            Document.is_latest_version == True
+        ).all()
+        for doc_type in ['complete_report', 'supporting_documents']:
+            if not any(doc.status == 'approved' for doc in event_docs if doc.document_type == doc_type):
+                all_events_completed = False
+                break
+        if not all_events_completed:
+            break
+
+    if all_events_completed:
+        for year_event in all_academic_year_events:
+            if year_event.event_status != 'completed':
+                year_event.event_status = 'completed'
+        workflow_status = db.query(WorkflowStatus).filter(
+            WorkflowStatus.department_id == event.department_id,
+            WorkflowStatus.academic_year_id == event.academic_year_id
+        ).first()
+        if workflow_status and workflow_status.status != 'completed':
+            workflow_status.status = 'completed'
+            workflow_status.updated_at = datetime.now()
+
+    db.commit()
+    db.refresh(document)
+    return document
+
+
+def seed_approved_documents(db):
+    """Both required document types, approved, for every event; returns one document of department 1"""
+    from app.models import Document, Event
+    events = db.query(Event.id, Event.department_id).all()
+    db.bulk_insert_mappings(Document, [
+        {
+            "filename": f"{event_id}-{document_type}.pdf", "original_filename": f"{document_type}.pdf",
+            "file_path": f"/tmp/{event_id}-{document_type}.pdf", "file_size": 1024, "mime_type": "application/pdf",
+            "document_type": document_type, "title": document_type, "department_id": department_id,
+            "academic_year_id": 1, "event_id": event_id, "status": "approved", "uploaded_by": 100 + department_id,
+            "uploaded_at": datetime.now(), "is_latest_version": True
+        }
+        for event_id, department_id in events
+        for document_type in ("complete_report", "supporting_documents")
+    ])
+    db.commit()
+    return db.query(Document.id).filter(Document.department_id == 1).order_by(Document.id).first().id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", default="250,500,1000,2000", help="comma-separated event counts")
+    parser.add_argument("--departments", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    use_scratch_database()
+    from app.database import SessionLocal, engine
+    from app.services.document_service import approve_document
+
+    for events in (int(value) for value in args.events.split(",")):
+        reset_schema()
+        with SessionLocal() as db:
+            seed_activity(db, events, program_counts=0, departments=args.departments)
+            document_id = seed_approved_documents(db)
+        print(f"\n{events} events, {args.departments} departments")
+
+        def before():
+            with SessionLocal() as db:
+                legacy_approve_document(db, document_id, approved_by=1)
+
+        def after():
+            with SessionLocal() as db:
+                approve_document(db, document_id, approved_by=1)
+
+        # First run flips the events to 'completed'; later runs repeat the full check only
+        for label, approve in (("before (per-event queries)", before), ("after (one aggregate)", after)):
+            approve()
+            with count_statements(engine) as statements:
+                approve()
+            report(label, measure(approve, args.repeat), round_trips=len(statements))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
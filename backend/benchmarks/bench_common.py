@@ -0,0 +1,119 @@
+# backend/benchmarks/bench_common.py
+"""
+Shared setup for the benchmark scripts in this directory.
+
+Benchmarks seed their own data, so they always run against a scratch database:
+a temporary SQLite file, or BENCH_DATABASE_URL (e.g. a throwaway PostgreSQL
+database) when set. Call use_scratch_database() before importing anything from
+`app`, since the engines are built from the environment at import time.
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def use_scratch_database() -> str:
+    """Point the app at a scratch database and disable its background workers"""
+    scratch_dir = tempfile.mkdtemp(prefix="portal-bench-")
+    database_url = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{scratch_dir}/bench.db")
+    os.environ.update({
+        "DATABASE_URL": database_url,
+        "ENABLE_DEV_TOKENS": "true",
+        "JOB_QUEUE_ENABLED": "false",
+        "EMAIL_OUTBOX_ENABLED": "false",
+        "REMINDER_SCHEDULER_ENABLED": "false",
+        "UPLOAD_DIRECTORY": f"{scratch_dir}/uploads",
+        "BLOB_STORAGE_DIRECTORY": f"{scratch_dir}/blobs",
+        "UPLOAD_SESSION_DIRECTORY": f"{scratch_dir}/sessions",
+        "THUMBNAIL_DIRECTORY": f"{scratch_dir}/thumbnails",
+    })
+    return database_url
+
+
+def reset_schema():
+    """Drop and recreate every table on the scratch database"""
+    from app.database import engine
+    from app.models import Base
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def seed_reference_data(db, departments: int = 10):
+    """One enabled academic year, `departments` departments with an HoD each, an admin and a program type"""
+    from app.models import AcademicYear, Department, ProgramType, User
+    db.add(AcademicYear(id=1, year="2025-26", is_enabled=True))
+    db.add(ProgramType(id=1, program_type="Workshop", activity_category="A", departments="ALL", budget_mode="Variable"))
+    db.add(User(id=1, name="Admin", email="admin@example.com", role="admin"))
+    db.add(User(id=2, name="Principal", email="principal@example.com", role="principal"))
+    for i in range(1, departments + 1):
+        db.add(Department(id=i, name=f"D{i}", full_name=f"Department {i}"))
+        db.add(User(id=100 + i, name=f"HoD {i}", email=f"hod{i}@example.com", role="hod", department_id=i))
+    db.commit()
+
+
+def seed_activity(db, events: int, program_counts: int, departments: int = 10, seed: int = 6):
+    """Reference data plus program counts, events and a workflow status spread randomly over the departments"""
+    from app.models import Event, ProgramCount, WorkflowStatus
+    rng = random.Random(seed)
+    seed_reference_data(db, departments)
+    db.bulk_insert_mappings(ProgramCount, [
+        {
+            "department_id": rng.randint(1, departments), "academic_year_id": 1, "program_type": f"P{i % 40}",
+            "activity_category": "A", "budget_mode": "Variable", "count": rng.randint(1, 5), "total_budget": rng.randint(1, 50) * 1000
+        }
+        for i in range(program_counts)
+    ])
+    db.bulk_insert_mappings(Event, [
+        {
+            "title": f"Event {i}", "event_date": datetime(2025, 7, 1) + timedelta(days=rng.randint(0, 300)),
+            "budget_amount": rng.randint(1, 20) * 100, "department_id": rng.randint(1, departments), "academic_year_id": 1,
+            "program_type_id": 1, "event_status": rng.choice(["planned", "ongoing", "completed"]), "created_at": datetime.now()
+        }
+        for i in range(events)
+    ])
+    db.bulk_insert_mappings(WorkflowStatus, [
+        {"department_id": i, "academic_year_id": 1, "status": rng.choice(["draft", "submitted", "approved"])}
+        for i in range(1, departments + 1)
+    ])
+    db.commit()
+
+
+@contextmanager
+def count_statements(*engines):
+    """Collect the SQL statements executed on the given (sync) engines"""
+    from sqlalchemy import event
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def measure(fn, repeat: int = 5) -> dict:
+    """Run fn `repeat` times; best and median wall time in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"best_ms": min(timings), "median_ms": statistics.median(timings)}
+
+
+def report(label: str, result: dict, **extra):
+    columns = " ".join(f"{key}={value}" for key, value in extra.items())
+    print(f"{label:<32} best={result['best_ms']:9.2f}ms median={result['median_ms']:9.2f}ms {columns}")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Round trips and latency of /analytics/dashboard-overview, before and after it
+was rebuilt as conditional aggregates, at 10k events and 100k program-count rows.
+
+The "before" numbers come from the previous implementation (load every
+ProgramCount row, then one count() per status), kept here as a reference.
+
+    python benchmarks/bench_dashboard_overview.py [--events 10000] [--program-counts 100000]
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+
+from bench_common import count_statements, measure, report, reset_schema, seed_activity, use_scratch_database
+
+
+def legacy_dashboard_overview(db, dept_filter=None):
+    """The overview as it was computed before: ProgramCount rows in Python plus nine count() queries"""
+    from app.models import AcademicYear, Event, Notification, ProgramCount, WorkflowStatus
+
+    academic_year_id = db.query(AcademicYear).filter(AcademicYear.is_enabled == True).first().id
+
+    budget_query = db.query(ProgramCount).filter(ProgramCount.academic_year_id == academic_year_id)
+    if dept_filter:
+        budget_query = budget_query.filter(ProgramCount.department_id.in_(dept_filter))
+    budget_data = budget_query.all()
+    total_budget = sum(item.total_budget for item in budget_data)
+    total_programs = sum(item.count for item in budget_data)
+
+    events_query = db.query(Event).filter(Event.academic_year_id == academic_year_id)
+    status_query = db.query(WorkflowStatus).filter(WorkflowStatus.academic_year_id == academic_year_id)
+    if dept_filter:
+        events_query = events_query.filter(Event.department_id.in_(dept_filter))
+        status_query = status_query.filter(WorkflowStatus.department_id.in_(dept_filter))
+    counts = {
+        "total_events": events_query.count(),
+        **{f"{status}_events": events_query.filter(Event.event_status == status).count() for status in ("completed", "ongoing", "planned")},
+        **{status: status_query.filter(WorkflowStatus.status == status).count() for status in ("draft", "submitted", "approved", "completed")},
+        "notifications_last_week": db.query(Notification).filter(Notification.created_at >= datetime.now() - timedelta(days=7)).count()
+    }
+    return total_budget, total_programs, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=10_000)
+    parser.add_argument("--program-counts", type=int, default=100_000)
+    parser.add_argument("--departments", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    use_scratch_database()
+    from app.api.endpoints.analytics import get_dashboard_overview
+    from app.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+    from app.services.analytics_cache import analytics_cache
+
+    reset_schema()
+    with SessionLocal() as db:
+        seed_activity(db, args.events, args.program_counts, args.departments)
+    print(f"{args.events} events, {args.program_counts} program counts, {args.departments} departments\n")
+
+    for scope, role, department_id in (("principal", "principal", None), ("hod", "hod", 1)):
+        def before():
+            with SessionLocal() as db:
+                legacy_dashboard_overview(db, [department_id] if department_id else None)
+
+        async def overview():
+            analytics_cache.clear()
+            async with AsyncSessionLocal() as db:
+                return await get_dashboard_overview(
+                    academic_year_id=None, db=db, current_user_role=role, current_user_dept_id=department_id
+                )
+
+        loop = asyncio.new_event_loop()
+        try:
+            with count_statements(engine) as before_statements:
+                before()
+            with count_statements(async_engine.sync_engine) as after_statements:
+                loop.run_until_complete(overview())
+            report(f"before ({scope})", measure(before, args.repeat), round_trips=len(before_statements))
+            report(f"after ({scope})", measure(lambda: loop.run_until_complete(overview()), args.repeat), round_trips=len(after_statements))
+            loop.run_until_complete(async_engine.dispose())
+        finally:
+            loop.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
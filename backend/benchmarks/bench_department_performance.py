@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Latency and result size of /analytics/department-performance before and after
+the fan-out fix. The previous query outer-joined program counts and events on
+department at once, so each department produced programs x events rows (and
+inflated sums); the current one joins one pre-aggregated row per department.
+
+The "before" query is kept here as a reference.
+
+    python benchmarks/bench_department_performance.py [--events 10000] [--program-counts 4000]
+"""
+
+import argparse
+import asyncio
+
+from bench_common import count_statements, measure, report, reset_schema, seed_activity, use_scratch_database
+
+
+def legacy_department_performance(db, academic_year_id):
+    """The previous fan-out query"""
+    from sqlalchemy import and_, case, func
+    from app.models import Department, Event, ProgramCount
+    return db.query(
+        Department.name,
+        func.coalesce(func.sum(ProgramCount.total_budget), 0).label('budget_allocated'),
+        func.coalesce(func.count(Event.id), 0).label('events_planned'),
+        func.coalesce(func.sum(case((Event.event_status == 'completed', Event.budget_amount), else_=0)), 0).label('budget_utilized'),
+        func.coalesce(func.count(case((Event.event_status == 'completed', 1), else_=None)), 0).label('events_completed')
+    ).outerjoin(ProgramCount, and_(
+        Department.id == ProgramCount.department_id, ProgramCount.academic_year_id == academic_year_id
+    )).outerjoin(Event, and_(
+        Department.id == Event.department_id, Event.academic_year_id == academic_year_id
+    )).group_by(Department.id, Department.name).all()
+
+
+def fan_out_rows(db, academic_year_id):
+    """Rows the old join materialized before grouping"""
+    from sqlalchemy import func
+    from app.models import Event, ProgramCount
+    programs = dict(db.query(ProgramCount.department_id, func.count()).filter(ProgramCount.academic_year_id == academic_year_id).group_by(ProgramCount.department_id))
+    events = dict(db.query(Event.department_id, func.count()).filter(Event.academic_year_id == academic_year_id).group_by(Event.department_id))
+    return sum(max(programs.get(d, 0), 1) * max(events.get(d, 0), 1) for d in set(programs) | set(events))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=10_000)
+    parser.add_argument("--program-counts", type=int, default=4_000)
+    parser.add_argument("--departments", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    use_scratch_database()
+    from app.api.endpoints.analytics import get_department_performance
+    from app.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+    from app.services.analytics_cache import analytics_cache
+    from app.services.analytics_rollup import rebuild_all_rollups
+
+    reset_schema()
+    with SessionLocal() as db:
+        seed_activity(db, args.events, args.program_counts, args.departments)
+        rebuild_all_rollups(db)
+        intermediate = fan_out_rows(db, 1)
+        before_rows = {row.name: row for row in legacy_department_performance(db, 1)}
+    print(f"{args.events} events, {args.program_counts} program counts, {args.departments} departments\n")
+
+    async def performance():
+        analytics_cache.clear()
+        async with AsyncSessionLocal() as db:
+            return await get_department_performance(academic_year_id=None, db=db, current_user_role="principal")
+
+    def before():
+        with SessionLocal() as db:
+            legacy_department_performance(db, 1)
+
+    loop = asyncio.new_event_loop()
+    try:
+        with count_statements(engine) as before_statements:
+            before()
+        with count_statements(async_engine.sync_engine) as after_statements:
+            after_rows = {row["department"]: row for row in loop.run_until_complete(performance())}
+        report("before (fan-out join)", measure(before, args.repeat), round_trips=len(before_statements), joined_rows=intermediate)
+        report("after (pre-aggregated)", measure(lambda: loop.run_until_complete(performance()), args.repeat), round_trips=len(after_statements), joined_rows=args.departments)
+        loop.run_until_complete(async_engine.dispose())
+    finally:
+        loop.close()
+
+    inflation = [
+        before_rows[name].budget_allocated / row["budget_allocated"]
+        for name, row in after_rows.items() if row["budget_allocated"]
+    ]
+    print(f"\nbudget_allocated inflation in the old result: {min(inflation):.0f}x - {max(inflation):.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
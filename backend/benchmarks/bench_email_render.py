@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Time to render deadline reminders for a batch of recipients: one full Jinja
+render per message (before) against render_batch, which renders the shared
+skeleton once and fills in the per-recipient values. "cold" clears the
+skeleton cache before each batch; "warm" reuses it, as repeated scheduler
+passes for the same deadline do.
+
+    python benchmarks/bench_email_render.py [--recipients 1000]
+"""
+
+import argparse
+
+from bench_common import measure, report, use_scratch_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--recipients", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    use_scratch_database()
+    from app.email_service import email_service
+
+    shared = {
+        "academic_year": "2025-26", "deadline_date": "31 Oct 2025", "days_remaining": 3,
+        "module_name": "Budget Submission", "portal_url": "http://localhost:3000", "year": "2025"
+    }
+    recipients = [{"user_name": f"HoD {i}", "department_name": f"Department {i}"} for i in range(args.recipients)]
+
+    def before():
+        return [email_service.render("deadline_reminder.html", {**shared, **data}) for data in recipients]
+
+    def cold():
+        email_service._cached_skeleton.cache_clear()
+        return email_service.render_batch("deadline_reminder.html", shared, recipients)
+
+    def warm():
+        return email_service.render_batch("deadline_reminder.html", shared, recipients)
+
+    expected = before()
+    assert cold() == expected and warm() == expected
+
+    print(f"{args.recipients} deadline reminders\n")
+    baseline = measure(before, args.repeat)
+    report("before (render per message)", baseline)
+    for label, run in (("render_batch (cold cache)", cold), ("render_batch (warm cache)", warm)):
+        result = measure(run, args.repeat)
+        report(label, result, speedup=f"{baseline['best_ms'] / result['best_ms']:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Messages per second delivering a batch of deadline reminders to a local SMTP
+server (aiosmtpd), before and after the connection pool. Previously every
+message opened its own smtplib connection (connect, EHLO, login, QUIT) in a
+worker thread; now the outbox sends over a few persistent aiosmtplib
+connections.
+
+A local server answers instantly and has no TLS or login, so this understates
+the gain against a real provider; --handshake-ms delays each EHLO to model the
+round trips of a remote server.
+
+    python benchmarks/bench_smtp_pool.py [--reminders 500] [--concurrency 4] [--handshake-ms 0]
+
+Requires aiosmtpd (requirements-dev.txt).
+"""
+
+import argparse
+import asyncio
+import json
+import smtplib
+import socket
+
+from aiosmtpd.controller import Controller
+
+from bench_common import measure, report, use_scratch_database
+
+
+class CountingHandler:
+    """Accepts every message; counts connections by their EHLO (one per connection)"""
+
+    def __init__(self, handshake_seconds: float):
+        self.handshake_seconds = handshake_seconds
+        self.messages = 0
+        self.connections = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.connections += 1
+        await asyncio.sleep(self.handshake_seconds)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return "250 OK"
+
+
+def legacy_send_smtp(hostname, port, msg, recipients):
+    """The previous transport: a new blocking connection per message"""
+    with smtplib.SMTP(hostname, port, timeout=30) as server:
+        server.send_message(msg, to_addrs=recipients)
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reminders", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4, help="outbox workers (and pool size)")
+    parser.add_argument("--handshake-ms", type=float, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    use_scratch_database()
+    from app.email_service import SMTPConnectionPool, email_service
+    from app.models import OutboxEmail
+
+    port = free_port()
+    handler = CountingHandler(args.handshake_ms / 1000)
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+
+    html_bodies = email_service.render_batch(
+        "deadline_reminder.html",
+        {"academic_year": "2025-26", "deadline_date": "2025-10-31", "days_remaining": 3,
+         "module_name": "Budget Submission", "portal_url": "http://localhost:3000", "year": "2025"},
+        [{"user_name": f"HoD {i}", "department_name": f"Department {i}"} for i in range(args.reminders)]
+    )
+    messages = [
+        OutboxEmail(to_emails=json.dumps([f"hod{i}@example.com"]), subject="Reminder: Budget Submission Deadline", html_body=body)
+        for i, body in enumerate(html_bodies)
+    ]
+
+    async def deliver_all(deliver):
+        limit = asyncio.Semaphore(args.concurrency)
+
+        async def worker(message):
+            async with limit:
+                await deliver(message)
+
+        await asyncio.gather(*(worker(message) for message in messages))
+
+    async def before():
+        async def deliver(message):
+            msg = await email_service.build_message(message)
+            await asyncio.to_thread(legacy_send_smtp, "127.0.0.1", port, msg, json.loads(message.to_emails))
+        await deliver_all(deliver)
+
+    async def after():
+        email_service.smtp_pool = SMTPConnectionPool("127.0.0.1", port, start_tls=False, size=args.concurrency)
+        try:
+            await deliver_all(email_service.deliver)
+        finally:
+            await email_service.close()
+
+    print(f"{args.reminders} reminders, concurrency {args.concurrency}, handshake {args.handshake_ms:g}ms\n")
+    try:
+        for label, run in (("before (connection per message)", before), ("after (pooled connections)", after)):
+            handler.messages = handler.connections = 0
+            asyncio.run(run())
+            connections = handler.connections
+            assert handler.messages == args.reminders
+            result = measure(lambda: asyncio.run(run()), args.repeat)
+            report(label, result, messages_per_second=f"{args.reminders / (result['best_ms'] / 1000):.0f}", connections=connections)
+    finally:
+        controller.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
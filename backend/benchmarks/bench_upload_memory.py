@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Peak memory (RSS) of the server process while receiving concurrent scorecard
+uploads, for the previous implementation (whole file read into memory before the
+size check) and the current streaming upload, plus how quickly an oversized
+upload is turned away.
+
+Each scenario runs in its own process so ru_maxrss reflects only that scenario.
+Uploads are sent through httpx's ASGI transport in chunks and without a
+Content-Length, so nothing is buffered on the client side.
+
+    python benchmarks/bench_upload_memory.py [--uploads 10] [--size-mb 100]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from bench_common import use_scratch_database
+
+CHUNK = 1024 * 1024
+BOUNDARY = "bench-upload-boundary"
+SCENARIOS = {
+    "before": "/bench/legacy-upload",
+    "after": "/api/scorecard/upload",
+    "after-oversized": "/api/scorecard/upload",
+}
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+
+async def multipart_body(index: int, size: int, sent: list):
+    fields = {"submission_id": "1", "question_id": str(index), "response_id": str(index)}
+    for name, value in fields.items():
+        yield f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+    yield f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="evidence-{index}.pdf"\r\nContent-Type: application/pdf\r\n\r\n'.encode()
+    chunk = bytes([index % 256]) * CHUNK
+    for start in range(0, size, CHUNK):
+        sent[index] += min(CHUNK, size - start)
+        yield chunk[:size - start]
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def add_legacy_route(app):
+    """The upload as it was before: read the whole file, check its size, write it synchronously"""
+    import uuid
+    from pathlib import Path
+    from fastapi import File, Form, HTTPException, UploadFile
+
+    @app.post("/bench/legacy-upload")
+    async def legacy_upload(submission_id: int = Form(...), question_id: int = Form(...), file: UploadFile = File(...)):
+        content = await file.read()
+        if len(content) > 100 * 1024 * 1024:
+            raise HTTPException(status_code=413, detail="File size too large")
+        upload_dir = Path(os.environ["UPLOAD_DIRECTORY"]) / "scorecard" / str(submission_id) / str(question_id)
+        upload_dir.mkdir(parents=True, exist_ok=True)
+        with open(upload_dir / f"{uuid.uuid4()}.pdf", "wb") as f:
+            f.write(content)
+        return {"size": len(content)}
+
+
+def seed_responses(count: int):
+    from bench_common import reset_schema, seed_reference_data
+    from app.database import SessionLocal
+    from app.models import ScoreCardQuestion, ScoreCardResponse, ScoreCardSubmission, ScoreCardTemplate
+    reset_schema()
+    with SessionLocal() as db:
+        seed_reference_data(db)
+        db.add(ScoreCardTemplate(id=1, name="IQAC", academic_year_id=1))
+        db.add(ScoreCardSubmission(id=1, template_id=1, department_id=1, submitted_by=101))
+        for i in range(1, count + 1):
+            db.add(ScoreCardQuestion(id=i, template_id=1, question_number=str(i), question_text=f"Area {i}"))
+            db.add(ScoreCardResponse(id=i, submission_id=1, question_id=i))
+        db.commit()
+
+
+def run_scenario(scenario: str, uploads: int, size: int) -> dict:
+    import httpx
+    from app.main import app
+    add_legacy_route(app)
+    seed_responses(uploads)
+    baseline = peak_rss_mb()
+    sent = [0] * (uploads + 1)
+
+    async def upload_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            return await asyncio.gather(*(
+                client.post(
+                    SCENARIOS[scenario],
+                    content=multipart_body(i, size, sent),
+                    headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}", "Authorization": "Bearer hod-civ-token"}
+                )
+                for i in range(1, uploads + 1)
+            ))
+
+    started = time.perf_counter()
+    responses = asyncio.run(upload_all())
+    return {
+        "elapsed_s": time.perf_counter() - started,
+        "baseline_rss_mb": baseline,
+        "peak_rss_mb": peak_rss_mb(),
+        "statuses": sorted({response.status_code for response in responses}),
+        "mb_read_per_upload": max(sent) / CHUNK,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=10)
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--scenario", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        use_scratch_database()
+        # The oversized scenario sends 20MB more than the scorecard limit
+        os.environ["SCORECARD_MAX_FILE_SIZE"] = str(args.size_mb * CHUNK)
+        size = args.size_mb * CHUNK
+        if args.scenario == "after-oversized":
+            size += 20 * CHUNK
+        print(json.dumps(run_scenario(args.scenario, args.uploads, size)))
+        return 0
+
+    print(f"{args.uploads} concurrent uploads of {args.size_mb}MB (oversized: {args.size_mb + 20}MB against a {args.size_mb}MB limit)\n")
+    for scenario in SCENARIOS:
+        child = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--scenario", scenario, "--uploads", str(args.uploads), "--size-mb", str(args.size_mb)],
+            capture_output=True, text=True, check=True
+        )
+        result = json.loads(child.stdout.strip().splitlines()[-1])
+        print(
+            f"{scenario:<16} peak_rss={result['peak_rss_mb']:8.1f}MB (+{result['peak_rss_mb'] - result['baseline_rss_mb']:7.1f}MB) "
+            f"elapsed={result['elapsed_s']:6.2f}s read/upload={result['mb_read_per_upload']:6.1f}MB status={result['statuses']}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
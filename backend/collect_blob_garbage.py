@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Delete stored upload blobs that no document references any more and print the
+deduplication report. Safe to run from cron; pass --dry-run to only report.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+def collect_blobs(dry_run: bool = False):
+    """Run blob garbage collection and print storage usage"""
+    try:
+        print("Collecting unreferenced blobs..." + (" (dry run)" if dry_run else ""))
+
+        from app.database import SessionLocal
+        from app.services.blob_storage import collect_garbage, storage_report
+
+        with SessionLocal() as db:
+            result = collect_garbage(db, dry_run=dry_run)
+            report = storage_report(db)
+
+        print(f"🗑️ Blobs removed: {result['blobs_removed']} ({result['bytes_freed'] / (1024*1024):.2f}MB)")
+        print(f"📦 Referenced blobs: {report['referenced_blobs']} ({report['references']} references)")
+        print(f"💾 Bytes saved by deduplication: {report['bytes_saved'] / (1024*1024):.2f}MB")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error collecting blobs: {e}")
+        return False
+
+def main():
+    return 0 if collect_blobs(dry_run="--dry-run" in sys.argv[1:]) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
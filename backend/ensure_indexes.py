@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Create the secondary indexes declared on the models in an existing database.
+Tables created by create_all already have them; run this once after deploying
+against a database whose tables predate an index. Existing indexes are skipped.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+def ensure_indexes():
+    """Create any declared index that is missing"""
+    try:
+        print("Ensuring database indexes...")
+        
+        from app.database import engine
+        from app.models import Document
+        
+        for index in sorted(Document.__table__.indexes, key=lambda index: index.name):
+            index.create(bind=engine, checkfirst=True)
+            print(f"✓ {index.name}")
+        
+        print("✅ Indexes up to date")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error creating indexes: {e}")
+        return False
+
+def main():
+    return 0 if ensure_indexes() else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
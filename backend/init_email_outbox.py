@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Create the email outbox table used for background email delivery and the
+log the deadline reminder scheduler uses to send each reminder only once.
+Safe to run repeatedly.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+def init_email_outbox():
+    """Create the email_outbox and deadline_reminder_log tables"""
+    try:
+        print("Initializing email outbox...")
+        
+        from app.database import engine
+        from app.models import Base, OutboxEmail, DeadlineReminderLog
+        
+        Base.metadata.create_all(bind=engine, tables=[OutboxEmail.__table__, DeadlineReminderLog.__table__])
+        print("✓ Email outbox and deadline reminder log tables present")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error initializing email outbox: {e}")
+        return False
+
+def main():
+    return 0 if init_email_outbox() else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Create the background job queue and file metadata tables, then queue metadata
+extraction for every stored document file that has not been processed yet.
+Safe to run repeatedly.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+def init_job_queue():
+    """Create the job tables and backfill file processing jobs"""
+    try:
+        print("Initializing background job queue...")
+        
+        from app.database import SessionLocal, engine
+        from app.models import Base, BackgroundJob, FileMetadata, Document, ScoreCardDocument
+        from app.services.file_processing import enqueue_file_processing
+        
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[BackgroundJob.__table__, FileMetadata.__table__]
+        )
+        print("✓ Job queue tables present")
+        
+        with SessionLocal() as db:
+            processed = {path for (path,) in db.query(FileMetadata.file_path)}
+            paths = {path for (path,) in db.query(Document.file_path).filter(Document.status != 'deleted')}
+            paths.update(path for (path,) in db.query(ScoreCardDocument.file_path).filter(ScoreCardDocument.file_path.isnot(None)))
+            pending = sorted(paths - processed)
+            for path in pending:
+                enqueue_file_processing(db, path)
+            db.commit()
+        
+        print(f"📄 Queued {len(pending)} stored file(s) for processing")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error initializing job queue: {e}")
+        return False
+
+def main():
+    return 0 if init_job_queue() else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Create (if needed) and fully rebuild the analytics rollup tables from
+program_counts and events. The API keeps the rollups up to date on every write;
+run this once after deploying, and again if the tables are ever suspected stale.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+def rebuild_rollups():
+    """Create the rollup tables and recompute every (department, academic year) slice"""
+    try:
+        print("Rebuilding analytics rollups...")
+        
+        from app.database import SessionLocal, engine
+        from app.models import Base, DepartmentBudgetRollup, DepartmentEventRollup
+        from app.services.analytics_rollup import rebuild_all_rollups
+        
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[DepartmentBudgetRollup.__table__, DepartmentEventRollup.__table__]
+        )
+        print("✓ Rollup tables present")
+        
+        with SessionLocal() as db:
+            summary = rebuild_all_rollups(db)
+        
+        print(f"✅ Rebuilt {summary['slices']} department/year slices")
+        print(f"📊 Budget rollup rows: {summary['budget_rollups']}")
+        print(f"📅 Monthly event rollup rows: {summary['event_rollups']}")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error rebuilding analytics rollups: {e}")
+        return False
+
+def main():
+    return 0 if rebuild_rollups() else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+# backend/tests/conftest.py
+import os
+import sys
+import tempfile
+
+# The engines are built from the environment at import time, so point everything
+# at a throwaway SQLite database and upload tree before importing the app
+_TEST_DIR = tempfile.mkdtemp(prefix="portal-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_TEST_DIR}/test.db",
+    "ENABLE_DEV_TOKENS": "true",
+    "JOB_QUEUE_ENABLED": "false",
+    "EMAIL_OUTBOX_ENABLED": "false",
+    "REMINDER_SCHEDULER_ENABLED": "false",
+    "UPLOAD_DIRECTORY": f"{_TEST_DIR}/uploads",
+    "BLOB_STORAGE_DIRECTORY": f"{_TEST_DIR}/blobs",
+    "UPLOAD_SESSION_DIRECTORY": f"{_TEST_DIR}/sessions",
+    "THUMBNAIL_DIRECTORY": f"{_TEST_DIR}/thumbnails",
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import SessionLocal, async_engine, engine
+from app.models import AcademicYear, Base, Department, User
+
+
+@pytest.fixture(autouse=True)
+def fresh_database():
+    from app.services.analytics_cache import analytics_cache
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    analytics_cache.clear()
+    yield
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def seed(db):
+    """One academic year, three departments, an admin, a principal and two HoDs (ids match the dev tokens)"""
+    year = AcademicYear(id=1, year="2025-26", is_enabled=True)
+    db.add(year)
+    for i in range(1, 4):
+        db.add(Department(id=i, name=f"D{i}", full_name=f"Department {i}"))
+    db.add_all([
+        User(id=1, name="Admin", email="admin@example.com", role="admin"),
+        User(id=2, name="Principal", email="principal@example.com", role="principal"),
+        User(id=6, name="HoD One", email="hod1@example.com", role="hod", department_id=1),
+        User(id=3, name="HoD Two", email="hod2@example.com", role="hod", department_id=2),
+    ])
+    db.commit()
+    return year
+
+
+@pytest.fixture
+def client():
+    from app.main import app
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@contextmanager
+def count_statements(*engines):
+    """Collect the SQL statements run on the given engines (default: the sync and async app engines)"""
+    engines = engines or (engine, async_engine.sync_engine)
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for target in engines:
+        event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+
+ADMIN = {"Authorization": "Bearer admin-token"}
+PRINCIPAL = {"Authorization": "Bearer principal-token"}
+HOD = {"Authorization": "Bearer hod-civ-token"}
@@ -0,0 +1,128 @@
+# backend/tests/test_analytics.py
+import random
+from collections import defaultdict
+from datetime import datetime
+
+import pytest
+
+from app.database import async_engine
+from app.models import Event, ProgramCount, ProgramType, WorkflowStatus
+from app.services.analytics_rollup import rebuild_all_rollups
+from conftest import ADMIN, HOD, PRINCIPAL, count_statements
+
+
+@pytest.fixture
+def activity(db, seed):
+    """Several program counts and events per department, so a fan-out join would multiply totals"""
+    rng = random.Random(8)
+    db.add(ProgramType(id=1, program_type="Workshop", activity_category="A", departments="ALL", budget_mode="Variable"))
+    program_counts, events = [], []
+    for department_id in (1, 2):
+        for k in range(rng.randint(2, 4)):
+            program_counts.append(ProgramCount(
+                department_id=department_id, academic_year_id=1, program_type=f"P{k}", activity_category="A",
+                budget_mode="Variable", count=rng.randint(1, 5), total_budget=rng.randint(1, 50) * 1000
+            ))
+        for k in range(rng.randint(3, 6)):
+            events.append(Event(
+                title=f"E{department_id}-{k}", event_date=datetime(2025, rng.randint(7, 12), 10),
+                budget_amount=rng.randint(1, 20) * 100, department_id=department_id, academic_year_id=1,
+                program_type_id=1, event_status=rng.choice(["planned", "ongoing", "completed"])
+            ))
+    db.add_all(program_counts + events)
+    db.commit()
+    rebuild_all_rollups(db)
+    return program_counts, events
+
+
+def reference_performance(program_counts, events):
+    allocated = defaultdict(float)
+    for program_count in program_counts:
+        allocated[program_count.department_id] += program_count.total_budget
+    planned, completed, utilized = defaultdict(int), defaultdict(int), defaultdict(float)
+    for event in events:
+        planned[event.department_id] += 1
+        if event.event_status == "completed":
+            completed[event.department_id] += 1
+            utilized[event.department_id] += event.budget_amount
+    return {
+        f"D{department_id}": {
+            "budget_allocated": allocated[department_id],
+            "budget_utilized": utilized[department_id],
+            "events_planned": planned[department_id],
+            "events_completed": completed[department_id],
+        }
+        for department_id in (1, 2, 3)
+    }
+
+
+def test_department_performance_matches_reference(client, activity):
+    response = client.get("/api/analytics/department-performance", params={"academic_year_id": 1}, headers=PRINCIPAL)
+    assert response.status_code == 200
+
+    expected = reference_performance(*activity)
+    actual = {
+        row["department"]: {key: row[key] for key in ("budget_allocated", "budget_utilized", "events_planned", "events_completed")}
+        for row in response.json()
+    }
+    assert actual == expected
+    for row in response.json():
+        reference = expected[row["department"]]
+        if reference["budget_allocated"]:
+            assert row["utilization_percentage"] == pytest.approx(reference["budget_utilized"] / reference["budget_allocated"] * 100)
+
+
+def test_department_performance_is_principal_only(client, activity):
+    response = client.get("/api/analytics/department-performance", headers={"Authorization": "Bearer hod-civ-token"})
+    assert response.status_code == 403
+
+
+def seed_volume(db, events, program_counts):
+    rng = random.Random(events)
+    db.add(ProgramType(id=1, program_type="Workshop", activity_category="A", departments="ALL", budget_mode="Variable"))
+    db.bulk_insert_mappings(ProgramCount, [
+        {
+            "department_id": rng.randint(1, 3), "academic_year_id": 1, "program_type": f"P{i}", "activity_category": "A",
+            "budget_mode": "Variable", "count": rng.randint(1, 5), "total_budget": rng.randint(1, 50) * 1000
+        }
+        for i in range(program_counts)
+    ])
+    db.bulk_insert_mappings(Event, [
+        {
+            "title": f"E{i}", "event_date": datetime(2025, 9, 1), "budget_amount": 100, "department_id": rng.randint(1, 3),
+            "academic_year_id": 1, "program_type_id": 1, "event_status": rng.choice(["planned", "ongoing", "completed"]),
+            "created_at": datetime.now()
+        }
+        for i in range(events)
+    ])
+    db.add_all([WorkflowStatus(department_id=i, academic_year_id=1, status=status) for i, status in ((1, "draft"), (2, "submitted"), (3, "approved"))])
+    db.commit()
+
+
+@pytest.mark.parametrize("events, program_counts", [(10, 20), (500, 2000)])
+@pytest.mark.parametrize("headers, department_id", [(PRINCIPAL, None), (HOD, 1)])
+def test_dashboard_overview_round_trips_do_not_grow_with_data(client, db, seed, events, program_counts, headers, department_id):
+    seed_volume(db, events, program_counts)
+
+    with count_statements(async_engine.sync_engine) as statements:
+        response = client.get("/api/analytics/dashboard-overview", headers=headers)
+
+    # The academic-year fallback plus one aggregate query (the previous version issued 11)
+    assert response.status_code == 200
+    assert len(statements) <= 2, statements
+
+    in_scope = lambda row: department_id is None or row.department_id == department_id
+    rows = [row for row in db.query(ProgramCount) if in_scope(row)]
+    statuses = [row.event_status for row in db.query(Event) if in_scope(row)]
+    body = response.json()
+    assert body["budget_overview"]["total_budget"] == sum(row.total_budget for row in rows)
+    assert body["budget_overview"]["total_programs"] == sum(row.count for row in rows)
+    assert body["events_overview"]["total_events"] == len(statuses)
+    assert body["events_overview"]["completed_events"] == statuses.count("completed")
+    assert body["events_overview"]["planned_events"] == statuses.count("planned")
+
+
+def test_cache_stats_is_admin_only(client, seed):
+    assert client.get("/api/analytics/cache-stats", headers=PRINCIPAL).status_code == 403
+    response = client.get("/api/analytics/cache-stats", headers=ADMIN)
+    assert response.status_code == 200
@@ -0,0 +1,50 @@
+# backend/tests/test_analytics_rollup.py
+from datetime import date, datetime
+
+from app.models import DepartmentBudgetRollup, DepartmentEventRollup, Event, ProgramCount
+from app.services.analytics_rollup import refresh_department_rollups
+
+
+def add_event(db, month, budget, status="planned", department_id=1):
+    event = Event(
+        title=f"Event {month}", event_date=datetime(2025, month, 10), budget_amount=budget,
+        department_id=department_id, academic_year_id=1, program_type_id=1, event_status=status
+    )
+    db.add(event)
+    return event
+
+
+def test_refresh_updates_rows_already_written_for_the_slice(db, seed):
+    # Rows a concurrent refresh of the same slice committed first
+    db.add(DepartmentBudgetRollup(department_id=1, academic_year_id=1, total_budget=1, program_count=1))
+    db.add(DepartmentEventRollup(department_id=1, academic_year_id=1, month=date(2025, 8, 1), event_count=9))
+    db.commit()
+    db.add(ProgramCount(
+        department_id=1, academic_year_id=1, program_type="Workshop", activity_category="A",
+        budget_mode="Fixed", count=3, total_budget=3000
+    ))
+    add_event(db, 8, 100, "completed")
+    add_event(db, 8, 50)
+
+    refresh_department_rollups(db, 1, 1)
+    db.commit()
+
+    budget = db.query(DepartmentBudgetRollup).one()
+    assert (budget.total_budget, budget.program_count) == (3000, 3)
+    events = db.query(DepartmentEventRollup).one()
+    assert (events.event_count, events.completed_count, events.total_budget, events.completed_budget) == (2, 1, 150, 100)
+
+
+def test_refresh_drops_months_and_budget_without_rows(db, seed):
+    august = add_event(db, 8, 100)
+    add_event(db, 9, 200)
+    refresh_department_rollups(db, 1, 1)
+    db.commit()
+    assert db.query(DepartmentEventRollup).count() == 2
+
+    db.delete(august)
+    refresh_department_rollups(db, 1, 1)
+    db.commit()
+
+    assert [row.month for row in db.query(DepartmentEventRollup)] == [date(2025, 9, 1)]
+    assert db.query(DepartmentBudgetRollup).count() == 0
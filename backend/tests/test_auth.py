@@ -0,0 +1,18 @@
+# backend/tests/test_auth.py
+from conftest import ADMIN, HOD
+
+
+def test_principal_stats_is_admin_only(client, seed):
+    assert client.get("/auth/principal-stats").status_code == 401
+    assert client.get("/auth/principal-stats", headers=HOD).status_code == 403
+
+    response = client.get("/auth/principal-stats", headers=ADMIN)
+    assert response.status_code == 200
+    assert "principal_cache" in response.json()
+
+
+def test_jwks_stats_is_admin_only(client, seed):
+    assert client.get("/auth/jwks-stats", headers=HOD).status_code == 403
+    response = client.get("/auth/jwks-stats", headers=ADMIN)
+    assert response.status_code == 200
+    assert "cached_kids" in response.json()
@@ -0,0 +1,107 @@
+# backend/tests/test_blob_storage.py
+import io
+import os
+import time
+from datetime import datetime
+from email.utils import formatdate
+
+from app.api.endpoints import documents
+from app.models import Document, Event, ProgramType
+from app.services.blob_storage import blob_store, collect_garbage, release_file
+
+
+def store_bytes(tmp_path, content):
+    source = tmp_path / "upload"
+    source.write_bytes(content)
+    return blob_store.store_file(source)
+
+
+def test_release_keeps_recently_used_blob(db, tmp_path):
+    blob = store_bytes(tmp_path, b"shared evidence")
+
+    # An upload may just have deduplicated onto it without committing its row yet
+    assert release_file(db, blob.path) is False
+    assert os.path.exists(blob.path)
+
+
+def test_release_deletes_unreferenced_blob_after_grace(db, tmp_path):
+    blob = store_bytes(tmp_path, b"old evidence")
+    an_hour_ago = time.time() - 7200
+    os.utime(blob.path, (an_hour_ago, an_hour_ago))
+
+    assert release_file(db, blob.path, grace_seconds=3600) is True
+    assert not os.path.exists(blob.path)
+
+
+def test_garbage_collection_reclaims_kept_blob(db, tmp_path):
+    blob = store_bytes(tmp_path, b"evidence released during the grace period")
+    assert release_file(db, blob.path) is False
+
+    assert collect_garbage(db, grace_seconds=0)["blobs_removed"] >= 1
+    assert not os.path.exists(blob.path)
+
+
+def test_upload_event_documents_stores_both_files(client, db, seed):
+    db.add(ProgramType(id=1, program_type="Workshop", activity_category="A", departments="ALL", budget_mode="Fixed"))
+    db.add(Event(id=1, title="Expo", event_date=datetime(2025, 9, 1), budget_amount=100, department_id=1, academic_year_id=1, program_type_id=1))
+    db.commit()
+
+    response = client.post(
+        "/documents/upload/1",
+        files={
+            "report": ("report.pdf", io.BytesIO(b"%PDF-1.4 report"), "application/pdf"),
+            "zipfile": ("photos.zip", io.BytesIO(b"PK\x03\x04 photos"), "application/zip"),
+        },
+        headers={"Authorization": "Bearer hod-civ-token"},
+    )
+
+    assert response.status_code == 200, response.text
+    assert db.query(Document).count() == 2
+
+
+def test_upload_event_documents_enforces_the_size_cap(client, db, seed, monkeypatch):
+    monkeypatch.setattr(documents, "EVENT_DOCUMENT_MAX_FILE_SIZE", 1024)
+    db.add(ProgramType(id=1, program_type="Workshop", activity_category="A", departments="ALL", budget_mode="Fixed"))
+    db.add(Event(id=1, title="Expo", event_date=datetime(2025, 9, 1), budget_amount=100, department_id=1, academic_year_id=1, program_type_id=1))
+    db.commit()
+
+    response = client.post(
+        "/documents/upload/1",
+        files={
+            "report": ("report.pdf", io.BytesIO(b"x" * 2048), "application/pdf"),
+            "zipfile": ("no-zip-uploaded.zip", io.BytesIO(b""), "application/zip"),
+        },
+        headers={"Authorization": "Bearer hod-civ-token"},
+    )
+
+    assert response.status_code == 413
+    assert db.query(Document).count() == 0
+
+
+def test_download_last_modified_comes_from_the_document_row(client, db, seed):
+    db.add(ProgramType(id=1, program_type="Workshop", activity_category="A", departments="ALL", budget_mode="Fixed"))
+    db.add(Event(id=1, title="Expo", event_date=datetime(2025, 9, 1), budget_amount=100, department_id=1, academic_year_id=1, program_type_id=1))
+    db.commit()
+    client.post(
+        "/documents/upload/1",
+        files={
+            "report": ("report.pdf", io.BytesIO(b"%PDF-1.4 dated report"), "application/pdf"),
+            "zipfile": ("no-zip-uploaded.zip", io.BytesIO(b""), "application/zip"),
+        },
+        headers={"Authorization": "Bearer hod-civ-token"},
+    )
+    document = db.query(Document).one()
+    uploaded_at = datetime(2025, 9, 2, 10, 30)
+    document.uploaded_at = uploaded_at
+    db.commit()
+    # A later upload of the same bytes deduplicates onto the blob and touches it
+    os.utime(document.file_path)
+
+    response = client.get(f"/documents/download/{document.id}")
+    assert response.headers["last-modified"] == formatdate(uploaded_at.timestamp(), usegmt=True)
+
+    revalidated = client.get(
+        f"/documents/download/{document.id}",
+        headers={"If-Modified-Since": response.headers["last-modified"]},
+    )
+    assert revalidated.status_code == 304
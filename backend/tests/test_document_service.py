@@ -0,0 +1,155 @@
+# backend/tests/test_document_service.py
+from datetime import datetime
+
+import pytest
+
+from app.models import Document, Event, ProgramType, WorkflowStatus
+from app.services.document_service import approve_document, decode_document_cursor, encode_document_cursor
+from conftest import count_statements
+
+
+def add_event(db, department_id=1, title="Expo"):
+    event = Event(
+        title=title, event_date=datetime(2025, 9, 1), budget_amount=100,
+        department_id=department_id, academic_year_id=1, program_type_id=1
+    )
+    db.add(event)
+    db.flush()
+    return event
+
+
+def add_document(db, event, document_type, status="approved", uploaded_at=None):
+    document = Document(
+        filename=f"{event.id}-{document_type}.pdf", original_filename=f"{document_type}.pdf",
+        file_path=f"/tmp/{event.id}-{document_type}.pdf", file_size=1024, mime_type="application/pdf",
+        document_type=document_type, title=document_type, department_id=event.department_id,
+        academic_year_id=1, event_id=event.id, status=status, uploaded_by=6,
+        uploaded_at=uploaded_at or datetime(2025, 9, 2)
+    )
+    db.add(document)
+    db.flush()
+    return document
+
+
+@pytest.fixture
+def program_type(db, seed):
+    db.add(ProgramType(id=1, program_type="Workshop", activity_category="A", departments="ALL", budget_mode="Fixed"))
+    db.commit()
+
+
+def complete_department(db, events, department_id=1):
+    """`events` events in a department with both documents approved, except one pending report"""
+    for i in range(events):
+        event = add_event(db, department_id, title=f"Event {i}")
+        add_document(db, event, "supporting_documents")
+        pending = add_document(db, event, "complete_report", status="pending" if i == 0 else "approved")
+        if i == 0:
+            target = pending
+    db.commit()
+    return target.id
+
+
+def test_approve_document_round_trips_do_not_grow_with_events(db, program_type):
+    small = complete_department(db, 5, department_id=1)
+    large = complete_department(db, 200, department_id=2)
+
+    round_trips = []
+    for document_id in (small, large):
+        with count_statements() as statements:
+            approve_document(db, document_id, approved_by=1)
+        round_trips.append(len(statements))
+
+    assert round_trips[0] == round_trips[1]
+    assert db.query(Event).filter(Event.event_status != "completed").count() == 0
+    assert db.query(WorkflowStatus).filter_by(academic_year_id=1, status="completed").count() == 2
+
+
+def test_approve_document_waits_for_every_event_of_the_department(db, program_type):
+    document_id = complete_department(db, 3)
+    unfinished = add_event(db, title="Unfinished")
+    add_document(db, unfinished, "complete_report")
+    # Another department's backlog does not hold this one back
+    other = add_event(db, department_id=2, title="Elsewhere")
+    add_document(db, other, "complete_report", status="pending")
+    db.commit()
+
+    approve_document(db, document_id, approved_by=1)
+
+    assert db.query(Event).filter(Event.event_status == "completed").count() == 0
+    add_document(db, unfinished, "supporting_documents")
+    db.commit()
+
+    approve_document(db, document_id, approved_by=1)
+
+    assert {event.title for event in db.query(Event).filter(Event.event_status == "completed")} == {
+        "Event 0", "Event 1", "Event 2", "Unfinished"
+    }
+
+
+def list_all_pages(client, limit, **filters):
+    """Follow X-Next-Cursor to the end; returns the document ids in order and the number of pages"""
+    ids, pages, cursor = [], 0, None
+    while True:
+        params = {"limit": limit, **filters}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/documents/list", params=params)
+        assert response.status_code == 200, response.text
+        pages += 1
+        ids.extend(document["id"] for document in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids, pages
+
+
+def test_document_cursor_round_trips():
+    document = Document(id=42, uploaded_at=datetime(2025, 9, 2, 10, 30, 15, 123456))
+
+    assert decode_document_cursor(encode_document_cursor(document)) == (document.uploaded_at, 42)
+
+
+def test_pages_break_ties_on_uploaded_at_by_id(client, db, program_type):
+    same_time = datetime(2025, 9, 2, 10, 30)
+    for i in range(7):
+        event = add_event(db, title=f"Event {i}")
+        add_document(db, event, "complete_report", uploaded_at=same_time if i < 5 else datetime(2025, 9, i))
+    db.commit()
+    expected = [document.id for document in db.query(Document).order_by(Document.uploaded_at.desc(), Document.id.desc())]
+
+    ids, pages = list_all_pages(client, limit=2)
+
+    assert ids == expected
+    assert pages == 4
+
+
+def test_cursor_combines_with_filters(client, db, program_type):
+    for i in range(6):
+        event = add_event(db, department_id=1 + i % 2, title=f"Event {i}")
+        add_document(db, event, "complete_report", uploaded_at=datetime(2025, 9, 1 + i))
+        add_document(db, event, "supporting_documents", uploaded_at=datetime(2025, 9, 1 + i))
+    db.commit()
+    expected = [
+        document.id for document in db.query(Document).filter_by(department_id=1, document_type="complete_report")
+        .order_by(Document.uploaded_at.desc(), Document.id.desc())
+    ]
+
+    ids, _ = list_all_pages(client, limit=1, department_id=1, document_type="report")
+
+    assert ids == expected
+
+
+def test_last_page_has_no_next_cursor(client, db, program_type):
+    add_document(db, add_event(db), "complete_report")
+    db.commit()
+
+    response = client.get("/documents/list", params={"limit": 1})
+
+    assert len(response.json()) == 1
+    assert "X-Next-Cursor" not in response.headers
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "MjAyNS0wOS0wMnw", "bm90LWEtZGF0ZXw0Mg"])
+def test_tampered_cursor_is_rejected(client, db, program_type, cursor):
+    response = client.get("/documents/list", params={"limit": 10, "cursor": cursor})
+
+    assert response.status_code == 400
@@ -0,0 +1,284 @@
+# backend/tests/test_email_outbox.py
+import asyncio
+import socket
+from datetime import datetime
+from email.mime.text import MIMEText
+
+import pytest
+from aiosmtpd.controller import Controller
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.database import DATABASE_URL, build_async_engine
+from app.email_service import SMTPConnectionPool, email_service
+from app.models import OutboxEmail
+from app.services.email_outbox import EmailOutboxSender
+from conftest import ADMIN
+
+
+class SinkHandler:
+    """Accepts everything except recipients at refused.example.com"""
+
+    def __init__(self):
+        self.received = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.endswith("@refused.example.com"):
+            return "550 5.1.1 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received.append((list(envelope.rcpt_tos), envelope.content))
+        return "250 OK"
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_port(monkeypatch):
+    port = free_port()
+    monkeypatch.setattr(email_service, "smtp_pool", SMTPConnectionPool("127.0.0.1", port, start_tls=False, timeout=5))
+    return port
+
+
+@pytest.fixture
+def smtp_sink(smtp_port):
+    handler = SinkHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=smtp_port)
+    controller.start()
+    yield handler
+    controller.stop()
+
+
+@pytest.fixture
+def sender():
+    # A fresh engine per test keeps aiosqlite connections off other tests' event loops
+    engine = build_async_engine(DATABASE_URL, poolclass=NullPool)
+    outbox = EmailOutboxSender(
+        session_factory=async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession),
+        retry_base_seconds=60,
+        max_attempts=3
+    )
+    outbox.set_transport(email_service.deliver)
+    yield outbox
+    asyncio.run(engine.dispose())
+
+
+def enqueue(db, sender, to_email):
+    message = sender.enqueue(db, [to_email], "Deadline reminder", "<p>Budget proposal due</p>")
+    db.commit()
+    return message.id
+
+
+def send_next(sender):
+    async def run():
+        try:
+            return await sender.send_next()
+        finally:
+            await email_service.close()
+    return asyncio.run(run())
+
+
+def load(db, message_id):
+    db.expire_all()
+    return db.get(OutboxEmail, message_id)
+
+
+def make_due(db, message_id):
+    load(db, message_id).next_attempt_at = datetime.now()
+    db.commit()
+
+
+def test_delivers_queued_message(db, sender, smtp_sink):
+    message_id = enqueue(db, sender, "hod@example.com")
+
+    assert send_next(sender) is True
+
+    message = load(db, message_id)
+    assert (message.status, message.attempts, message.last_error) == ("sent", 1, None)
+    assert message.sent_at is not None
+    assert [rcpt_tos for rcpt_tos, _ in smtp_sink.received] == [["hod@example.com"]]
+    assert b"Subject: Deadline reminder" in smtp_sink.received[0][1]
+    # Nothing left to do
+    assert send_next(sender) is False
+
+
+def test_retries_with_exponential_backoff_until_server_is_back(db, sender, smtp_port):
+    message_id = enqueue(db, sender, "hod@example.com")
+
+    delays = []
+    for _ in range(2):
+        started = datetime.now()
+        assert send_next(sender) is True
+        message = load(db, message_id)
+        assert message.status == "queued" and message.last_error
+        delays.append((message.next_attempt_at - started).total_seconds())
+        # Not due again until the backoff has passed
+        assert send_next(sender) is False
+        make_due(db, message_id)
+    assert delays[0] == pytest.approx(60, abs=5)
+    assert delays[1] == pytest.approx(120, abs=5)
+
+    handler = SinkHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=smtp_port)
+    controller.start()
+    try:
+        assert send_next(sender) is True
+    finally:
+        controller.stop()
+
+    message = load(db, message_id)
+    assert (message.status, message.attempts) == ("sent", 3)
+    assert len(handler.received) == 1
+
+
+def test_dead_letters_after_max_attempts(db, sender, smtp_port):
+    message_id = enqueue(db, sender, "hod@example.com")
+
+    for _ in range(sender.max_attempts):
+        assert send_next(sender) is True
+        make_due(db, message_id)
+
+    message = load(db, message_id)
+    assert (message.status, message.attempts) == ("dead", 3)
+    assert message.last_error
+    assert send_next(sender) is False
+
+
+def test_refused_recipient_is_dead_lettered_without_retry(db, sender, smtp_sink):
+    message_id = enqueue(db, sender, "nobody@refused.example.com")
+
+    assert send_next(sender) is True
+
+    message = load(db, message_id)
+    assert (message.status, message.attempts) == ("dead", 1)
+    assert "PermanentDeliveryError" in message.last_error
+    assert smtp_sink.received == []
+
+
+def test_dead_letter_can_be_retried_by_admin_only(client, db, sender, smtp_sink):
+    message_id = enqueue(db, sender, "nobody@refused.example.com")
+    send_next(sender)
+
+    assert client.get(f"/notifications/outbox/{message_id}", headers={"Authorization": "Bearer hod-civ-token"}).status_code == 403
+    assert client.get(f"/notifications/outbox/{message_id}", headers=ADMIN).json()["status"] == "dead"
+
+    response = client.post(f"/notifications/outbox/{message_id}/retry", headers=ADMIN)
+    assert response.status_code == 200
+    assert (response.json()["status"], response.json()["attempts"]) == ("queued", 0)
+
+
+def pool_for(port, **options):
+    return SMTPConnectionPool("127.0.0.1", port, start_tls=False, timeout=5, **options)
+
+
+def reminder(n=0):
+    message = MIMEText(f"<p>Budget proposal due ({n})</p>", "html")
+    message["Subject"] = "Deadline reminder"
+    message["From"] = "portal@example.com"
+    return message
+
+
+def send_all(pool, count, concurrently=False):
+    async def run():
+        try:
+            if concurrently:
+                await asyncio.gather(*(pool.send_message(reminder(n), ["hod@example.com"]) for n in range(count)))
+            else:
+                for n in range(count):
+                    await pool.send_message(reminder(n), ["hod@example.com"])
+            return list(pool._idle)
+        finally:
+            await pool.close()
+    return asyncio.run(run())
+
+
+def test_pool_reuses_one_connection_for_sequential_messages(smtp_port, smtp_sink):
+    pool = pool_for(smtp_port)
+
+    send_all(pool, 5)
+
+    assert (pool.connections_opened, pool.messages_sent, pool.reconnects) == (1, 5, 0)
+    assert len(smtp_sink.received) == 5
+
+
+def test_pool_reuses_the_most_recently_used_connection(smtp_port, smtp_sink):
+    pool = pool_for(smtp_port, size=2)
+
+    async def run():
+        try:
+            await asyncio.gather(*(pool.send_message(reminder(n), ["hod@example.com"]) for n in range(2)))
+            older, newer = pool._idle
+            await pool.send_message(reminder(2), ["hod@example.com"])
+            return older, newer
+        finally:
+            await pool.close()
+
+    older, newer = asyncio.run(run())
+
+    assert pool.connections_opened == 2
+    assert (older.messages_sent, newer.messages_sent) == (1, 2)
+
+
+def test_pool_retires_idle_connections(smtp_port, smtp_sink):
+    pool = pool_for(smtp_port, max_idle_seconds=60)
+
+    async def run():
+        try:
+            await pool.send_message(reminder(0), ["hod@example.com"])
+            pool._idle[0].last_used -= 61
+            await pool.send_message(reminder(1), ["hod@example.com"])
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
+
+    assert (pool.connections_opened, pool.reconnects) == (2, 0)
+    assert len(smtp_sink.received) == 2
+
+
+def test_pool_retires_connections_after_max_messages(smtp_port, smtp_sink):
+    pool = pool_for(smtp_port, max_messages_per_connection=2)
+
+    idle = send_all(pool, 5)
+
+    assert pool.connections_opened == 3
+    assert [connection.messages_sent for connection in idle] == [1]
+    assert len(smtp_sink.received) == 5
+
+
+def test_pool_never_exceeds_its_size(smtp_port, smtp_sink):
+    pool = pool_for(smtp_port, size=3)
+
+    send_all(pool, 30, concurrently=True)
+
+    assert pool.connections_opened == 3
+    assert len(smtp_sink.received) == 30
+
+
+def test_pool_reconnects_after_server_restart(smtp_port):
+    pool = pool_for(smtp_port)
+    handlers = [SinkHandler(), SinkHandler()]
+
+    async def run():
+        try:
+            for handler in handlers:
+                # The warm connection from the first send dies with the first server
+                controller = Controller(handler, hostname="127.0.0.1", port=smtp_port)
+                controller.start()
+                try:
+                    await pool.send_message(reminder(), ["hod@example.com"])
+                finally:
+                    controller.stop()
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
+
+    assert (pool.connections_opened, pool.reconnects, pool.messages_sent) == (2, 1, 2)
+    assert [len(handler.received) for handler in handlers] == [1, 1]
@@ -0,0 +1,77 @@
+# backend/tests/test_email_render.py
+import pytest
+from jinja2 import ChoiceLoader, DictLoader
+
+from app.email_service import EmailService
+
+TEMPLATES = {
+    "printed.html": "<p>Dear {{ user_name }} ({{ department_name }}),</p><p>{{ module_name }} due {{ deadline_date }}</p>",
+    "condition.html": "{% if user_name == 'Ada' %}<b>VIP</b> {% endif %}Dear {{ user_name }}",
+    "filtered.html": "Dear {{ user_name|upper }}, {{ module_name }}",
+    "shadowed.html": "{% set user_name = user_name ~ '!' %}Dear {{ user_name }}",
+    "loop.html": "Dear {{ user_name }}:{% for item in items %} {{ item }}{% endfor %}",
+    "optional.html": "Dear {{ user_name }}{{ note }}",
+    "outer.html": "{% include 'condition.html' %} / {{ module_name }}",
+}
+
+SHARED = {"module_name": "Budget Submission", "deadline_date": "31 Oct 2025"}
+RECIPIENTS = [
+    {"user_name": "Bob", "department_name": "CIV"},
+    {"user_name": "Ada", "department_name": "EEE"},
+    {"user_name": "<Chen & Co>", "department_name": "MEC"},
+]
+
+
+@pytest.fixture
+def service():
+    service = EmailService()
+    service.jinja_env.loader = ChoiceLoader([DictLoader(TEMPLATES), service.jinja_env.loader])
+    return service
+
+
+def full_renders(service, template_name, shared_data, recipient_data):
+    return [service.render(template_name, {**shared_data, **data}) for data in recipient_data]
+
+
+def test_batch_matches_full_render_of_the_reminder_template(service):
+    shared = {**SHARED, "academic_year": "2025-26", "portal_url": "http://localhost:3000", "year": "2025"}
+    for days_remaining in (0, 1, 5):
+        shared["days_remaining"] = days_remaining
+        assert service.render_batch("deadline_reminder.html", shared, RECIPIENTS) == full_renders(
+            service, "deadline_reminder.html", shared, RECIPIENTS
+        )
+
+
+def test_printed_keys_render_once_per_batch(service, monkeypatch):
+    renders = []
+    render = service.render
+    monkeypatch.setattr(service, "render", lambda name, data: renders.append(name) or render(name, data))
+    recipients = [{"user_name": f"HoD {i}", "department_name": f"D{i}"} for i in range(50)]
+
+    batch = service.render_batch("printed.html", SHARED, recipients)
+    service.render_batch("printed.html", SHARED, recipients)
+
+    # Skeleton plus the first-message check, then only the check on the cached skeleton
+    assert len(renders) == 3
+    assert batch == full_renders(service, "printed.html", SHARED, recipients)
+    assert service._cached_skeleton.cache_info().hits == 1
+
+
+@pytest.mark.parametrize("template_name", ["condition.html", "filtered.html", "shadowed.html", "outer.html"])
+def test_keys_used_beyond_printing_fall_back_to_full_renders(service, template_name):
+    # Bob, the first recipient, comes out right either way; checking him alone would miss Ada
+    assert service.render_batch(template_name, SHARED, RECIPIENTS) == full_renders(service, template_name, SHARED, RECIPIENTS)
+    assert service._cached_skeleton.cache_info().currsize == 0
+
+
+def test_unhashable_shared_data_is_rendered_without_the_cache(service):
+    shared = {"items": ["report", "photos"]}
+
+    assert service.render_batch("loop.html", shared, RECIPIENTS) == full_renders(service, "loop.html", shared, RECIPIENTS)
+    assert service._cached_skeleton.cache_info().currsize == 0
+
+
+def test_keys_missing_for_some_recipients_render_empty(service):
+    recipients = [{"user_name": "Bob", "note": " (second reminder)"}, {"user_name": "Ada"}]
+
+    assert service.render_batch("optional.html", {}, recipients) == ["Dear Bob (second reminder)", "Dear Ada"]
@@ -0,0 +1,73 @@
+# backend/tests/test_file_processing.py
+import os
+
+from PIL import Image
+from pypdf import PdfWriter
+
+from app.models import FileMetadata
+from app.services import file_processing
+from app.services.blob_storage import blob_store
+from app.services.file_processing import get_file_metadata, get_thumbnail_path, process_stored_file
+
+
+def scanned_pdf(tmp_path):
+    """A one-page PDF holding a single embedded image, as a scanner produces"""
+    path = tmp_path / "scan.pdf"
+    Image.new("RGB", (800, 1100), "white").save(path, "PDF")
+    return path
+
+
+def test_blob_hash_comes_from_its_path(db, tmp_path, monkeypatch):
+    source = tmp_path / "evidence.bin"
+    source.write_bytes(b"evidence kept in the blob store")
+    blob = blob_store.store_file(source)
+
+    def rehash(path):
+        raise AssertionError("blob was read again to hash it")
+
+    monkeypatch.setattr(file_processing, "_sha256", rehash)
+    process_stored_file(db, {"file_path": blob.path})
+    db.commit()
+
+    assert get_file_metadata(db, blob.path)["sha256"] == blob.sha256
+
+
+def test_files_outside_the_blob_store_are_hashed(db, tmp_path):
+    path = tmp_path / "legacy.bin"
+    path.write_bytes(b"uploaded before the blob store")
+
+    process_stored_file(db, {"file_path": str(path)})
+    db.commit()
+
+    assert get_file_metadata(db, str(path))["sha256"] == file_processing._sha256(str(path))
+
+
+def test_pdf_thumbnail_shows_the_first_page(db, tmp_path, monkeypatch):
+    # The embedded-image fallback, as on hosts without poppler
+    monkeypatch.setattr(file_processing, "convert_from_path", None)
+    blob = blob_store.store_file(scanned_pdf(tmp_path))
+
+    process_stored_file(db, {"file_path": blob.path})
+    db.commit()
+
+    metadata = get_file_metadata(db, blob.path)
+    assert (metadata["detected_type"], metadata["page_count"], metadata["has_thumbnail"]) == ("pdf", 1, True)
+    with Image.open(get_thumbnail_path(db, blob.path)) as thumbnail:
+        assert max(thumbnail.size) <= 320
+
+
+def test_pdf_without_images_has_no_thumbnail(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(file_processing, "convert_from_path", None)
+    path = tmp_path / "text.pdf"
+    writer = PdfWriter()
+    writer.add_blank_page(width=595, height=842)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+    process_stored_file(db, {"file_path": str(path)})
+    db.commit()
+
+    metadata = db.query(FileMetadata).filter_by(file_path=str(path)).one()
+    assert metadata.page_count == 1
+    assert metadata.thumbnail_path is None
+    assert not os.path.exists(file_processing.THUMBNAIL_DIRECTORY / f"{metadata.sha256}.jpg")
@@ -0,0 +1,135 @@
+# backend/tests/test_job_queue.py
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import SessionLocal
+from app.models import BackgroundJob
+from app.services.job_queue import JobQueue
+
+
+@pytest.fixture
+def queue():
+    queue = JobQueue(workers=4, retry_base_seconds=60, max_attempts=3, lock_timeout=600)
+    queue.handled = []
+    queue.register("record", lambda db, payload: queue.handled.append(payload))
+    return queue
+
+
+def enqueue(db, queue, job_type="record", payload=None):
+    job = queue.enqueue(db, job_type, payload or {"n": 1})
+    db.commit()
+    return job.id
+
+
+def load(db, job_id):
+    db.expire_all()
+    return db.get(BackgroundJob, job_id)
+
+
+def make_due(db, job_id):
+    load(db, job_id).run_after = datetime.now()
+    db.commit()
+
+
+def test_runs_a_job_once(db, queue):
+    job_id = enqueue(db, queue, payload={"file_path": "a.pdf"})
+
+    assert queue.run_next() is True
+    assert queue.run_next() is False
+
+    job = load(db, job_id)
+    assert (job.status, job.attempts, job.locked_at) == ("succeeded", 1, None)
+    assert queue.handled == [{"file_path": "a.pdf"}]
+
+
+def test_concurrent_claims_take_a_job_once(db, queue):
+    job_id = enqueue(db, queue)
+    workers = 8
+    barrier = threading.Barrier(workers)
+    claimed = []
+
+    def claim():
+        with SessionLocal() as session:
+            barrier.wait()
+            job = queue._claim(session)
+            if job is not None:
+                claimed.append(job.id)
+
+    threads = [threading.Thread(target=claim) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert claimed == [job_id]
+    job = load(db, job_id)
+    assert (job.status, job.attempts) == ("running", 1)
+
+
+def test_retries_with_exponential_backoff(db, queue):
+    queue.register("flaky", lambda db, payload: 1 / 0)
+    job_id = enqueue(db, queue, "flaky")
+
+    delays = []
+    for _ in range(2):
+        started = datetime.now()
+        assert queue.run_next() is True
+        job = load(db, job_id)
+        assert job.status == "pending" and job.last_error == "ZeroDivisionError: division by zero"
+        delays.append((job.run_after - started).total_seconds())
+        # Not due again until the backoff has passed
+        assert queue.run_next() is False
+        make_due(db, job_id)
+
+    assert delays[0] == pytest.approx(60, abs=5)
+    assert delays[1] == pytest.approx(120, abs=5)
+
+
+def test_fails_after_max_attempts(db, queue):
+    queue.register("broken", lambda db, payload: 1 / 0)
+    job_id = enqueue(db, queue, "broken")
+
+    for _ in range(3):
+        assert queue.run_next() is True
+        make_due(db, job_id)
+
+    job = load(db, job_id)
+    assert (job.status, job.attempts) == ("failed", 3)
+    assert queue.run_next() is False
+
+
+def test_handler_writes_roll_back_with_a_failed_attempt(db, queue):
+    def write_then_fail(db, payload):
+        db.add(BackgroundJob(job_type="side-effect", payload="{}"))
+        raise RuntimeError("disk full")
+
+    queue.register("partial", write_then_fail)
+    job_id = enqueue(db, queue, "partial")
+
+    assert queue.run_next() is True
+
+    assert load(db, job_id).status == "pending"
+    assert db.query(BackgroundJob).filter_by(job_type="side-effect").count() == 0
+
+
+def test_requeues_jobs_left_running_by_a_crashed_worker(db, queue):
+    stale_id = enqueue(db, queue, payload={"n": "stale"})
+    busy_id = enqueue(db, queue, payload={"n": "busy"})
+    for job_id, locked_at in ((stale_id, datetime.now() - timedelta(seconds=601)), (busy_id, datetime.now())):
+        job = load(db, job_id)
+        job.status, job.locked_at, job.attempts = "running", locked_at, 1
+        db.commit()
+
+    with SessionLocal() as session:
+        queue._requeue_stale(session)
+
+    assert (load(db, stale_id).status, load(db, stale_id).locked_at) == ("pending", None)
+    # Still within its lock timeout: another worker is on it
+    assert load(db, busy_id).status == "running"
+
+    assert queue.run_next() is True
+    job = load(db, stale_id)
+    assert (job.status, job.attempts) == ("succeeded", 2)
+    assert queue.handled == [{"n": "stale"}]
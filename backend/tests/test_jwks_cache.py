@@ -0,0 +1,131 @@
+# backend/tests/test_jwks_cache.py
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.jwks_cache import JWKSKeyStore
+
+
+def make_key(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": kid, "use": "sig", "alg": "RS256"})
+    return private_key, jwk
+
+
+class StandInJWKSServer:
+    """Local stand-in for the identity provider's JWKS endpoint"""
+
+    def __init__(self, keys, delay=0.0):
+        self.keys = list(keys)
+        self.delay = delay
+        self.hits = 0
+        self.status = 200
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.hits += 1
+                time.sleep(server.delay)
+                body = json.dumps({"keys": server.keys}).encode()
+                self.send_response(server.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.uri = f"http://127.0.0.1:{self.httpd.server_address[1]}/keys"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture(scope="module")
+def signing_key():
+    return make_key("key-1")
+
+
+@pytest.fixture
+def jwks_server(signing_key):
+    server = StandInJWKSServer([signing_key[1]])
+    yield server
+    server.close()
+
+
+def test_verifies_token_signed_with_served_key(jwks_server, signing_key):
+    store = JWKSKeyStore(jwks_server.uri)
+    token = jwt.encode({"sub": "user"}, signing_key[0], algorithm="RS256", headers={"kid": "key-1"})
+
+    public_key = store.get_public_key(jwt.get_unverified_header(token)["kid"])
+
+    assert jwt.decode(token, public_key, algorithms=["RS256"])["sub"] == "user"
+    # Served from memory afterwards
+    assert store.get_public_key("key-1") is public_key
+    assert jwks_server.hits == 1
+
+
+def test_concurrent_requests_share_one_refresh(jwks_server):
+    jwks_server.delay = 0.2
+    store = JWKSKeyStore(jwks_server.uri, min_refetch_interval=0)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def lookup():
+        barrier.wait()
+        results.append(store.get_public_key("key-1"))
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert jwks_server.hits == 1
+    assert len(results) == 8 and all(key is not None for key in results)
+
+
+def test_unknown_kid_refetch_is_rate_limited(jwks_server):
+    store = JWKSKeyStore(jwks_server.uri, min_refetch_interval=60)
+    store.refresh()
+
+    assert store.get_public_key("rotated") is None
+    assert store.get_public_key("rotated") is None
+
+    assert jwks_server.hits == 1
+    assert store.stats["rate_limited"] == 2
+
+
+def test_unknown_kid_picks_up_rotated_key(jwks_server):
+    store = JWKSKeyStore(jwks_server.uri, min_refetch_interval=0)
+    store.refresh()
+    _, rotated = make_key("key-2")
+    jwks_server.keys.append(rotated)
+
+    assert store.get_public_key("key-2") is not None
+    assert store.stats["unknown_kid_refetches"] == 1
+    assert jwks_server.hits == 2
+
+
+def test_fetch_error_is_logged_and_keeps_cached_keys(jwks_server, caplog):
+    store = JWKSKeyStore(jwks_server.uri)
+    store.refresh()
+    jwks_server.status = 503
+
+    with caplog.at_level(logging.WARNING, logger="app.jwks_cache"):
+        assert store.refresh(force=True) is False
+
+    assert "jwks_fetch_failed" in caplog.text
+    assert store.stats["fetch_errors"] == 1
+    assert store.get_public_key("key-1") is not None
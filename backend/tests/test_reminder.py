@@ -0,0 +1,37 @@
+# backend/tests/test_reminder.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import ModuleDeadline, OutboxEmail
+from conftest import ADMIN, HOD, PRINCIPAL
+
+
+@pytest.fixture
+def deadline(db, seed):
+    db.add(ModuleDeadline(academic_year_id=1, module="program_entry", deadline=datetime.now() + timedelta(days=3)))
+    db.commit()
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/reminder/send", {"dept_id": 1, "academic_year_id": 1}),
+    ("/reminder/bulk-send", {"academic_year_id": 1, "all_departments": True, "all_roles": True}),
+])
+def test_reminders_are_limited_to_admins_and_principals(client, db, deadline, path, body):
+    assert client.post(path, json=body).status_code in (401, 403)
+    assert client.post(path, json=body, headers=HOD).status_code == 403
+    assert db.query(OutboxEmail).count() == 0
+
+    assert client.post(path, json=body, headers=ADMIN).status_code == 200
+
+
+def test_principal_can_remind_every_department(client, db, deadline):
+    response = client.post(
+        "/reminder/bulk-send",
+        json={"academic_year_id": 1, "all_departments": True},
+        headers=PRINCIPAL,
+    )
+
+    assert response.status_code == 200, response.text
+    assert [result["status"] for result in response.json()["results"]] == ["queued", "queued", "no_recipients"]
+    assert db.query(OutboxEmail).count() == 2
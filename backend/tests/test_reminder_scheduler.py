@@ -0,0 +1,129 @@
+# backend/tests/test_reminder_scheduler.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import SessionLocal
+from app.models import DeadlineOverride, DeadlineReminderLog, ModuleDeadline, OutboxEmail, WorkflowStatus
+from app.services import reminder_scheduler
+from app.services.reminder_scheduler import (
+    due_offset, effective_deadline, find_due_reminders, has_reached, run_reminder_pass
+)
+
+DEADLINE = datetime(2025, 11, 20, 17, 0)
+
+
+@pytest.fixture
+def deadline(db, seed):
+    """Program entry deadline for 2025-26; HoDs in departments 1 and 2, none in 3"""
+    db.add(ModuleDeadline(academic_year_id=1, module="program_entry", deadline=DEADLINE))
+    db.commit()
+
+
+def days_before(days, hours=0):
+    return DEADLINE - timedelta(days=days, hours=hours)
+
+
+def reminded(summary):
+    return sorted((reminder["department_id"], reminder["offset_days"]) for reminder in summary["reminders"])
+
+
+@pytest.mark.parametrize("days_left, offset", [
+    (30, None), (8, None), (7, 7), (5, 7), (4, 7), (3, 3), (2, 3), (1, 1), (0, 1),
+])
+def test_due_offset_is_the_tightest_reached(days_left, offset):
+    assert due_offset(days_left, [7, 3, 1]) == offset
+
+
+def test_due_offset_with_custom_offsets():
+    assert due_offset(10, [14, 2]) == 14
+    assert due_offset(2, [14, 2]) == 2
+    assert due_offset(5, []) is None
+
+
+def test_override_only_extends_the_deadline():
+    assert effective_deadline(DEADLINE) == DEADLINE
+    assert effective_deadline(DEADLINE, DEADLINE + timedelta(days=2)) == DEADLINE + timedelta(days=2)
+    # An override expiring before the module deadline does not bring it forward
+    assert effective_deadline(DEADLINE, DEADLINE - timedelta(days=2)) == DEADLINE
+
+
+@pytest.mark.parametrize("status, reached", [
+    (None, False), ("draft", False), ("submitted", True), ("approved", True), ("completed", True),
+])
+def test_has_reached_follows_the_workflow_order(status, reached):
+    assert has_reached(status, "submitted") is reached
+
+
+def test_reminders_go_out_once_at_each_offset(db, deadline):
+    schedule = [
+        (days_before(10), []),
+        (days_before(7), [(1, 7), (2, 7)]),
+        (days_before(7, hours=-2), []),
+        (days_before(5), []),
+        (days_before(3), [(1, 3), (2, 3)]),
+        (days_before(2), []),
+        (days_before(1), [(1, 1), (2, 1)]),
+        (days_before(0, hours=1), []),
+        (DEADLINE + timedelta(hours=1), []),
+    ]
+    for now, expected in schedule:
+        summary = run_reminder_pass(db, now=now)
+        assert reminded(summary) == expected, now
+        assert summary["queued"] == len(expected)
+        # A second pass at the same time finds everything already recorded
+        assert run_reminder_pass(db, now=now)["queued"] == 0
+
+    assert db.query(DeadlineReminderLog).count() == 6
+    assert db.query(OutboxEmail).count() == 6
+
+
+def test_departments_that_submitted_are_not_reminded(db, deadline):
+    db.add(WorkflowStatus(department_id=2, academic_year_id=1, status="submitted"))
+    db.commit()
+
+    assert reminded(run_reminder_pass(db, now=days_before(3))) == [(1, 3)]
+
+
+def test_a_late_reminder_catches_up_at_the_tightest_offset(db, deadline):
+    # The scheduler was down during the 7-day window
+    assert reminded(run_reminder_pass(db, now=days_before(2))) == [(1, 3), (2, 3)]
+
+
+def test_override_moves_the_department_reminders(db, deadline):
+    run_reminder_pass(db, now=days_before(7))
+    db.add(DeadlineOverride(
+        department_id=1, academic_year_id=1, module_name="program_entry",
+        enabled_by_principal=True, expires_at=DEADLINE + timedelta(days=4)
+    ))
+    db.commit()
+
+    # Department 1 now has 7 days to the extended deadline: a fresh reminder for that deadline
+    summary = run_reminder_pass(db, now=days_before(3))
+    assert reminded(summary) == [(1, 7), (2, 3)]
+    assert {r["department_id"]: r["deadline"] for r in summary["reminders"]}[1] == DEADLINE + timedelta(days=4)
+
+
+def test_dry_run_queues_nothing(db, deadline):
+    summary = run_reminder_pass(db, now=days_before(7), dry_run=True)
+
+    assert reminded(summary) == [(1, 7), (2, 7)]
+    assert summary["queued"] == 0
+    assert db.query(OutboxEmail).count() == 0
+    assert db.query(DeadlineReminderLog).count() == 0
+
+
+def test_reminders_recorded_by_another_process_are_not_queued_twice(db, deadline, monkeypatch):
+    now = days_before(7)
+    # This pass found the reminders due before a concurrent pass recorded them
+    stale = find_due_reminders(db, now)
+    db.rollback()
+    with SessionLocal() as other:
+        assert run_reminder_pass(other, now=now)["queued"] == 2
+
+    monkeypatch.setattr(reminder_scheduler, "find_due_reminders", lambda db, now: stale)
+    summary = run_reminder_pass(db, now=now)
+
+    assert (summary["queued"], summary["reminders"]) == (0, [])
+    assert db.query(OutboxEmail).count() == 2
+    assert db.query(DeadlineReminderLog).count() == 2
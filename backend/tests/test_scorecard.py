@@ -0,0 +1,122 @@
+# backend/tests/test_scorecard.py
+import pytest
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.api.endpoints.scorecard import get_scorecard_submission
+from app.models import (
+    ScoreCardDocument, ScoreCardQuestion, ScoreCardResponse, ScoreCardSubmission, ScoreCardTemplate
+)
+from conftest import HOD, count_statements
+
+
+def make_submission(db, areas):
+    template = ScoreCardTemplate(name="IQAC", academic_year_id=1)
+    db.add(template)
+    db.flush()
+    submission = ScoreCardSubmission(template_id=template.id, department_id=1, submitted_by=6)
+    db.add(submission)
+    db.flush()
+    for number in range(1, areas + 1):
+        question = ScoreCardQuestion(template_id=template.id, question_number=str(number), question_text=f"Area {number}")
+        db.add(question)
+        db.flush()
+        response = ScoreCardResponse(submission_id=submission.id, question_id=question.id, score=number)
+        response.documents = [
+            ScoreCardDocument(document_type="upload", file_name=f"evidence-{number}-{k}.pdf") for k in range(2)
+        ]
+        db.add(response)
+    db.commit()
+    return submission.id
+
+
+@pytest.mark.parametrize("areas", [1, 10, 40])
+def test_submission_detail_query_count_does_not_grow_with_areas(db, seed, areas):
+    submission_id = make_submission(db, areas)
+    db.expunge_all()
+
+    with count_statements() as statements:
+        result = get_scorecard_submission(submission_id, db=db, current_role="admin", current_dept_id=None)
+        body = jsonable_encoder(result)
+
+    assert len(statements) <= 5, statements
+    assert len(body["questions"]) == areas
+    assert [len(item["documents"]) for item in body["responses"]] == [2] * areas
+
+
+@pytest.fixture
+def bulk_submission(db, seed):
+    """A submission with three questions, one already answered with a OneDrive link, plus a question of another template"""
+    template = ScoreCardTemplate(id=1, name="IQAC", academic_year_id=1)
+    other_template = ScoreCardTemplate(id=2, name="NBA", academic_year_id=1)
+    db.add_all([template, other_template])
+    db.add_all([
+        ScoreCardQuestion(id=1, template_id=1, question_number="1", question_text="Workshops", max_score=5),
+        ScoreCardQuestion(id=2, template_id=1, question_number="2", question_text="Papers", max_score=10, requires_document=True),
+        ScoreCardQuestion(id=3, template_id=1, question_number="3", question_text="Patents", max_score=4),
+        ScoreCardQuestion(id=4, template_id=2, question_number="1", question_text="Other template", max_score=5),
+    ])
+    db.add(ScoreCardSubmission(id=1, template_id=1, department_id=1, submitted_by=6))
+    existing = ScoreCardResponse(id=1, submission_id=1, question_id=1, response_text="1", score=5)
+    existing.documents = [ScoreCardDocument(document_type="onedrive", onedrive_link="https://old.example.com")]
+    db.add(existing)
+    db.commit()
+
+
+def save_bulk(client, responses, headers=HOD):
+    return client.post("/api/scorecard/responses/bulk", json={"submission_id": 1, "responses": responses}, headers=headers)
+
+
+def test_bulk_save_upserts_responses_in_one_commit(client, db, bulk_submission):
+    commits = []
+    listener = lambda session: commits.append(session)
+    event.listen(Session, "after_commit", listener)
+    try:
+        response = save_bulk(client, [
+            {"question_id": 1, "count_response": 0, "onedrive_links": ["https://new.example.com", " "]},
+            {"question_id": 2, "count_response": 3},
+            {"question_id": 3, "count_response": 2, "has_physical_documents": True, "physical_location": "IQAC cell"},
+        ])
+    finally:
+        event.remove(Session, "after_commit", listener)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["saved"] == 3
+    assert len(commits) == 1
+
+    db.expire_all()
+    responses = {r.question_id: r for r in db.query(ScoreCardResponse)}
+    assert len(responses) == 3
+    # The existing response is updated in place
+    assert responses[1].id == 1
+    assert (responses[1].response_text, responses[1].score) == ("0", 0)
+    # 80% without the required documents
+    assert responses[2].score == 8
+    assert responses[3].score == 4
+    assert [d.onedrive_link for d in responses[1].documents] == ["https://new.example.com"]
+    assert [(d.document_type, d.physical_location) for d in responses[3].documents] == [("physical", "IQAC cell")]
+
+
+def test_bulk_save_without_links_keeps_existing_links(client, db, bulk_submission):
+    assert save_bulk(client, [{"question_id": 1, "count_response": 2}]).status_code == 200
+
+    db.expire_all()
+    assert [d.onedrive_link for d in db.query(ScoreCardDocument)] == ["https://old.example.com"]
+
+
+@pytest.mark.parametrize("responses", [
+    [{"question_id": 2, "count_response": 1}, {"question_id": 4, "count_response": 1}],
+    [{"question_id": 2, "count_response": 1}, {"question_id": 2, "count_response": 3}],
+])
+def test_bulk_save_rejects_invalid_questions_without_writing(client, db, bulk_submission, responses):
+    response = save_bulk(client, responses)
+
+    assert response.status_code == 400
+    db.expire_all()
+    assert db.query(ScoreCardResponse).count() == 1
+
+
+def test_bulk_save_is_limited_to_own_department(client, bulk_submission):
+    response = save_bulk(client, [{"question_id": 1, "count_response": 1}], headers={"Authorization": "Bearer hod-eee-token"})
+    assert response.status_code == 403
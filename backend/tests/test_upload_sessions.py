@@ -0,0 +1,88 @@
+# backend/tests/test_upload_sessions.py
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.models import Document, Event, ProgramType
+from app.services.upload_sessions import upload_sessions
+
+HOD = {"Authorization": "Bearer hod-civ-token"}
+CONTENT = b"%PDF-1.4 " + bytes(range(256)) * 8
+
+
+@pytest.fixture
+def event(db, seed):
+    db.add(ProgramType(id=1, program_type="Workshop", activity_category="A", departments="ALL", budget_mode="Fixed"))
+    db.add(Event(id=1, title="Expo", event_date=datetime(2025, 9, 1), budget_amount=100, department_id=1, academic_year_id=1, program_type_id=1))
+    db.commit()
+
+
+@pytest.fixture
+def session_id(client, event):
+    response = client.post("/documents/upload-sessions", json={
+        "event_id": 1, "doc_type": "report", "filename": "report.pdf", "total_size": len(CONTENT)
+    }, headers=HOD)
+    assert response.status_code == 200, response.text
+    return response.json()["session_id"]
+
+
+def put_chunk(client, session_id, offset, data):
+    return client.put(f"/documents/upload-sessions/{session_id}", params={"offset": offset}, content=data, headers=HOD)
+
+
+def finalize(client, session_id):
+    return client.post(f"/documents/upload-sessions/{session_id}/finalize", headers=HOD)
+
+
+def test_interrupted_chunk_keeps_received_bytes_and_resumes(client, db, session_id):
+    async def cut_off_stream():
+        yield CONTENT[:300]
+        raise ConnectionResetError("client went away")
+
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(upload_sessions.write_chunk(session_id, 0, cut_off_stream()))
+
+    status = client.get(f"/documents/upload-sessions/{session_id}", headers=HOD).json()
+    assert (status["offset"], status["complete"]) == (300, False)
+
+    assert put_chunk(client, session_id, 300, CONTENT[300:]).json()["complete"] is True
+    response = finalize(client, session_id)
+    assert response.status_code == 200, response.text
+    with open(db.query(Document).one().file_path, "rb") as stored:
+        assert stored.read() == CONTENT
+
+
+def test_out_of_order_chunk_is_rejected_with_current_offset(client, session_id):
+    assert put_chunk(client, session_id, 0, CONTENT[:100]).status_code == 200
+
+    response = put_chunk(client, session_id, 500, CONTENT[500:600])
+
+    assert response.status_code == 409
+    assert response.json()["detail"]["offset"] == 100
+    assert client.get(f"/documents/upload-sessions/{session_id}", headers=HOD).json()["offset"] == 100
+
+
+def test_finalize_after_a_gap_is_rejected_until_the_gap_is_filled(client, db, session_id):
+    put_chunk(client, session_id, 0, CONTENT[:1000])
+
+    response = finalize(client, session_id)
+    assert response.status_code == 409
+    assert response.json()["detail"]["offset"] == 1000
+    assert db.query(Document).count() == 0
+
+    put_chunk(client, session_id, 1000, CONTENT[1000:])
+    assert finalize(client, session_id).status_code == 200
+
+
+def test_concurrent_finalize_returns_conflict(client, db, session_id):
+    put_chunk(client, session_id, 0, CONTENT)
+
+    # Another finalize is still storing the data
+    with upload_sessions.locked(session_id):
+        assert finalize(client, session_id).status_code == 409
+
+    # ...or has already moved it into the blob store
+    upload_sessions.data_path(session_id).unlink()
+    assert finalize(client, session_id).status_code == 409
+    assert db.query(Document).count() == 0
@@ -0,0 +1,85 @@
+# backend/tests/test_upload_storage.py
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from app.services.upload_storage import UPLOAD_MULTIPART_OVERHEAD, UploadSizeLimitMiddleware
+
+MAX_SIZE = 256 * 1024
+
+
+@pytest.fixture
+def upload_app():
+    app = FastAPI()
+    app.state.handled = []
+    app.add_middleware(UploadSizeLimitMiddleware, limits={"/upload/\\d+": MAX_SIZE})
+
+    @app.post("/upload/{item_id}")
+    async def upload(item_id: int, file: UploadFile = File(...)):
+        app.state.handled.append(item_id)
+        return {"size": len(await file.read())}
+
+    @app.post("/other")
+    async def other(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    return app
+
+
+def multipart(size):
+    boundary = "bench-boundary"
+    head = f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="a.pdf"\r\nContent-Type: application/pdf\r\n\r\n'.encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    return head + b"x" * size + tail, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def chunked(body, chunk_size=64 * 1024):
+    # A generator body is sent without Content-Length
+    for start in range(0, len(body), chunk_size):
+        yield body[start:start + chunk_size]
+
+
+def test_accepts_uploads_within_the_limit(upload_app):
+    body, headers = multipart(MAX_SIZE)
+    response = TestClient(upload_app).post("/upload/1", content=body, headers=headers)
+
+    assert response.status_code == 200
+    assert response.json() == {"size": MAX_SIZE}
+
+
+def test_rejects_declared_oversized_body_before_parsing(upload_app):
+    body, headers = multipart(MAX_SIZE + UPLOAD_MULTIPART_OVERHEAD + 1)
+    response = TestClient(upload_app).post("/upload/1", content=body, headers=headers)
+
+    assert response.status_code == 413
+    assert upload_app.state.handled == []
+
+
+def test_aborts_streamed_body_once_it_passes_the_limit(upload_app):
+    body, headers = multipart(4 * (MAX_SIZE + UPLOAD_MULTIPART_OVERHEAD))
+    sent = []
+
+    async def tracked():
+        for chunk in chunked(body):
+            sent.append(len(chunk))
+            yield chunk
+
+    async def post():
+        # Unlike TestClient, ASGITransport hands the body to the app chunk by chunk
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=upload_app), base_url="http://test") as client:
+            return await client.post("/upload/1", content=tracked(), headers=headers)
+
+    response = asyncio.run(post())
+
+    assert response.status_code == 413
+    assert upload_app.state.handled == []
+    # Reading stopped at the limit rather than at the end of the body
+    assert sum(sent) <= MAX_SIZE + UPLOAD_MULTIPART_OVERHEAD + 64 * 1024
+
+
+def test_other_paths_are_not_limited(upload_app):
+    body, headers = multipart(2 * (MAX_SIZE + UPLOAD_MULTIPART_OVERHEAD))
+    assert TestClient(upload_app).post("/other", content=chunked(body), headers=headers).status_code == 200
@@ -0,0 +1,38 @@
+# backend/tests/test_zip_stream.py
+import io
+import os
+import zipfile
+from datetime import datetime
+
+from app.services.zip_stream import ZipEntry, stream_zip
+
+
+def test_streams_files_with_pre_1980_timestamps(tmp_path):
+    evidence = tmp_path / "evidence.pdf"
+    evidence.write_bytes(b"%PDF-1.4 scanned in the seventies")
+    os.utime(evidence, (0, 0))
+
+    archive = b"".join(stream_zip([
+        ZipEntry(arcname="1/evidence.pdf", path=str(evidence)),
+        ZipEntry(arcname="manifest.csv", data=b"question,file\n1,evidence.pdf\n"),
+    ], chunk_size=8))
+
+    with zipfile.ZipFile(io.BytesIO(archive)) as extracted:
+        assert extracted.testzip() is None
+        assert extracted.read("1/evidence.pdf") == evidence.read_bytes()
+        assert extracted.getinfo("1/evidence.pdf").date_time == (1980, 1, 1, 0, 0, 0)
+
+
+def test_member_timestamp_comes_from_the_entry(tmp_path):
+    evidence = tmp_path / "evidence.pdf"
+    evidence.write_bytes(b"%PDF-1.4 shared blob")
+    # Touched by a later upload that deduplicated onto the same blob
+    os.utime(evidence)
+
+    archive = b"".join(stream_zip([
+        ZipEntry(arcname="1/evidence.pdf", path=str(evidence), modified=datetime(2025, 9, 2, 10, 30, 14)),
+    ]))
+
+    with zipfile.ZipFile(io.BytesIO(archive)) as extracted:
+        # DOS timestamps have two-second resolution
+        assert extracted.getinfo("1/evidence.pdf").date_time == (2025, 9, 2, 10, 30, 14)
@@ -100,19 +100,10 @@ const DocumentManagement = () => {
   const loadDocuments = useCallback(async () => {
     try {
       setLoading(true);
-      const response = await Api.get('/documents/list');
-      let docs = response.data;
-
-      // For HoDs: filter by their department only
-      if (userRole === 'hod' && userDepartmentId) {
-        // Get department events from all events (not just filtered ones)
-        const allEventsResponse = await Api.get('/events');
-        const departmentEvents = allEventsResponse.data.filter(event => 
-          event.department_id === userDepartmentId
-        );
-        const departmentEventIds = departmentEvents.map(event => event.id);
-        docs = docs.filter(doc => departmentEventIds.includes(doc.event_id));
-      }
+      // For HoDs: the server returns their department's documents only
+      const params = userRole === 'hod' && userDepartmentId ? { department_id: userDepartmentId } : {};
+      const response = await Api.get('/documents/list', { params });
+      const docs = response.data;
       // For Principal: keep all documents, filtering will be done in the render logic
 
       setDocuments(docs);